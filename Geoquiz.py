@@ -13,226 +13,417 @@ wurde mithilfe von ChatGpt überprüft und ins .json-Format gewandelt:
     sowie https://gist.github.com/ofou/df09a6834a8421b4f376c875194915c9
 )
 Programmablauf und Features:
-Die Benutzer werden mit Punktestand aus einer weiteren Datei geladen (und wenn mit Quit beendet wird, wird gespeichert).
+Die Benutzer werden mit Punktestand aus einer SQLite-Datenbank geladen, jeder Punkt wird sofort gespeichert
+(die alte json-Datei wird beim ersten Start einmalig übernommen). Mit SPIELERSPEICHER = "json" bleibt es bei der
+json-Datei, die dann im Hintergrund automatisch gespeichert wird.
 Der Benutzer gibt einen Namen an, sucht sich die Kontinente aus und soll dann immer eine Hauptstadt finden,
 dazu klickt er auf die projizierte Weltkarte und versucht, so nahe wie möglich an die Stadt zu klicken.
-Es ist möglich, mithilfe des Mausrads zu zoomen.
-Der Klick auf die Weltkarte wird über ein button-press-event registriert und ausgewertet,
+Es ist möglich, mithilfe des Mausrads zu zoomen und die Karte mit gedrückter Maustaste zu verschieben.
+Der Klick auf die Weltkarte wird über ein button-press-event registriert und beim Loslassen ausgewertet,
 der Abstand zwischen Klickpunkt und Stadt wird berechnet.
 Wenn der Klickpunkt weniger als 1000km entfernt ist, war die Antwort richtig, der Spieler bekommt einen Punkt.
+Nach einem Fehlversuch wird der Toleranzring um den Klick gezeigt, nach dem letzten der um die Stadt
+(vorberechnet in trefferzonen.py).
 Bei drei erfolglosen Versuchen gilt die Antwort als falsch beantwortet.
 Nach 10 Runden wird eine Auswertung der Antworten eingeblendet und das Spiel beginnt von vorn.
+Jeder Klick wird mit Stadt und Abstand in klicks.bin gespeichert (klickstatistik.py), "Klickkarte" zeigt
+sie als Heatmap: während einer Runde die Klicks des Spielers, danach alle Klicks auf die gesuchte Stadt.
+Alle Spiele (Start, Zielstädte, Klicks, Ergebnisse) stehen außerdem in ereignisse.bin (ereignisprotokoll.py).
 
 Achtung, ich habe cartopy verwendet, das muss erst installiert werden.
-Es gibt eine Alternativversion mit matplotlib und einem Hintergrundbild, die funktioniert aber nicht so gut.
-Dafür müssen beim import, bei der Initialisierung der Klasse Hauptstadtplotter und bei der Methode plot_world
-ein paar Zeilen auskommentiert werden. Einfach nach "cartopy" suchen
+Gezeichnet wird die Karte von einem Renderer (renderer.py), ausgewählt mit KARTE oder der Umgebungsvariablen
+GEOQUIZ_KARTE: "cartopy" (voreingestellt), "raster" mit einem Hintergrundbild statt der cartopy-Kartendaten
+(das Bild steht in RASTERBILD: world_map_300.png, world_map_600.png oder ein größeres Weltkartenbild, dafür
+braucht es kein cartopy) oder "agg" mit demselben Bild ohne Bildschirm.
 """
 
 #Datenverarbeitung
-import json
-import random
+import atexit
+import os
+import threading
+import time
 
+STARTZEIT = time.perf_counter()
+
+#Hauptstadtliste als binärer Zwischenspeicher
+import datensatz
 #Abstandsberechnung
-from math import radians, sin, cos, sqrt, atan2
+import geodaesie
+#Spielregeln ohne Tk und matplotlib
+import spiellogik
+#Spieler und Punktestände in SQLite oder json
+import spielerspeicher
+#beendete Spiele speichern (Export als Bilder mit python spielexport.py)
+import spielexport
+#Spielerliste im Spielermenü
+import spielerliste
+#alle Klicks für die Heatmap
+import klickstatistik
+#Protokoll aller Runden und Klicks
+import ereignisprotokoll
+#vorberechnete Trefferzonen und Toleranzringe
+import trefferzonen
 #from geopy.distance import geodesic
 
 #Kartenprojektion
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-#import matplotlib.image as mpimg #für Weltkarte mit Matplotlib
-import cartopy.crs as ccrs #für Weltkarte mit cartopy
-import cartopy.feature as cfeature #für Weltkarte mit cartopy
-
-"""Auslesen der Spieldateien: Hauptstadtliste und Spielerliste"""
-with open('./capital_continent_country_data.json', 'r') as staedte:
-    capitals = json.load(staedte)
-with open('./spieler_score.json', 'r') as spieler_logbuch:
-    spieler = json.load(spieler_logbuch)
+#matplotlib, das TkAgg-Backend und cartopy brauchen zusammen mehrere Sekunden zum Importieren.
+#Sie werden deshalb erst in grafik_laden() im Hintergrund geladen, während das Spielermenü schon angezeigt wird.
+FigureCanvasTkAgg = None
+renderer = None #zeichnet die Weltkarte, je nach KARTE mit cartopy oder aus einem Bild
+
+#"sqlite": jeder Punkt wird sofort in spieler_score.db gespeichert
+#"json": spieler_score.json wie bisher, aber automatisch im Hintergrund gespeichert
+SPIELERSPEICHER = "sqlite"
+
+#Renderer der Weltkarte (siehe renderer.py), die Umgebungsvariable GEOQUIZ_KARTE hat Vorrang:
+#"cartopy": Küsten, Grenzen und Ozeane als Vektordaten (Natural Earth bzw. basiskarte.bin)
+#"raster": Weltkarte aus dem Bild RASTERBILD
+#"agg": Weltkarte aus RASTERBILD auf einem eigenen Agg-Canvas (mit nur_gradnetz=True nur Ozean und Gradnetz)
+KARTE = os.environ.get("GEOQUIZ_KARTE", "cartopy")
+RASTERBILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "world_map_600.png")
+#Einstellungen, die an den jeweiligen Renderer gehen
+KARTE_OPTIONEN = {"raster": dict(bild=RASTERBILD), "agg": dict(bild=RASTERBILD)}
+
+#Spieldateien, werden in daten_laden() befüllt
+capitals = []
+spieler = None
 kontinent_liste = []
-for eintrag in capitals:
-    if eintrag["Kontinent"] not in kontinent_liste:
-        kontinent_liste.append(eintrag["Kontinent"])
+raumindex = None
+zonen = None
+klicks = None
+protokoll = None
+
+
+def daten_laden():
+    """Auslesen der Spieldateien: Hauptstadtliste und Spielerliste"""
+    global capitals, spieler, raumindex, zonen, klicks, protokoll
+    capitals = datensatz.laden('./capital_continent_country_data.json')
+    spieler = spielerspeicher.oeffnen(SPIELERSPEICHER, './spieler_score.db', './spieler_score.json')
+    kontinent_liste[:] = capitals.kontinente
+    #räumlicher Index über alle Hauptstädte für "welche Hauptstadt ist am nächsten?"
+    raumindex = geodaesie.Raumindex(capitals.koordinaten)
+    #Trefferzonen aller Hauptstädte für alle Schwierigkeitsgrade, aus .geoquiz_cache oder neu berechnet
+    zonen = trefferzonen.laden(capitals)
+    #gespeicherte Klicks aller Spiele (klicks.bin), die Histogramme werden erst bei Bedarf gezählt
+    klicks = klickstatistik.Klickstatistik(capitals.kontinent, capitals.kontinente, '.')
+    #Spielstarts, Zielstädte, Klicks und Ergebnisse, blockweise an ereignisse.bin angehängt
+    protokoll = ereignisprotokoll.Ereignisprotokoll('./ereignisse.bin')
+
+
+def speicher_schliessen():
+    """schreibt ausstehende Änderungen (Spielerliste, Klicks, Ereignisprotokoll) und schließt die Dateien.
+    Läuft beim Beenden mit Quit, beim Schließen eines Fensters und über atexit bei jedem anderen Ende des
+    Programms; mehrfaches Aufrufen schadet nicht."""
+    if spieler is not None:
+        spieler.schliessen()
+    if klicks is not None:
+        klicks.schliessen()
+    if protokoll is not None:
+        protokoll.schliessen()
+
+
+atexit.register(speicher_schliessen)
+
+
+def grafik_laden():
+    """importiert matplotlib, das TkAgg-Backend und was der Renderer braucht, z.B. cartopy
+    (einmalig, weitere Aufrufe kosten nichts)"""
+    global FigureCanvasTkAgg, renderer
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    import renderer
+    renderer.vorladen(KARTE)
+
+
+class Vorlader(threading.Thread):
+    """Lädt im Hintergrund matplotlib und cartopy, erstellt den Hauptstadtplotter und rendert die Karte
+    ein erstes Mal offscreen, während der Spieler im Spielermenü seinen Namen eintippt.
+
+    Im Thread wird kein Tk aufgerufen, das Einbinden in das Hauptfenster passiert danach im Hauptthread
+    (Hauptfenster.plotter_einbinden).
+    """
+    def __init__(self, main_window):
+        super().__init__(daemon=True)
+        self.main_window = main_window
+        self.plotter = None
+        self.fehler = None
+
+    def run(self):
+        try:
+            grafik_laden()
+            plotter = Hauptstadtplotter(self.main_window.root, self.main_window)
+            plotter.vorzeichnen()
+            self.plotter = plotter
+        except Exception as fehler:
+            self.fehler = fehler
 
 
 class Hauptstadtplotter():
     """Diese Klasse plottet eine Weltkarte und zeigt darauf Städte an."""
+    ZOOMFAKTOR = 1.5
+    BILDDAUER_MS = 16 #Zoom und Verschieben werden höchstens einmal pro Bild (ca. 60 Hz) neu gezeichnet
+    ZIEHSCHWELLE_PX = 5 #erst ab dieser Mausbewegung wird aus einem Klick ein Verschieben der Karte
+    VERFEINERN_NACH_MS = 300 #so lange muss nach dem letzten Zoomen Ruhe sein, bis die genaue Karte gezeichnet wird
+
     def __init__(self, master, main_window):
 
         self.master = master
         self.main_window = main_window
-        self.fig = plt.Figure(figsize=(16, 10))
+        #Figur, Achse und Karte kommen vom Renderer, die Datenkoordinaten sind immer Längen- und Breitengrad
+        self.renderer = renderer.erstellen(KARTE, **KARTE_OPTIONEN.get(KARTE, {}))
+        self.fig = self.renderer.fig
+        self.ax = self.renderer.ax
 
-        # mit cartopy:
-        self.ax = self.fig.add_subplot(1, 1, 1, projection=ccrs.PlateCarree()) #mit cartopy
-        #ohne cartopy:
-        #self.ax = self.fig.add_subplot(1, 1, 1) #ohne cartopy
-
-        self.fig.tight_layout()
         self.fig.canvas.mpl_connect('button_press_event', self.onclick)
+        self.fig.canvas.mpl_connect('button_release_event', self.loslassen)
+        self.fig.canvas.mpl_connect('motion_notify_event', self.ziehen)
         self.fig.canvas.mpl_connect('scroll_event', self.zoom)
+        self.fig.canvas.mpl_connect('draw_event', self.hintergrund_sichern)
+        self.fig.canvas.mpl_connect('motion_notify_event', self.hover)
+
+        #Blitting: die statische Karte wird einmal gezeichnet und als Hintergrund zwischengespeichert,
+        #die beweglichen Elemente (Klickpunkte, Stadt, Linie, Haken/Kreuz, Ringe) werden nur noch darübergeblittet,
+        #sie liegen in den festen Ebenen des Renderers
+        self.basiskarte_fertig = False
+        self.hintergrund = None
+        self.hintergrund_ansicht = None
+        #Ausgangsansicht: umfasst die Städte der ausgewählten Kontinente, weiter geht es nicht heraus
+        self.grundansicht = renderer.WELTANSICHT
+        self.tooltip = None
+        self.tooltip_index = -1
+        #ausstehender Zoom als (Faktor, Verschiebung x, Verschiebung y), siehe zoom()
+        self.zoom_transformation = None
+        self.zoom_auftrag = None
+        self.letztes_bild = 0.0
+        #Verschieben der Karte mit gedrückter Maustaste: Position und Ansicht beim Drücken, aktuelle Verschiebung
+        self.druck = None
+        self.verschiebt = False
+        self.verschiebung = (0, 0)
+        self.verschieben_auftrag = None
+        #während schnellem Zoomen wird eine vereinfachte Karte gezeichnet, nach einer Pause die genaue
+        self.karte = []
+        self.vereinfacht = False
+        self.verfeinern_auftrag = None
 
         #Label im Hauptfenster, die durch die Klasse angesteuert werden
         self.label_kontinente = self.main_window.label_kontinente
         self.label_stadt = self.main_window.label_stadt
         self.label_counter =self.main_window.label_counter
-
-        #Auswertungslisten
-        self.abgehakt = []
-        self.ergebnisse = []
-
-        #Spielvariablen
-        self.gewonnen = False
-        self.verloren = False
+        self.label_hinweis = self.main_window.label_hinweis
+        self.label_runde = self.main_window.label_runde
+
+        #Die Spielregeln stecken in der Spielsitzung, der Plotter zeigt nur deren Ereignisse an
+        self.spiel = self.main_window.spiel
+        self.spiel.abonnieren("neue_runde", self.random_capital)
+        self.spiel.abonnieren("stapel_leer", self.stapel_leer)
+        self.spiel.abonnieren("daneben", self.zeige_daneben)
+        self.spiel.abonnieren("treffer", self.zeige_treffer)
+        self.spiel.abonnieren("verloren", self.zeige_verloren)
+        self.spiel.abonnieren("runde_beendet", self.next_round)
+        self.spiel.abonnieren("spiel_beendet", self.spiel_beendet)
+
+        #Anzeigevariablen
         self.all_capitals_on_screen = False
-        self.cityName = ""
-        self.runde = 0
-        self.index = -1
-        self.x = 0
-        self.y = 0
         self.x_click = None
         self.y_click = None
         self.klickPoint = (self.y_click, self.x_click)
-        self.klick_liste = []
-        self.counter = 3
 
-    def start_spiel(self):
-        self.runde = 1
-        self.random_capital()
-        print(self.index)
-        self.plot_world()
+    @property
+    def x(self):
+        """Längengrad der aktuellen Stadt"""
+        return self.spiel.stadt['Längengrad']
 
-    def zufallszahl(self, minzahl, maxzahl):
-        z = random.randint(minzahl, maxzahl)
-        return z
+    @property
+    def y(self):
+        """Breitengrad der aktuellen Stadt"""
+        return self.spiel.stadt['Breitengrad']
 
+    def start_spiel(self):
+        self.spiel.schwierigkeitsgrad = self.main_window.schwierigkeitsgrad
+        #die Ausdehnung ist pro Kontinentauswahl vorberechnet, gezeichnet wird nur noch dieser Ausschnitt
+        self.grundansicht = self.renderer.ansicht_fuer(getattr(self.main_window.filtered_capitals, "ausdehnung", None))
+        self.renderer.ansicht_setzen(*self.grundansicht)
+        self.spiel.neues_spiel(self.main_window.filtered_capitals)
 
-    def random_capital(self):
-        """Sucht eine zufällige Stadt aus.
+    def random_capital(self, stadt):
+        """Zeigt die neue Stadt an.
 
-            Eine zufällige indexzahl wird erstellt, geprüft, ob sie schon dran war und dann werden die Stadt-Eigenschaften
-            aus der nach Kontinent gefilterten Liste zugewiesen: Koordinaten, Stadtname, Kontinentname und die dazugehörigen Labels werden aktualisiert
+            Die Spielsitzung hat eine zufällige Stadt ausgesucht, die noch nicht dran war: Stadtname, Kontinentname
+            und die dazugehörigen Labels werden aktualisiert und die Karte wird zurückgesetzt
         """
-        #print("neue Stadt, bisherige Städte", self.abgehakt)
-        self.index = self.zufallszahl(0, len(self.main_window.filtered_capitals)-1)
-        while(self.index in self.abgehakt):
-            self.index = self.zufallszahl(0,len(self.main_window.filtered_capitals))
-
-        self.x = self.main_window.filtered_capitals[self.index]['Längengrad']
-        self.y = self.main_window.filtered_capitals[self.index]['Breitengrad']
-        self.cityName = self.main_window.filtered_capitals[self.index]['Hauptstadt']
-        self.kontinentName = self.main_window.filtered_capitals[self.index]['Kontinent']
-        self.label_stadt.config(text = self.cityName)
-        self.label_kontinente.config(text=self.kontinentName)
-        plt.title(capitals[self.index]["Hauptstadt"])
+        self.label_stadt.config(text = stadt['Hauptstadt'])
+        self.label_kontinente.config(text=stadt['Kontinent'])
+        self.label_hinweis.config(text="")
+        self.label_runde.config(text=f"Runde: {self.spiel.runde} / {spiellogik.RUNDEN_PRO_SPIEL}")
+        self.counter_update()
+        self.plot_world()
+
+    def stapel_leer(self, durchgaenge):
+        """Alle Hauptstädte der Auswahl waren schon dran, ab jetzt wiederholen sie sich"""
+        self.label_hinweis.config(text="Alle Hauptstädte waren schon dran - es geht von vorne los")
+        self.master.after(3000, lambda: self.label_hinweis.config(text=""))
 
     """Hier beginnen die Plot-Methoden: 
     Weltkarte, Klickpunkt, Linie zwischen Klickpunkt und Stadt, sowie alle Hauptstädte der ausgewählten Kontinente
     Sie sind jeweils einzeln als Methode ansteuerbar.    
-    Für plot_world gibt es eine Version mit Cartopy-Features und eine mit einem Hintergrundbild
-    Aktiviert ist die für cartopy, da sie stabiler läuft, genauer die Koordinaten darstellt und man besser heranzoomen kann.
+    Gezeichnet wird über den Renderer: mit Cartopy-Features oder mit einem Hintergrundbild (KARTE = "raster"
+    bzw. "agg" ohne Bildschirm).
+    Voreingestellt ist cartopy, da es genauer die Koordinaten darstellt und man besser heranzoomen kann.
     """
     def plot_world(self):
-        """plottet die Weltkarte"""
-        self.ax.clear()
-        """diese Zeilen sind für die Worldmap MIT cartopy"""
-        self.ax.add_feature(cfeature.BORDERS)
-        self.ax.add_feature(cfeature.COASTLINE)
-        self.ax.add_feature(cfeature.OCEAN)
-        self.ax.set_extent([-180, 180, -90, 90], crs=ccrs.PlateCarree())
-        """
-        #diese Zeilen sind für die Worldmap OHNE cartopy:
-        #img = mpimg.imread('world_map_300.png') #ebenfalls mitgeliefert: "world_map_600.png"
-        #self.ax.axis('off')
-        #self.ax.imshow(img, extent=[-180, 180, -90, 90], aspect='auto')
+        """plottet die Weltkarte
+
+        Die Karten-Features werden nur beim ersten Aufruf hinzugefügt und gerendert. Danach werden nur die
+        beweglichen Elemente entfernt und der zwischengespeicherte Hintergrund geblittet - eine neue Runde
+        kostet so nur noch Millisekunden statt eines kompletten Neuzeichnens.
         """
+        self.dynamische_artists_entfernen()
+        self.zoom_verwerfen()
+        if not self.basiskarte_fertig:
+            self.basiskarte_aufbauen()
+        if self.hintergrund is not None and self.hintergrund_ansicht == self.ansicht() and not self.vereinfacht:
+            self.blit()
+        else:
+            #wird ohnehin komplett neu gezeichnet, also gleich die genaue Karte
+            self.genaue_karte()
+            self.renderer.ansicht_setzen(*self.grundansicht)
+            self.fig.canvas.draw()
+
+    def basiskarte_aufbauen(self):
+        """fügt die statischen Elemente der Weltkarte einmalig zur Achse hinzu"""
+        self.karte = self.renderer.basiskarte_zeichnen()
+        self.vereinfacht = False
+        self.renderer.ansicht_setzen(*self.grundansicht)
+        self.tooltip = self.renderer.tooltip()
+        self.basiskarte_fertig = True
+
+    def vorzeichnen(self):
+        """rendert die Karte einmal offscreen, damit cartopy die Kartendaten schon geladen und projiziert hat,
+        bevor das Fenster erscheint. Der dabei gespeicherte Hintergrund passt nicht zum Tk-Canvas und wird verworfen."""
+        self.renderer.offscreen()
+        self.basiskarte_aufbauen()
         self.fig.canvas.draw()
+        self.hintergrund = None
+
+    def ansicht(self):
+        """gibt die aktuellen Achsenlimits zurück, damit erkannt wird, ob der Hintergrund noch passt"""
+        return tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim())
+
+    def hintergrund_sichern(self, event):
+        """Wird nach jedem vollständigen Zeichnen aufgerufen (auch beim Zoomen oder wenn das Fenster
+        seine Größe ändert): Der frisch gerenderte Hintergrund wird gespeichert und die beweglichen
+        Elemente werden darübergezeichnet, da sie als 'animated' vom normalen Zeichnen ausgenommen sind."""
+        self.hintergrund = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.hintergrund_ansicht = self.ansicht()
+        for artist in self.bewegliche_artists():
+            self.ax.draw_artist(artist)
+
+    def blit(self):
+        """stellt den gespeicherten Hintergrund wieder her und zeichnet nur die beweglichen Elemente neu"""
+        if self.hintergrund is None or self.hintergrund_ansicht != self.ansicht():
+            self.fig.canvas.draw()
+            return
+        self.fig.canvas.restore_region(self.hintergrund)
+        for artist in self.bewegliche_artists():
+            self.ax.draw_artist(artist)
+        self.fig.canvas.blit(self.fig.bbox)
+
+    def bewegliche_artists(self):
+        """alle Elemente, die beim Blitting über den Hintergrund gezeichnet werden: pro Ebene ein Artist,
+        egal wie viele Klicks und Städte darin liegen"""
+        artists = self.renderer.bewegliche_artists()
+        if self.tooltip is not None and self.tooltip.get_visible():
+            artists.append(self.tooltip)
+        return artists
+
+    def dynamische_artists_entfernen(self):
+        """entfernt alle beweglichen Elemente (Klicks, Städte, Linien, Haken/Kreuz, Ringe) von der Karte"""
+        self.renderer.ebenen_leeren()
 
     def plot_click_point(self):
         """plottet den Mausklick-Punkte"""
         if (self.x_click and self.y_click):
-            city_click_x = [self.x, self.x_click]
-            city_click_y = [self.y, self.y_click]
-            self.ax.plot(self.x_click, self.y_click, '^')
-        self.fig.canvas.draw()
+            self.renderer.marker(self.x_click, self.y_click, "klicks")
+        self.blit()
 
     def plot_city_point(self):
         """plottet die Stadt"""
-        self.ax.plot(self.x,self.y, 'o')
-        self.ax.set_xlim(-180, 180)
-        self.ax.set_ylim(-90, 90)
-        self.fig.canvas.draw()
+        self.renderer.marker(self.x, self.y, "ziele")
+        self.zoom_verwerfen()
+        if self.ansicht() != self.grundansicht or self.vereinfacht:
+            self.renderer.ansicht_setzen(*self.grundansicht)
+            self.genaue_karte()
+            self.fig.canvas.draw()
+        else:
+            self.blit()
 
     def plot_line(self):
-        """plottet eine Linie zwischen Klickpunkt und Stadt"""
+        """plottet den Großkreisbogen (kürzester Weg auf der Erde) zwischen Klickpunkt und Stadt"""
         if (self.x_click and self.y_click):
-            self.ax.plot(self.x_click, self.y_click, '^')
-            city_click_x = [self.x, self.x_click]
-            city_click_y = [self.y, self.y_click]
-            self.ax.plot(city_click_x, city_click_y, linestyle="dotted")
-        self.fig.canvas.draw()
+            self.renderer.marker(self.x_click, self.y_click, "klicks")
+            self.renderer.grosskreise(self.y, self.x, self.y_click, self.x_click)
+        self.blit()
 
     def plot_capitals(self):
         """Plottet die Positionen aller Hauptstädte der ausgewählten Kontinente"""
         if self.all_capitals_on_screen == False:
             self.all_capitals_on_screen = True
             self.plot_world()
-            capital_list_x = []
-            capital_list_y = []
-            capital_name_list = []
-            for i in range (len(self.main_window.filtered_capitals)):
-                capital_list_x.append(self.main_window.filtered_capitals[i]['Längengrad'])
-                capital_list_y.append(self.main_window.filtered_capitals[i]['Breitengrad'])
-                capital_name_list.append(self.main_window.filtered_capitals[i]['Hauptstadt'])
-            self.ax.scatter(capital_list_x, capital_list_y)
-            self.fig.canvas.draw()
+            #die Koordinaten liegen schon als Spalten vor, keine Listen Stadt für Stadt
+            hauptstaedte = self.main_window.filtered_capitals
+            self.renderer.punkte(hauptstaedte.laenge, hauptstaedte.breite)
+            self.blit()
         else:
             self.all_capitals_on_screen = False
             self.plot_world()
 
+    def plot_klickkarte(self):
+        """blendet die Heatmap der gespeicherten Klicks ein oder aus: während einer Runde die des Spielers,
+        danach die aller Klicks auf die gesuchte Stadt. Das Bild ist immer gleich groß, egal wie viele Klicks."""
+        if len(self.renderer.ebenen["heatmap"]) or klicks is None:
+            self.renderer.heatmap()
+        elif self.spiel.runde_vorbei and self.spiel.stadt is not None:
+            self.renderer.heatmap(*klicks.histogramm("stadt", self.spiel.datensatz_index()))
+        else:
+            self.renderer.heatmap(*klicks.histogramm("spieler", getattr(self.main_window, "spielername", "")))
+        self.blit()
+
     def counter_update(self):
         """Der Counter wird nach jeder Klickauswertung aktualisiert und gibt ein kurzes farbliches Feedback"""
-        self.label_counter.config(text=f"Noch {self.counter} Versuche")
-        if self.gewonnen == True:
+        counter = self.spiel.versuche
+        self.label_counter.config(text=f"Noch {counter} Versuche")
+        if self.spiel.gewonnen == True:
             self.master.after(500, lambda: self.label_counter.config(background='green'))
-        elif self.counter == 3:
+        elif counter == 3:
             self.label_counter.config(background='red')
             self.master.after(500, lambda: self.label_counter.config(background='white'))
-        elif self.counter == 2:
+        elif counter == 2:
             self.label_counter.config(background='red')
             self.master.after(500, lambda: self.label_counter.config(background='white'))
             #self.label_counter.config(bg='green')
-        elif self.counter == 1:
+        elif counter == 1:
             self.label_counter.config(background='red')
             self.master.after(500, lambda: self.label_counter.config(background='yellow'))
-        elif self.counter == 0:
+        elif counter == 0:
             self.label_counter.config(background='red')
 
-
-    def unlock(self):
-        """Klicks auf die Karte sind am Ende der Runde gesperrt und werden hier wieder aufgehoben"""
-        if self.gewonnen == True:
-            self.gewonnen = False
-        self.verloren = False
-
-    def next_round(self):
-        self.runde += 1
-        print("Runde:", self.runde)
-        self.abgehakt.append(self.index)
-        self.ergebnisse.append(self.gewonnen)
-        self.klick_liste.clear()
-        self.counter = 3
-
+    def next_round(self, runde, gewonnen):
+        """Countdown bis zur nächsten Runde, danach sucht die Spielsitzung eine neue Stadt aus.
+        Bis dahin sind Klicks auf die Karte gesperrt."""
         self.master.after(1000, lambda: self.label_counter.config(text=f"Neue Runde in 5"))
         self.master.after(2000, lambda: self.label_counter.config(text=f"Neue Runde in 4"))
         self.master.after(3000, lambda: self.label_counter.config(text=f"Neue Runde in 3"))
         self.master.after(4000, lambda: self.label_counter.config(text=f"Neue Runde in 2"))
         self.master.after(5000, lambda: self.label_counter.config(text=f"Neue Runde in 1"))
-        self.master.after(6000, self.random_capital)
-        self.master.after(6000, self.counter_update)
-        self.master.after(6000, self.unlock)
-        self.master.after(6000, self.plot_world)
+        self.master.after(6000, self.spiel.naechste_runde)
+
+    def spiel_beendet(self, ergebnisse):
+        """Nach der letzten Runde wird das Spiel für spielexport.py gespeichert und die Auswertung eingeblendet"""
+        try:
+            spielexport.speichern(spielexport.spiel_als_dict(self.spiel, getattr(self.main_window, "spielername", "")))
+        except OSError as fehler:
+            print(f"Spiel konnte nicht gespeichert werden: {fehler}")
+        self.auswertung()
 
     def auswertung(self):
         """Öffnet ein Fenster mit einer Spielauswertung
@@ -242,162 +433,299 @@ class Hauptstadtplotter():
         """
         auswertungsfenster = tk.Toplevel()
         auswertungsfenster.title("Spielauswertung")
-        auswertungsfenster.geometry("400x300")
+        auswertungsfenster.geometry(f"{self.main_window.setze_fenster(400, 300)}")
         auswertungsfenster.attributes('-topmost', True)
         lbl_staedte = tk.Label(auswertungsfenster)
         lbl_staedte.pack()
         self.plot_world()
 
-        auswertungstext= "\n\nRUNDE BEENDET - SPIELAUSWERTUNG\n\n"
-        auswertungstext += f"Runde #{' ':>2} {'Hauptstadt':<24} {'Land':<27} {'Ergebnis':<8}\n"
-        auswertungstext += f"{'-' * 8}-{'-' * 24}-{'-' * 27}-{'-' * 8}\n"
-        for i in range (len(self.abgehakt)):
-            auswertungstext += f"Runde {i+1:>2}  {self.main_window.filtered_capitals[self.abgehakt[i]]["Hauptstadt"]:<24} {self.main_window.filtered_capitals[self.abgehakt[i]]["Land"]:<27} "
-            if self.ergebnisse[i] == True:
-                auswertungstext += f"Richtig\n"
-            elif self.ergebnisse[i] == False:
-                auswertungstext += f"Falsch\n"
-            else:
-                print("FEHLER in AUSWERTUNG")
-            x_plot = self.main_window.filtered_capitals[self.abgehakt[i]]["Längengrad"]
-            y_plot = self.main_window.filtered_capitals[self.abgehakt[i]]["Breitengrad"]
-            self.ax.plot(x_plot, y_plot, 'o')
+        auswertungstext = self.spiel.auswertungstext()
+        for runde, stadt, ergebnis in self.spiel.auswertung():
+            self.renderer.marker(stadt["Längengrad"], stadt["Breitengrad"], "richtig" if ergebnis else "falsch")
+        #die Wege aller Runden vom letzten Klick zur Stadt, zusammen berechnet und in einer Änderung gezeichnet
+        if self.spiel.runden_klicks:
+            koordinaten, staedte = self.spiel.koordinaten, self.spiel.abgehakt
+            klick_breiten, klick_laengen = zip(*[runde[-1] for runde in self.spiel.runden_klicks])
+            self.renderer.grosskreise(koordinaten.breite[staedte], koordinaten.laenge[staedte], klick_breiten, klick_laengen)
 
-        self.fig.canvas.draw()
+        self.blit()
         lbl_staedte.config(text = auswertungstext, justify='left')
 
         def start_und_quit():
             auswertungsfenster.destroy()
             self.start_spiel()
-        if self.runde > 9:
+        if self.spiel.runde > 9:
             button_new = tk.Button(auswertungsfenster, text="Neues Spiel", command=start_und_quit)
             button_new.pack()
 
     def abstand_berechnen(self,p1,p2):
         """
         Der Abstand wird mithilfe der Haversine-Formel berechnet, ie den Abstand zwischen zwei Punkten auf einer Kugel angibt.
-        Dazu werden die Koordinaten in Bogenmaß umgerechnet, die Haversine-Formel angewendet und der Erdradius multipliziert
         Ich habe zuerst geopy.distance benutzt, das muss aber installiert werden - für das Spiel ist diese Annäherung gut genug.
+        Die Rechnung steckt im Modul geodaesie, das auch ganze Arrays von Punkten auf einmal berechnen kann.
         """
-        lat1, lon1 = map(radians, p1)
-        lat2, lon2 = map(radians, p2)
-
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-        r = 6371.0 #Erdradius in km
-        abstand = r * c
-        return abstand
+        return geodaesie.abstand(p1, p2)
 
     def check(self):
-        """Überprüft den Abstand zwischen Klick und Stadt und ob die Runde gewonnen wurde"""
-        cityPoint = (self.y, self.x)
-        #hier mit geopy:
-        #abst = geodesic(cityPoint, self.klickPoint)
-        #print(abst, type(abst))
-        #hier ohne geopy:
-        abst = self.abstand_berechnen(cityPoint, self.klickPoint)
-        #print(f"Abstand: {abst:f.2} km")
-
-        self.counter -= 1
-        self.counter_update()
-
-        if abst <= self.main_window.schwierigkeitsgrad: #Gewonnen
-            print(abst, self.main_window.schwierigkeitsgrad)
-            self.gewonnen = True
-            self.main_window.spielstand_aktualisieren()
-            self.counter_update()
-            print("Treffer")
-            self.plot_city_point()
-            self.plot_line()
-            haken_x = [-34, 12, 55]
-            haken_y = [4, -46, 37]
-            self.ax.plot(haken_x, haken_y, linestyle="-", color="g", linewidth='10', alpha=0.5)
-            self.fig.canvas.draw()
-            if self.runde >= 10:
-                self.auswertung()
-            else:
-                self.next_round()
-
-        elif self.counter < 1: #Verloren
-            self.verloren = True
-            self.plot_city_point()
-            self.plot_line()
-            kreuz_x = [-38, 38]
-            kreuz_y = [31, -31]
-            kreuz2_x = [38, -38]
-            kreuz2_y = [31, -31]
-            self.ax.plot(kreuz_x, kreuz_y, linestyle="-", color="r", linewidth='10', alpha=0.5)
-            self.ax.plot(kreuz2_x, kreuz2_y, linestyle="-", color="r", linewidth='10', alpha=0.5)
-            self.fig.canvas.draw()
-            self.next_round()
-
-        elif abst > self.main_window.schwierigkeitsgrad: #Falsch geraten
-            print(abst, self.main_window.schwierigkeitsgrad)
-            self.plot_click_point()
-            self.master.after(500, self.fig.canvas.draw)
+        """Meldet den Klick an die Spielsitzung. Die überprüft den Abstand zwischen Klick und Stadt
+        und ob die Runde gewonnen wurde, die Anzeige folgt über deren Ereignisse."""
+        self.spiel.klick(*self.klickPoint)
 
-        else:
-            print("Fehler im CHECK")
+    def zeige_treffer(self, abstand):
+        self.counter_update()
+        self.plot_city_point()
+        self.plot_line()
+        haken_x = [-34, 12, 55]
+        haken_y = [4, -46, 37]
+        self.renderer.overlay(haken_x, haken_y, "g")
+        self.blit()
+
+    def zeige_verloren(self, abstand):
+        self.counter_update()
+        self.klick_hinweis()
+        #Toleranzring um die Stadt: so nah hätte der Klick sein müssen
+        breiten, laengen = self.spiel.toleranzring()
+        self.renderer.ring(laengen, breiten)
+        self.plot_city_point()
+        self.plot_line()
+        kreuz_x = [-38, 38]
+        kreuz_y = [31, -31]
+        kreuz2_x = [38, -38]
+        kreuz2_y = [31, -31]
+        self.renderer.overlay(kreuz_x, kreuz_y, "r")
+        self.renderer.overlay(kreuz2_x, kreuz2_y, "r")
+        self.blit()
+
+    def zeige_daneben(self, abstand):
+        self.counter_update()
+        self.klick_hinweis()
+        #Toleranzring um den Klick (um die Stadt würde er die Lösung verraten): die Stadt liegt außerhalb
+        breiten, laengen = self.spiel.toleranzring(self.y_click, self.x_click)
+        self.renderer.ring(laengen, breiten)
+        self.plot_click_point()
+        self.master.after(500, self.blit)
 
     def zoom(self, event):
         """Zoom-Funktion auf die Weltkarte.
             Per Mausrad-Scrolling wird an den Punkt herangezoomt, auf dem sich die Maus gerade befindet.
-            Dazu wird der Punkt registriert, die Achsen mit einem Scale_factor multipliziert und um die Stelle der
-            Mausposition verschoben und neu gesetzt.
-            Diese Funktion habe ich mir von ChatGPT generieren lassen und leicht angepasst."""
-        # Aktuelle Achsenlimits abrufen
+            Gezeichnet wird hier noch nicht: Jedes Mausrad-Event wird nur in eine ausstehende Transformation
+            (Faktor und Verschiebung, für x und y gleich aufgebaut) eingerechnet. zoom_anwenden() setzt sie höchstens
+            einmal pro Bild um, so werden auch beim schnellen Scrollen nicht dutzende Karten nacheinander gezeichnet."""
+        if event.inaxes is not self.ax or event.xdata is None or event.ydata is None or self.verschiebt:
+            return
+        if event.button == 'up':
+            faktor = 1 / self.ZOOMFAKTOR
+        elif event.button == 'down':
+            faktor = self.ZOOMFAKTOR
+        else:
+            return
+        #Grenzen neu = a * Grenzen alt + b, event.xdata/ydata beziehen sich noch auf die angezeigte Ansicht
+        a, bx, by = self.zoom_transformation or (1.0, 0.0, 0.0)
+        x_center = a * event.xdata + bx
+        y_center = a * event.ydata + by
+        self.zoom_transformation = (faktor * a, faktor * bx + (1 - faktor) * x_center,
+                                    faktor * by + (1 - faktor) * y_center)
+        if self.zoom_auftrag is None:
+            vergangen = int((time.perf_counter() - self.letztes_bild) * 1000)
+            self.zoom_auftrag = self.master.after(max(0, self.BILDDAUER_MS - vergangen), self.zoom_anwenden)
+
+    def zoom_anwenden(self):
+        """setzt die gesammelten Zoom-Schritte auf einmal um und zeichnet die Karte neu"""
+        self.zoom_auftrag = None
+        if self.zoom_transformation is None:
+            return
+        a, bx, by = self.zoom_transformation
+        self.zoom_transformation = None
         xlim = self.ax.get_xlim()
         ylim = self.ax.get_ylim()
-        try:
-            scale_factor = 1.5
-            if event.button == 'up':
-                scale_factor = 1 / scale_factor
-            elif event.button == 'down':
-                scale_factor = scale_factor
-            #Mausposition registrieren
-            x_center = event.xdata
-            y_center = event.ydata
-
-            new_xlim = [x_center - (x_center - xlim[0]) * scale_factor, x_center + (xlim[1] - x_center) * scale_factor]
-            new_ylim = [y_center - (y_center - ylim[0]) * scale_factor, y_center + (ylim[1] - y_center) * scale_factor]
-            #Maximalzoom festlegen
-            if abs(new_xlim[0]) > 180 or abs(new_xlim[1]) > 180 or abs(new_ylim[0]) > 90 or abs(new_ylim[1]) > 90:
-                new_xlim = [-180, 180]
-                new_ylim = [-90, 90]
-
-            print(new_xlim, new_ylim)
-
-            # Achsenlimits aktualisieren
-            self.ax.set_xlim(new_xlim)
-            self.ax.set_ylim(new_ylim)
-            self.fig.canvas.draw()
-        except:
-            """Manchmal kommt es hier zu Fehlern, dann wird die Karte einfach zurückgesetzt"""
-            print("Zoom zurückgesetzt")
-            new_xlim = [-180, 180]
-            new_ylim = [-90, 90]
-            self.ax.set_xlim(new_xlim)
-            self.ax.set_ylim(new_ylim)
+        new_xlim, new_ylim = self.ansicht_begrenzen([a * xlim[0] + bx, a * xlim[1] + bx],
+                                                    [a * ylim[0] + by, a * ylim[1] + by])
+        # Achsenlimits aktualisieren
+        self.ax.set_xlim(new_xlim)
+        self.ax.set_ylim(new_ylim)
+        self.interaktion()
+        self.fig.canvas.draw()
+        self.letztes_bild = time.perf_counter()
+
+    def karte_vereinfachen(self, vereinfacht):
+        """schaltet zwischen der genauen und der vereinfachten Karte um (ohne zu zeichnen)"""
+        if vereinfacht == self.vereinfacht:
+            return
+        self.vereinfacht = vereinfacht
+        #vereinfachte Karte: immer 110m und ohne Ländergrenzen
+        for ebene in self.karte:
+            ebene.vereinfacht = vereinfacht
+            if ebene.name == "grenzen":
+                ebene.set_visible(not vereinfacht)
+
+    def interaktion(self):
+        """Der Nutzer zoomt gerade: bis VERFEINERN_NACH_MS ohne weitere Eingabe vergangen sind,
+        wird nur die vereinfachte Karte gezeichnet"""
+        self.karte_vereinfachen(True)
+        if self.verfeinern_auftrag is not None:
+            self.master.after_cancel(self.verfeinern_auftrag)
+        self.verfeinern_auftrag = self.master.after(self.VERFEINERN_NACH_MS, self.verfeinern)
+
+    def genaue_karte(self):
+        """stellt vor einem vollständigen Zeichnen auf die genaue Karte um, eine geplante Verfeinerung entfällt"""
+        if self.verfeinern_auftrag is not None:
+            self.master.after_cancel(self.verfeinern_auftrag)
+            self.verfeinern_auftrag = None
+        self.karte_vereinfachen(False)
+
+    def verfeinern(self):
+        """Eingabepause: die Karte wird in voller Auflösung neu gezeichnet"""
+        self.verfeinern_auftrag = None
+        if self.verschiebt:
+            #beim Loslassen wird ohnehin genau gezeichnet
+            return
+        if self.vereinfacht:
+            self.karte_vereinfachen(False)
             self.fig.canvas.draw()
 
+    def zoom_verwerfen(self):
+        """vergisst noch nicht gezeichnete Zoom-Schritte, z.B. wenn die Karte für eine neue Runde zurückgesetzt wird"""
+        self.zoom_transformation = None
+
+    def ansicht_begrenzen(self, xlim, ylim):
+        """Maximalzoom: weiter als die Ausgangsansicht (die ausgewählten Kontinente) geht es nicht heraus,
+        ein Ausschnitt, der über ihren Rand ragt, wird zurückgeschoben"""
+        return renderer.begrenzen(xlim, ylim, self.grundansicht)
+
+    def hover(self, event):
+        """Tooltip mit der nächstgelegenen Hauptstadt unter dem Mauszeiger.
+
+        Damit die Lösung nicht verraten wird, ist der Tooltip nur aktiv, wenn alle Hauptstädte angezeigt werden
+        oder die Runde vorbei ist. Die Suche läuft über den räumlichen Index, neu geblittet wird nur,
+        wenn sich die angezeigte Stadt ändert.
+        """
+        if self.tooltip is None or self.verschiebt:
+            return
+        index = -1
+        if (self.all_capitals_on_screen or self.spiel.runde_vorbei) and event.inaxes == self.ax \
+                and event.xdata is not None and event.ydata is not None:
+            index, abstand = raumindex.naechster(event.ydata, event.xdata)
+            #Fangradius: etwa 15 Pixel, umgerechnet in km für die aktuelle Zoomstufe
+            xlim = self.ax.get_xlim()
+            fangradius = 15 * (xlim[1] - xlim[0]) / self.ax.bbox.width * 111.2
+            if abstand > fangradius:
+                index = -1
+        if index == self.tooltip_index:
+            return
+        self.tooltip_index = index
+        if index >= 0:
+            stadt = capitals[index]
+            self.tooltip.xy = (stadt["Längengrad"], stadt["Breitengrad"])
+            self.tooltip.set_text(f"{stadt['Hauptstadt']} ({stadt['Land']})")
+        self.tooltip.set_visible(index >= 0)
+        self.blit()
+
+    def tooltip_ausblenden(self):
+        """versteckt den Tooltip, ohne neu zu zeichnen (z.B. beim Verschieben der Karte)"""
+        if self.tooltip is not None:
+            self.tooltip.set_visible(False)
+            self.tooltip_index = -1
+
+    def klick_hinweis(self):
+        """zeigt nach einem Fehlversuch an, in der Nähe welcher Hauptstadt geklickt wurde"""
+        index, abstand = raumindex.naechster(self.y_click, self.x_click)
+        if index >= 0:
+            self.label_hinweis.config(text=f"Du hast in der Nähe von {capitals[index]['Hauptstadt']} geklickt")
+
     def onclick(self, event):
-        """Hier wird der Mausklick auf die Weltkarte ausgewertet"""
+        """Maustaste gedrückt: Ob das ein Klick auf die Karte oder der Anfang eines Verschiebens ist,
+        entscheidet sich erst in ziehen() bzw. loslassen()"""
         if event.button == 1:
-            if self.gewonnen == False and self.verloren == False:
-                if event.xdata!=None and event.ydata!=None:
-                    try:
-                        self.x_click = float(event.xdata)
-                        self.y_click = float(event.ydata)
-                        self.klickPoint = (self.y_click, self.x_click)
-                        self.klick_liste.append(self.klickPoint)
-                        self.check()
-                    except:
-                        pass
-                else:
-                    print("Click out of border.")
+            if event.inaxes is self.ax and event.xdata is not None and event.ydata is not None:
+                #noch nicht gezeichneten Zoom umsetzen, damit das Verschieben auf der angezeigten Ansicht aufbaut
+                if self.zoom_transformation is not None:
+                    self.zoom_anwenden()
+                self.druck = (event.x, event.y, float(event.xdata), float(event.ydata),
+                              self.ax.get_xlim(), self.ax.get_ylim())
+                self.verschiebt = False
+            elif not self.spiel.runde_vorbei:
+                print("Click out of border.")
+
+    def loslassen(self, event):
+        """Maustaste losgelassen: Nach einem Verschieben wird die Karte einmal in voller Qualität gezeichnet,
+        sonst wird der Klick als Antwort ausgewertet"""
+        if event.button != 1 or self.druck is None:
+            return
+        druck = self.druck
+        self.druck = None
+        if self.verschiebt:
+            if event.x is not None and event.y is not None:
+                self.verschiebung = (event.x - druck[0], event.y - druck[1])
+            self.verschieben_auftrag = None
+            self.verschiebung_setzen(druck)
+            self.verschiebt = False
+            self.genaue_karte()
+            self.fig.canvas.draw()
+            self.letztes_bild = time.perf_counter()
+            return
+        if not self.spiel.runde_vorbei:
+            #die Koordinaten stammen aus onclick und sind gültig; Fehler in der Auswertung (Speicher, Anzeige)
+            #sollen sichtbar werden statt die Runde halb ausgewertet stehen zu lassen
+            self.x_click = druck[2]
+            self.y_click = druck[3]
+            self.klickPoint = (self.y_click, self.x_click)
+            self.check()
+
+    def ziehen(self, event):
+        """Mausbewegung mit gedrückter Taste: Die Karte wird verschoben, sobald die Maus weiter als
+        ZIEHSCHWELLE_PX bewegt wurde, gezeichnet wird höchstens einmal pro Bild"""
+        if self.druck is None or event.x is None or event.y is None:
+            return
+        dx, dy = event.x - self.druck[0], event.y - self.druck[1]
+        if not self.verschiebt:
+            if dx * dx + dy * dy < self.ZIEHSCHWELLE_PX ** 2:
+                return
+            self.verschiebt = True
+            self.tooltip_ausblenden()
+            if self.hintergrund is None or self.hintergrund_ansicht != self.ansicht():
+                self.fig.canvas.draw()
+        self.verschiebung = (dx, dy)
+        if self.verschieben_auftrag is None:
+            vergangen = int((time.perf_counter() - self.letztes_bild) * 1000)
+            self.verschieben_auftrag = self.master.after(max(0, self.BILDDAUER_MS - vergangen),
+                                                         self.verschieben_zeichnen)
+
+    def verschiebung_setzen(self, druck):
+        """setzt die Achsengrenzen für die aktuelle Verschiebung und gibt die tatsächliche Verschiebung
+        in Pixeln zurück (am Kartenrand kann sie kleiner sein als die Mausbewegung)"""
+        xlim, ylim = druck[4], druck[5]
+        pixel_x = (xlim[1] - xlim[0]) / self.ax.bbox.width
+        pixel_y = (ylim[1] - ylim[0]) / self.ax.bbox.height
+        dx, dy = self.verschiebung
+        new_xlim, new_ylim = self.ansicht_begrenzen([xlim[0] - dx * pixel_x, xlim[1] - dx * pixel_x],
+                                                    [ylim[0] - dy * pixel_y, ylim[1] - dy * pixel_y])
+        self.ax.set_xlim(new_xlim)
+        self.ax.set_ylim(new_ylim)
+        return (xlim[0] - new_xlim[0]) / pixel_x, (ylim[0] - new_ylim[0]) / pixel_y
+
+    def verschieben_zeichnen(self):
+        """Vorschau beim Verschieben: Statt die Karte neu zu rendern, wird der gespeicherte Hintergrund um die
+        Mausbewegung versetzt geblittet, nur die beweglichen Elemente werden an der neuen Stelle gezeichnet"""
+        self.verschieben_auftrag = None
+        if not self.verschiebt or self.druck is None:
+            return
+        dx, dy = self.verschiebung_setzen(self.druck)
+        canvas = self.fig.canvas
+        hoehe = self.fig.bbox.height
+        links, rechts = round(self.ax.bbox.x0), round(self.ax.bbox.x1)
+        #restore_region rechnet mit y von oben nach unten
+        oben, unten = round(hoehe - self.ax.bbox.y1), round(hoehe - self.ax.bbox.y0)
+        dx, dy = round(dx), -round(dy)
+        canvas.restore_region(self.hintergrund)
+        self.ax.draw_artist(self.ax.patch)
+        canvas.restore_region(self.hintergrund,
+                              bbox=(links + max(0, -dx), oben + max(0, -dy), rechts - max(0, dx), unten - max(0, dy)),
+                              xy=(dx, dy))
+        for artist in self.bewegliche_artists():
+            self.ax.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        self.letztes_bild = time.perf_counter()
+
 ################################################################################
 #Main Window Class
 ################################################################################
@@ -408,10 +736,17 @@ class Hauptfenster:
         self.root.withdraw()
         self.root.geometry(f"{self.setze_fenster(1280, 720)}")
         self.root.title("Finde die Stadt")
+        #auch das Schließen über die Titelleiste schreibt erst alles Ausstehende
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_and_safe)
 
         self.spielername = ""
         self.spieler = spieler
         self.schwierigkeitsgrad = 500
+        self.spiel = spiellogik.Spielsitzung(schwierigkeitsgrad=self.schwierigkeitsgrad, trefferzonen=zonen)
+        self.spiel.abonnieren("punkt", self.spielstand_aktualisieren)
+        self.spiel.abonnieren("klick", self.klick_speichern)
+        if protokoll is not None:
+            protokoll.spiel_verfolgen(self.spiel, lambda: self.spielername)
         #Frames
         self.f1 = tk.Frame(self.root)
         self.f1.grid(row=0, column=0, sticky="ew")
@@ -437,19 +772,21 @@ class Hauptfenster:
         self.label_kontinente.grid(sticky="e", row=0, column=4, padx=10)
         self.label_counter = tk.Label(self.f1, text="Noch 3 Versuche")
         self.label_counter.grid(sticky="e", row=0, column=5, padx=10)
-        #instanziiere die anderen Klassen
+        self.label_runde = tk.Label(self.f1, text=f"Runde: 1 / {spiellogik.RUNDEN_PRO_SPIEL}")
+        self.label_runde.grid(sticky="w", row=0, column=2, padx=10)
+        self.label_hinweis = tk.Label(self.f1, text="")
+        self.label_hinweis.grid(sticky="w", row=1, column=0, columnspan=6, padx=10)
+        #instanziiere die anderen Klassen - der Plotter wird im Hintergrund vorbereitet
         self.spieleinstellungen = Spieleinstellungen(self)
-        self.plotter = Hauptstadtplotter(self.root, self)
-        self.canvas = FigureCanvasTkAgg(self.plotter.fig, master=self.f2)
+        self.root.after_idle(self.startzeit_melden, "Spielermenü")
+        self.plotter = None
+        self.canvas = None
+        self.vorlader = Vorlader(self)
+        self.vorlader.start()
+        self.root.after(50, self.vorlader_pruefen)
 
         self.filtered_capitals = []
-        print(self.filtered_capitals)
         #mehr widgets
-        self.button_print_all = tk.Button(master=self.f1, text="Alle Hauptstädte anzeigen",
-                                          command=self.plotter.plot_capitals)
-        self.button_print_all.grid(row=0, column=6, padx=10)
-        self.button_auswertung = tk.Button(master=self.f1, text="Auswertung", command=self.plotter.auswertung)
-        self.button_auswertung.grid(row=0, column=7, padx=10)
         self.button_reset = tk.Button(master=self.f1, text="Reset Game", command=self.reset_game)
         self.button_reset.grid(row=0, column=9, padx=10)
         self.button_spieleinstellungen = tk.Button(master=self.f1, text="Spieleinstellungen", command=self.oeffne_spieleinstellungen)
@@ -458,7 +795,37 @@ class Hauptfenster:
         self.button_quit.grid(row=0, column=11, padx=10)
         self.spieleinstellungen.ent.focus_set()
 
+    def startzeit_melden(self, was):
+        """gibt aus, wie lange es seit dem Programmstart gedauert hat, bis etwas bereit war"""
+        print(f"{was} bereit nach {time.perf_counter() - STARTZEIT:.2f} s")
+
+    def vorlader_pruefen(self):
+        """schaut regelmäßig nach, ob der Vorlader fertig ist, und bindet dann die Karte ein"""
+        if self.vorlader.is_alive():
+            self.root.after(50, self.vorlader_pruefen)
+        else:
+            self.plotter_einbinden()
+
+    def plotter_einbinden(self):
+        """Bindet den im Hintergrund vorbereiteten Plotter in das Hauptfenster ein.
+        Wird spätestens beim Spielstart aufgerufen und wartet notfalls, bis der Vorlader fertig ist."""
+        if self.plotter is not None:
+            return
+        self.vorlader.join()
+        if self.vorlader.fehler is not None:
+            raise self.vorlader.fehler
+        self.plotter = self.vorlader.plotter
+        self.canvas = FigureCanvasTkAgg(self.plotter.fig, master=self.f2)
         self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+        #widgets, die den Plotter brauchen
+        self.button_print_all = tk.Button(master=self.f1, text="Alle Hauptstädte anzeigen",
+                                          command=self.plotter.plot_capitals)
+        self.button_print_all.grid(row=0, column=6, padx=10)
+        self.button_auswertung = tk.Button(master=self.f1, text="Auswertung", command=self.plotter.auswertung)
+        self.button_auswertung.grid(row=0, column=7, padx=10)
+        self.button_klickkarte = tk.Button(master=self.f1, text="Klickkarte", command=self.plotter.plot_klickkarte)
+        self.button_klickkarte.grid(row=0, column=8, padx=10)
+        self.startzeit_melden("Karte")
 
 
     def setze_fenster(self, breite, hoehe):
@@ -475,28 +842,27 @@ class Hauptfenster:
         self.root.withdraw()
 
     def reset_game(self):
-        self.plotter.counter = 3
-        self.plotter.gewonnen = False
-        self.plotter.abgehakt.clear()
-        self.plotter.ergebnisse.clear()
-        self.plotter.ax.clear()
-
-        if self.spieleinstellungen.punkte_vorher != -1:
-            self.spieler["Spielername"] = self.spieleinstellungen.punkte_vorher
+        self.plotter.dynamische_artists_entfernen()
         self.plotter.start_spiel()
 
-    def spielstand_aktualisieren(self):
-        """Aktualisieren und anzeigen den Punktestand des Spielers"""
-        if self.plotter.gewonnen==True:
-            self.spieler[self.spielername] += 1
-        self.lbl_punkte.config(text=f"Aktueller Punktestand: {self.spieler[self.spielername]}")
+    def spielstand_aktualisieren(self, punkte):
+        """Aktualisieren und anzeigen den Punktestand des Spielers, wird bei jedem Punkt von der Spielsitzung aufgerufen"""
+        punktestand = self.spieler.punkt_hinzufuegen(self.spielername)
+        self.lbl_punkte.config(text=f"Aktueller Punktestand: {punktestand}")
+        self.spieleinstellungen.spielerliste.eintragen(self.spielername, punktestand)
+
+    def klick_speichern(self, breite, laenge, stadt, abstand):
+        """hängt jeden Klick an die Klickstatistik an, wird von der Spielsitzung aufgerufen"""
+        if klicks is not None:
+            klicks.hinzufuegen(breite, laenge, stadt, abstand, self.spielername)
 
     def run(self):
         self.root.mainloop()
 
     def quit_and_safe(self):
-        with open('./spieler_score.json', 'w') as spieler_score:
-            json.dump(self.spieler, spieler_score)
+        """Die Punkte sind schon gespeichert, hier werden nur noch ausstehende Änderungen geschrieben
+        und der Speicher geschlossen"""
+        speicher_schliessen()
         self.root.quit()
 
 ################################################################################
@@ -518,12 +884,13 @@ class Spieleinstellungen:
         self.main_window = main_window
         self.spieleinstellungen = tk.Toplevel()
         self.spieleinstellungen.title("Spielermenü")
+        #das Hauptfenster ist noch versteckt, das Schließen des Spielermenüs beendet das Spiel
+        self.spieleinstellungen.protocol("WM_DELETE_WINDOW", self.main_window.quit_and_safe)
         self.spieleinstellungen.geometry(f"{self.main_window.setze_fenster(800, 400)}")
         self.spieleinstellungen.attributes('-topmost', True)
         self.name = tk.StringVar()
         self.name.trace_add("write", self.entry_watch)
-        self.punkte_vorher = -1
-        self.ausgewaehlte_kontinente = []
+        self.ausgewaehlte_kontinente = frozenset()
 
         #Frames - einer oben, drei in der Mitte, einer unten
         self.f0 = tk.Frame(self.spieleinstellungen, width=400, height=100, borderwidth=2, relief="groove")
@@ -585,14 +952,15 @@ class Spieleinstellungen:
 
         self.spielerauswahl_label = tk.Label(self.f2, text="Vorhandene Spieler:", justify='center')
         self.spielerauswahl_label.grid(row=0, column=0, columnspan=2, sticky='ew')
-        self.listbox = tk.Listbox(self.f2, selectmode=tk.SINGLE, width=30, height=10)
-        self.listbox.grid(sticky='nsw', row=1, column=0, padx=10, pady=10)
-        self.listbox.bind('<<ListboxSelect>>', self.spieler_auswahl)
-        self.spieler_anzeigen()
+        #zeigt nur die sichtbaren Zeilen an und filtert nach dem eingetippten Namensanfang
+        self.spielerliste = spielerliste.Spielerliste(self.f2, self.main_window.spieler, self.spieler_auswahl,
+                                                      zeilen=10, breite=30)
+        self.spielerliste.grid(sticky='nsw', row=1, column=0, padx=10, pady=10)
 
         self.label_kontinente = tk.Label(self.f4, text="Kontinente auswählen", justify='left')
         self.label_kontinente.grid(sticky='new', row=0, column=0)
-        self.listbox_kontinente = tk.Listbox(self.f4, selectmode=tk.MULTIPLE, height=7, width=20)
+        #exportselection=False: die Auswahl bleibt erhalten, wenn im Namensfeld Text markiert wird
+        self.listbox_kontinente = tk.Listbox(self.f4, exportselection=False, selectmode=tk.MULTIPLE, height=7, width=20)
         for kontinent in sorted(kontinent_liste):
             self.listbox_kontinente.insert(tk.END, kontinent)
         self.listbox_kontinente.grid(sticky='ew', row=1, column=0, padx=10, pady=10)
@@ -602,6 +970,7 @@ class Spieleinstellungen:
 
     def set_schwierigkeitsgrad(self, value):
         self.main_window.schwierigkeitsgrad = value
+        self.main_window.spiel.schwierigkeitsgrad = value
         print(f"Schwierigkeitsgrad gesetzt auf: {self.main_window.schwierigkeitsgrad} km")
 
     def on_enter(self, event):
@@ -614,23 +983,25 @@ class Spieleinstellungen:
             self.ent.config(bg="white")
             self.main_window.lbl_name.config(text=f"Spieler: {self.name.get()}")
             self.spieler_label.config(text=f"Spieler: {self.name.get()}")
+        self.spielerliste.filtern(self.name.get())
 
     def quit_and_copy(self):
         """Überprüft und übernimmt Spieleinstellungen und beendet das Fenster"""
         if self.ent.get():
             if self.name.get() in self.main_window.spieler:
                 print("Schon vorhanden")
-                self.punkte_vorher = self.main_window.spieler[self.name.get()]
                 self.main_window.lbl_punkte.config(text=f"Punkte: {self.main_window.spieler[self.name.get()]}")
             else:
                 self.main_window.spieler[self.name.get()] = 0
+                self.spielerliste.eintragen(self.name.get(), 0)
                 self.main_window.lbl_punkte.config(text=f"Punkte: {self.main_window.spieler[self.name.get()]}")
                 print(f"neu eingetragen: {self.name.get()}")
             self.main_window.spielername= self.name.get()
             if self.listbox_kontinente.curselection():
-                self.main_window.filtered_capitals = [capital for capital in capitals if capital["Kontinent"] in self.ausgewaehlte_kontinente]
-                print(self.main_window.filtered_capitals)
+                self.main_window.filtered_capitals = capitals.auswahl_kontinente(self.ausgewaehlte_kontinente)
+                print(f"{len(self.main_window.filtered_capitals)} Hauptstädte aus {sorted(self.ausgewaehlte_kontinente)}")
                 self.spieleinstellungen.withdraw()
+                self.main_window.plotter_einbinden()
                 self.main_window.plotter.start_spiel()
                 self.main_window.root.deiconify()
             else:
@@ -643,42 +1014,23 @@ class Spieleinstellungen:
     def kontinente_auswahl(self,event):
         """Index der Kontinente"""
         index_k = self.listbox_kontinente.curselection()
-        print(index_k)
         if index_k:
-            for i in index_k:
-                listen_eintrag_k = self.listbox_kontinente.get(i)  # Hier ebenfalls die richtige Listbox verwenden
-                if listen_eintrag_k not in self.ausgewaehlte_kontinente:
-                    self.ausgewaehlte_kontinente.append(listen_eintrag_k)
-
-    def spieler_auswahl(self,event):
-        """Index des ausgewählten Spielers"""
-        index_s = self.listbox.curselection()
-        if index_s:
-            listen_eintrag_s = self.listbox.get(index_s)
-            self.main_window.spielername = listen_eintrag_s.split(":")[0].strip()
-            self.ent.delete(0, tk.END)
-            self.ent.insert(0, self.main_window.spielername)
-            #messagebox.showinfo("Ausgewählter Spieler", f"Du hast {spieler_name} ausgewählt!")
-
-    def spieler_anzeigen(self):
-        """aktualisiert die Spieler-Listbox"""
-        for name, values in self.main_window.spieler.items():
-            anzeige = f"{name}: {values} Punkte"
-            self.listbox.insert(tk.END, anzeige)
+            self.ausgewaehlte_kontinente = frozenset(self.listbox_kontinente.get(i) for i in index_k)
+
+    def spieler_auswahl(self, spieler_name):
+        """wird von der Spielerliste mit dem angeklickten Spieler aufgerufen"""
+        self.main_window.spielername = spieler_name
+        self.ent.delete(0, tk.END)
+        self.ent.insert(0, self.main_window.spielername)
+        #messagebox.showinfo("Ausgewählter Spieler", f"Du hast {spieler_name} ausgewählt!")
 
     def reset_points(self):
         """Punktestand zurücksetzen"""
-        index = self.listbox.curselection()
-        if index:
-            spielerauswahl = self.listbox.get(index)
-            spielerauswahl = spielerauswahl.split(":")[0].strip()
-            if self.main_window.spieler[spielerauswahl] == 0:
-                self.main_window.spieler[spielerauswahl] = 127
-                print(self.main_window.spieler)
+        spielerauswahl = self.spielerliste.ausgewaehlt
+        if spielerauswahl is not None:
             if spielerauswahl in self.main_window.spieler:
                 self.main_window.spieler[spielerauswahl] = 0
-                self.listbox.delete(0, tk.END)
-                self.spieler_anzeigen()
+                self.spielerliste.eintragen(spielerauswahl, 0)
         else:
             self.button_reset.config (text = "Spieler auswählen", bg = 'red')
             self.spieleinstellungen.after(1000, lambda: self.button_reset.config(text = "Punkte zurücksetzen", bg = 'SystemButtonFace'))
@@ -686,15 +1038,11 @@ class Spieleinstellungen:
 
     def delete_user(self):
         """Spieler löschen"""
-        index = self.listbox.curselection()
-        if index:
-            loescheintrag = self.listbox.get(index)
-            loescheintrag = loescheintrag.split(":")[0].strip()
+        loescheintrag = self.spielerliste.ausgewaehlt
+        if loescheintrag is not None:
             if loescheintrag in self.main_window.spieler:
                 del self.main_window.spieler[loescheintrag]
-                print("nachher", self.main_window.spieler)
-                self.listbox.delete(0, tk.END)
-                self.spieler_anzeigen()
+                self.spielerliste.entfernen(loescheintrag)
         else:
             self.button_delete.config (text = "Spieler auswählen", bg = 'red')
             self.spieleinstellungen.after(1000, lambda: self.button_delete.config(text = "User löschen", bg = 'SystemButtonFace'))
@@ -702,7 +1050,7 @@ class Spieleinstellungen:
 
 def main():
 
-
+    daten_laden()
     hauptfenster = Hauptfenster()
     hauptfenster.run()
 
@@ -0,0 +1,211 @@
+"""
+Die statische Weltkarte (Ozeane, Küsten, Ländergrenzen) mit zoomabhängigem Detailgrad.
+
+Mit cfeature.BORDERS/COASTLINE/OCEAN übergibt cartopy bei jedem Zeichnen alle Geometrien des gewählten
+Maßstabs an matplotlib, auch wenn nur der Balkan zu sehen ist. Hier ist jede Kartenebene eine PathCollection,
+die sich vor dem Zeichnen den passenden Maßstab aussucht (110m für die ganze Welt, 50m und 10m beim
+Hineinzoomen) und nur die Geometrien im sichtbaren Ausschnitt weitergibt. Große Geometrien (z.B. das
+Ozean-Polygon) werden vorher auf den Ausschnitt zugeschnitten.
+
+Die Umwandlung in matplotlib-Pfade passiert pro Maßstab nur einmal, beim Zurückzoomen wird der schon
+geladene Maßstab wiederverwendet.
+
+Die Geometrien kommen aus basiskarte.bin neben dem Programm, wenn es die Datei gibt (erzeugt mit
+karte_bauen.py): vereinfachte Koordinaten als float32-Arrays, die per mmap eingeblendet werden - ohne
+Internet und ohne Shapefiles zu lesen. Die Datei liegt nicht im Repo, sie muss einmal mit Internetzugang gebaut
+werden. Fehlt sie oder eine Ebene darin, gibt es eine Warnung und cartopy lädt die Ebene von Natural Earth;
+cartopy.feature wird erst dann importiert.
+"""
+
+import json
+import os
+
+import numpy as np
+import shapely
+from matplotlib.collections import PathCollection
+
+from cartopy.mpl.path import shapely_to_path
+
+#Maßstab nach der größeren Seite des sichtbaren Ausschnitts in Grad (wie cartopys AdaptiveScaler)
+DETAILSTUFEN = (("10m", 15), ("50m", 50))
+GROBSTE_STUFE = "110m"
+#Geometrien mit mehr Punkten werden auf den Ausschnitt zugeschnitten, kleinere übernimmt matplotlib ganz
+ZUSCHNEIDEN_AB_PUNKTEN = 2000
+#Rand um den Ausschnitt beim Zuschneiden (Anteil der Breite/Höhe), damit am Kartenrand keine Linien fehlen
+ZUSCHNITT_RAND = 0.02
+
+BUNDLE_DATEI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "basiskarte.bin")
+BUNDLE_KENNUNG = b"GEOQUIZK"
+BUNDLE_VERSION = 1
+
+#Farbe der Ozeane, dieselbe wie cfeature.COLORS["water"]
+OZEANFARBE = (152 / 256, 183 / 256, 226 / 256)
+
+#Name: (Natural-Earth-Kategorie, Natural-Earth-Name, Darstellung wie bei cartopy)
+EBENEN = {
+    "grenzen": ("cultural", "admin_0_boundary_lines_land", dict(facecolor="none", edgecolor="black")),
+    "kueste": ("physical", "coastline", dict(facecolor="none", edgecolor="black")),
+    "ozean": ("physical", "ocean", dict(facecolor=OZEANFARBE, edgecolor="none", zorder=-1)),
+}
+
+
+def natural_earth(kategorie, name, massstab):
+    """Geometrien einer Natural-Earth-Ebene über cartopy (lädt die Shapefiles beim ersten Mal herunter)"""
+    import cartopy.feature as cfeature
+    return list(cfeature.NaturalEarthFeature(kategorie, name, massstab).geometries())
+
+
+def bundle_schluessel(kategorie, name, massstab):
+    return f"{kategorie}/{name}/{massstab}"
+
+
+class Kartenbundle:
+    """Liest basiskarte.bin: vorab vereinfachte Geometrien aller Ebenen und Maßstäbe in einer Datei.
+
+    Aufbau: Kennung (8 Bytes), Länge des Kopfs (uint64), Kopf als json, danach die Datenblöcke, jeweils auf
+    8 Bytes ausgerichtet. Pro Ebene stehen im Kopf der shapely-Geometrietyp und Lage und Länge der Koordinaten
+    (float32, n x 2) und der Offset-Arrays (int32) im Format von shapely.to_ragged_array.
+    """
+
+    def __init__(self, pfad=BUNDLE_DATEI):
+        self.pfad = pfad
+        self.daten = np.memmap(pfad, dtype=np.uint8, mode="r")
+        if bytes(self.daten[:8]) != BUNDLE_KENNUNG:
+            raise ValueError(f"{pfad} ist kein Kartenbundle")
+        kopf_laenge = int(np.frombuffer(self.daten, dtype="<u8", count=1, offset=8)[0])
+        self.kopf = json.loads(bytes(self.daten[16:16 + kopf_laenge]).decode("utf-8"))
+        if self.kopf.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"{pfad} hat die Version {self.kopf.get('version')}, erwartet {BUNDLE_VERSION}")
+
+    def __contains__(self, schluessel):
+        return schluessel in self.kopf["ebenen"]
+
+    def _block(self, dtype, block):
+        offset, anzahl = block
+        return np.frombuffer(self.daten, dtype=dtype, count=anzahl, offset=offset)
+
+    def geometrien(self, kategorie, name, massstab):
+        """die Geometrien einer Ebene als Array von shapely-Geometrien"""
+        ebene = self.kopf["ebenen"][bundle_schluessel(kategorie, name, massstab)]
+        koordinaten = self._block("<f4", ebene["koordinaten"]).reshape(-1, 2)
+        offsets = tuple(self._block("<i4", block) for block in ebene["offsets"])
+        return shapely.from_ragged_array(shapely.GeometryType(ebene["typ"]), koordinaten, offsets)
+
+
+_bundle = None
+_gewarnt = False
+
+
+def bundle_oeffnen(pfad=BUNDLE_DATEI):
+    """öffnet basiskarte.bin einmalig, gibt None zurück, wenn es die Datei nicht gibt"""
+    global _bundle
+    if _bundle is None and os.path.exists(pfad):
+        _bundle = Kartenbundle(pfad)
+    return _bundle
+
+
+def geometrien_laden(kategorie, name, massstab):
+    """Geometrien aus dem Kartenbundle, wenn die Ebene darin ist, sonst über cartopy von Natural Earth.
+
+    Der Umweg über Natural Earth braucht beim ersten Mal Internet, deshalb wird er einmal gemeldet. Scheitert
+    der Download, gibt es einen RuntimeError mit Hinweis auf karte_bauen.py.
+    """
+    global _gewarnt
+    bundle = bundle_oeffnen()
+    if bundle is not None and bundle_schluessel(kategorie, name, massstab) in bundle:
+        return bundle.geometrien(kategorie, name, massstab)
+    if not _gewarnt:
+        grund = "fehlt" if bundle is None else "ist unvollständig"
+        print(f"Warnung: {BUNDLE_DATEI} {grund}, die Kartendaten werden von Natural Earth geladen (braucht "
+              "Internet). Mit 'python karte_bauen.py' lässt sich die Datei einmal erzeugen.")
+        _gewarnt = True
+    try:
+        return natural_earth(kategorie, name, massstab)
+    except OSError as fehler:
+        raise RuntimeError(f"Kartenebene {name} ({massstab}) nicht verfügbar: {BUNDLE_DATEI} fehlt und der "
+                           f"Download von Natural Earth ist fehlgeschlagen ({fehler}). basiskarte.bin einmal "
+                           "mit Internet über karte_bauen.py erzeugen.") from fehler
+
+
+def detailstufe(xlim, ylim):
+    """Maßstab, der zum sichtbaren Ausschnitt passt"""
+    groesse = max(abs(xlim[1] - xlim[0]), abs(ylim[1] - ylim[0]))
+    for massstab, bis_grad in DETAILSTUFEN:
+        if groesse < bis_grad:
+            return massstab
+    return GROBSTE_STUFE
+
+
+class Detailstufe:
+    """Die Geometrien einer Ebene in einem Maßstab mit vorberechneten Pfaden und Begrenzungsrechtecken"""
+
+    def __init__(self, geometrien):
+        geometrien = np.asarray(geometrien, dtype=object)
+        self.geometrien = geometrien[~shapely.is_empty(geometrien)]
+        self.pfade = [shapely_to_path(geometrie) for geometrie in self.geometrien]
+        #Spalten: min Länge, min Breite, max Länge, max Breite
+        self.grenzen = shapely.bounds(self.geometrien).reshape(-1, 4)
+        self.punkte = shapely.get_num_coordinates(self.geometrien)
+
+    def ausschnitt(self, x0, x1, y0, y1):
+        """Pfade aller Geometrien, die den Ausschnitt berühren, große davon zugeschnitten"""
+        rand_x, rand_y = (x1 - x0) * ZUSCHNITT_RAND, (y1 - y0) * ZUSCHNITT_RAND
+        x0, x1, y0, y1 = x0 - rand_x, x1 + rand_x, y0 - rand_y, y1 + rand_y
+        grenzen = self.grenzen
+        sichtbar = np.nonzero((grenzen[:, 0] <= x1) & (grenzen[:, 2] >= x0)
+                              & (grenzen[:, 1] <= y1) & (grenzen[:, 3] >= y0))[0]
+        innen = ((grenzen[sichtbar, 0] >= x0) & (grenzen[sichtbar, 2] <= x1)
+                 & (grenzen[sichtbar, 1] >= y0) & (grenzen[sichtbar, 3] <= y1))
+        pfade = []
+        for i, ganz in zip(sichtbar.tolist(), innen.tolist()):
+            if ganz or self.punkte[i] < ZUSCHNEIDEN_AB_PUNKTEN:
+                pfade.append(self.pfade[i])
+            else:
+                teil = shapely.clip_by_rect(self.geometrien[i], x0, y0, x1, y1)
+                if not teil.is_empty:
+                    pfade.append(shapely_to_path(teil))
+        return pfade
+
+
+class Kartenebene(PathCollection):
+    """Eine Ebene der Weltkarte ("grenzen", "kueste" oder "ozean") als PathCollection.
+
+    Vor jedem Zeichnen wird anhand der Achsengrenzen der Maßstab gewählt und der Ausschnitt gesetzt.
+    Mit vereinfacht = True wird unabhängig vom Zoom immer der gröbste Maßstab benutzt.
+    quelle(kategorie, name, massstab) liefert die Geometrien, ohne Angabe aus dem Kartenbundle oder über cartopy.
+    """
+
+    def __init__(self, name, quelle=None, **darstellung):
+        kategorie, ne_name, vorgabe = EBENEN[name]
+        super().__init__([], **dict(vorgabe, **darstellung))
+        self.name = name
+        self.kategorie = kategorie
+        self.ne_name = ne_name
+        self.quelle = quelle
+        self.vereinfacht = False
+        self._stufen = {}
+        self._ausschnitt = None
+
+    def stufe(self, massstab):
+        """die Detailstufe eines Maßstabs, beim ersten Zugriff geladen und in Pfade umgewandelt"""
+        stufe = self._stufen.get(massstab)
+        if stufe is None:
+            quelle = self.quelle if self.quelle is not None else geometrien_laden
+            stufe = Detailstufe(quelle(self.kategorie, self.ne_name, massstab))
+            self._stufen[massstab] = stufe
+        return stufe
+
+    def ausschnitt_setzen(self):
+        """setzt die Pfade für die aktuellen Achsengrenzen, wenn sie sich seit dem letzten Mal geändert haben"""
+        xlim, ylim = self.axes.get_xlim(), self.axes.get_ylim()
+        massstab = GROBSTE_STUFE if self.vereinfacht else detailstufe(xlim, ylim)
+        schluessel = (massstab, tuple(xlim), tuple(ylim))
+        if schluessel != self._ausschnitt:
+            self.set_paths(self.stufe(massstab).ausschnitt(min(xlim), max(xlim), min(ylim), max(ylim)))
+            self._ausschnitt = schluessel
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        self.ausschnitt_setzen()
+        super().draw(renderer)
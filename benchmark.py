@@ -0,0 +1,639 @@
+"""
+Benchmarks für das Geoquiz.
+
+Aufruf:
+    python benchmark.py                            Ergebnisse als Tabelle ausgeben
+    python benchmark.py --json ergebnis.json       zusätzlich maschinenlesbar abspeichern
+    python benchmark.py --vergleich alt.json       mit einem früheren Lauf (z.B. vom letzten Commit) vergleichen,
+                                                   bei einer Verschlechterung über --toleranz endet das Skript mit Fehlercode 1
+    python benchmark.py --nur abstaende plot       nur Benchmarks ausführen, deren Name so beginnt
+
+Gemessen wird jeweils die beste von mehreren Wiederholungen (timeit), angegeben pro Aufruf.
+Die Karte wird offscreen auf einem Agg-Canvas gezeichnet, es wird also kein Bildschirm gebraucht.
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from math import radians, sin, cos, sqrt, atan2
+from types import SimpleNamespace
+
+import numpy as np
+
+VERZEICHNIS = os.path.dirname(os.path.abspath(__file__))
+
+
+def abstand_skalar(p1, p2):
+    """Die ursprüngliche Abstandsberechnung aus Hauptstadtplotter.abstand_berechnen, als Vergleichswert"""
+    lat1, lon1 = map(radians, p1)
+    lat2, lon2 = map(radians, p2)
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return 6371.0 * c
+
+
+def messen(funktion, wiederholungen=5, anzahl=None):
+    """misst die Laufzeit eines Aufrufs in Sekunden (Minimum über mehrere Wiederholungen)"""
+    timer = timeit.Timer(funktion)
+    if anzahl is None:
+        anzahl, _ = timer.autorange()
+    return min(timer.repeat(repeat=wiederholungen, number=anzahl)) / anzahl
+
+
+################################################################################
+# Kopflose Umgebung für den Hauptstadtplotter
+################################################################################
+class _Label:
+    """nimmt die config-Aufrufe der Tk-Labels entgegen"""
+    def config(self, **kwargs):
+        pass
+
+
+class _Master:
+    """ersetzt das Tk-Hauptfenster: after-Aufrufe werden gesammelt statt ausgeführt"""
+    def __init__(self):
+        self.auftraege = []
+
+    def after(self, ms, funktion=None, *args):
+        self.auftraege.append((ms, funktion, args))
+        return len(self.auftraege)
+
+    def after_idle(self, funktion, *args):
+        return self.after(0, funktion, *args)
+
+    def after_cancel(self, auftrag):
+        pass
+
+
+class KopflosesHauptfenster:
+    """Stellt die Attribute bereit, die der Hauptstadtplotter vom Hauptfenster braucht, ohne ein Tk-Fenster zu öffnen"""
+    def __init__(self, geoquiz, kontinente=("Europa",)):
+        self.label_kontinente = _Label()
+        self.label_stadt = _Label()
+        self.label_counter = _Label()
+        self.label_hinweis = _Label()
+        self.label_runde = _Label()
+        self.schwierigkeitsgrad = 500
+        self.filtered_capitals = geoquiz.capitals.auswahl_kontinente(kontinente)
+        self.spiel = geoquiz.spiellogik.Spielsitzung(schwierigkeitsgrad=self.schwierigkeitsgrad,
+                                                     trefferzonen=geoquiz.zonen)
+
+
+def kopfloser_plotter():
+    """erstellt einen Hauptstadtplotter auf einem Agg-Canvas"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import Geoquiz
+    Geoquiz.daten_laden()
+    Geoquiz.grafik_laden()
+
+    plotter = Geoquiz.Hauptstadtplotter(_Master(), KopflosesHauptfenster(Geoquiz))
+    plotter.renderer.offscreen()
+    plotter.start_spiel()
+    return plotter
+
+
+################################################################################
+# Benchmarks: jede Funktion gibt ein dict {Name: (Sekunden pro Aufruf, Elemente pro Aufruf)} zurück
+################################################################################
+def _start_messen(code, wiederholungen=3):
+    """misst, wie lange ein frischer Interpreter für den Code braucht"""
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = timeit.default_timer()
+        subprocess.run([sys.executable, "-c", code], cwd=VERZEICHNIS, check=True, capture_output=True)
+        zeiten.append(timeit.default_timer() - start)
+    return min(zeiten)
+
+
+def bench_start():
+    """Start in einem frischen Interpreter: Import von Geoquiz.py (bis das Spielermenü erscheinen kann),
+    das Nachladen von matplotlib/cartopy im Hintergrund und das Einlesen der json-Dateien"""
+    import_zeit = _start_messen("import Geoquiz; Geoquiz.daten_laden()")
+    grafik_zeit = _start_messen("import matplotlib; matplotlib.use('Agg'); import Geoquiz; Geoquiz.grafik_laden()")
+
+    def json_laden():
+        with open(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'), 'r') as staedte:
+            json.load(staedte)
+        with open(os.path.join(VERZEICHNIS, 'spieler_score.json'), 'r') as spieler_logbuch:
+            json.load(spieler_logbuch)
+
+    import datensatz
+    datensatz.laden(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'))
+
+    return {
+        "start_import_geoquiz": (import_zeit, 1),
+        "start_grafik_laden": (grafik_zeit, 1),
+        "start_json_laden": (messen(json_laden), 1),
+        "start_datensatz_mmap": (messen(lambda: datensatz.laden(
+            os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'))), 1),
+    }
+
+
+def bench_abstaende():
+    """vergleicht die skalare Abstandsberechnung mit dem vektorisierten Modul geodaesie"""
+    import geodaesie
+    with open(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'), 'r') as staedte:
+        capitals = json.load(staedte)
+    koordinaten = geodaesie.Koordinaten.aus_hauptstaedten(capitals)
+    punkte = [(stadt["Breitengrad"], stadt["Längengrad"]) for stadt in capitals]
+    klick = (48.1, 11.6)
+    rng = np.random.default_rng(0)
+    klicks_lat = rng.uniform(-90, 90, 1000)
+    klicks_lon = rng.uniform(-180, 180, 1000)
+    n = len(koordinaten)
+
+    return {
+        "abstaende_skalar_ein_paar": (messen(lambda: abstand_skalar(klick, punkte[0])), 1),
+        "abstaende_geodaesie_ein_paar": (messen(lambda: koordinaten.abstand_zu(0, *klick)), 1),
+        "abstaende_skalar_klick_gegen_alle": (messen(lambda: [abstand_skalar(klick, p) for p in punkte]), n),
+        "abstaende_numpy_klick_gegen_alle": (messen(lambda: koordinaten.abstaende(*klick)), n),
+        "abstaende_numpy_1000_klicks_gegen_alle": (messen(lambda: koordinaten.abstaende_matrix(klicks_lat, klicks_lon)),
+                                                   1000 * n),
+    }
+
+
+def bench_spiellogik():
+    """check/abstand_berechnen-Durchsatz und der Aufbau des Auswertungstexts, ohne Anzeige"""
+    import spiellogik
+    with open(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'), 'r') as staedte:
+        capitals = json.load(staedte)
+    spiel = spiellogik.Spielsitzung(capitals, seed=0)
+    spiel.neues_spiel()
+
+    def klick():
+        stadt = spiel.stadt
+        spiel.klick(stadt["Breitengrad"] + 3, stadt["Längengrad"] + 3)
+        if spiel.runde_vorbei:
+            if spiel.runde >= spiellogik.RUNDEN_PRO_SPIEL:
+                spiel.neues_spiel()
+            else:
+                spiel.naechste_runde()
+
+    auswertung = spiellogik.Spielsitzung(capitals, seed=0)
+    auswertung.neues_spiel()
+    for _ in range(spiellogik.RUNDEN_PRO_SPIEL):
+        auswertung.klick(auswertung.stadt["Breitengrad"], auswertung.stadt["Längengrad"])
+        if auswertung.runde < spiellogik.RUNDEN_PRO_SPIEL:
+            auswertung.naechste_runde()
+
+    return {
+        "check_klick": (messen(klick), 1),
+        "auswertung_text": (messen(auswertung.auswertungstext), 1),
+    }
+
+
+def bench_trefferzonen():
+    """Berechnen der Trefferzonen, Laden aus dem Zwischenspeicher und ein Klick über die Maske gegen den
+    genauen Abstand"""
+    import tempfile
+    import datensatz
+    import trefferzonen
+    capitals = datensatz.laden(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'))
+    koordinaten = capitals.koordinaten
+    with tempfile.TemporaryDirectory() as ordner:
+        berechnen = messen(lambda: trefferzonen.berechnen(koordinaten), wiederholungen=3, anzahl=1)
+        trefferzonen.laden(capitals, ordner=ordner)
+        laden = messen(lambda: trefferzonen.laden(capitals, ordner=ordner), wiederholungen=3)
+    zonen = trefferzonen.laden(capitals)
+    breite, laenge = float(koordinaten.breite[0]) + 3, float(koordinaten.laenge[0]) + 3
+    return {
+        "trefferzonen_berechnen": (berechnen, len(koordinaten)),
+        "trefferzonen_laden": (laden, len(koordinaten)),
+        "trefferzonen_klick_maske": (messen(lambda: zonen.treffer(0, 500, breite, laenge)), 1),
+        "trefferzonen_klick_abstand": (messen(lambda: koordinaten.abstand_zu(0, breite, laenge) <= 500), 1),
+    }
+
+
+def bench_grosskreise():
+    """Großkreisbögen für die Auswertung: zehn Bögen auf einmal berechnet, einzeln berechnet und aus dem Cache"""
+    import geodaesie
+    rng = np.random.default_rng(0)
+    breiten1, breiten2 = rng.uniform(-60, 70, (2, 10))
+    laengen1, laengen2 = rng.uniform(-180, 180, (2, 10))
+    cache = geodaesie.Grosskreiscache()
+    cache.teilstuecke(breiten1, laengen1, breiten2, laengen2)
+    return {
+        "grosskreise_10_zusammen": (messen(lambda: geodaesie.grosskreise(breiten1, laengen1, breiten2, laengen2)), 10),
+        "grosskreise_10_einzeln": (messen(lambda: [geodaesie.grosskreise(*paar) for paar in
+                                                   zip(breiten1, laengen1, breiten2, laengen2)]), 10),
+        "grosskreise_10_cache": (messen(lambda: cache.teilstuecke(breiten1, laengen1, breiten2, laengen2)), 10),
+    }
+
+
+def bench_export():
+    """Auswertungsbilder gespeicherter Spiele (spielexport): ein Bild als PNG und SVG in einem Prozess und viele
+    Spiele über den Prozesspool (einschließlich Start der Arbeitsprozesse)"""
+    import tempfile
+    import datensatz
+    import spiellogik
+    import spielexport
+    capitals = datensatz.laden(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'))
+    spiel = spiellogik.Spielsitzung(capitals, seed=0)
+    spiel.neues_spiel()
+    rng = np.random.default_rng(0)
+    while len(spiel.ergebnisse) < spiellogik.RUNDEN_PRO_SPIEL:
+        if spiel.runde_vorbei:
+            spiel.naechste_runde()
+        spiel.klick(float(rng.uniform(-60, 70)), float(rng.uniform(-180, 180)))
+    gespeichert = spielexport.spiel_als_dict(spiel, "Benchmark")
+    spiele = [gespeichert] * (4 * (os.cpu_count() or 1))
+    bild = spielexport.Auswertungsbild()
+    with tempfile.TemporaryDirectory() as ordner:
+        png = messen(lambda: bild.speichern(gespeichert, os.path.join(ordner, "spiel.png")), wiederholungen=3, anzahl=1)
+        svg = messen(lambda: bild.speichern(gespeichert, os.path.join(ordner, "spiel.svg")), wiederholungen=3, anzahl=1)
+        pool = messen(lambda: spielexport.exportieren(spiele, ordner), wiederholungen=1, anzahl=1)
+    return {
+        "export_bild_png": (png, 1),
+        "export_bild_svg": (svg, 1),
+        "export_pool": (pool, len(spiele)),
+    }
+
+
+def bench_klickstatistik():
+    """Klickstatistik: ein Klick speichern (im Speicher und in klicks.bin), ein Histogramm aus 100000 Klicks
+    zählen und die Heatmap blitten - mit 1000 und mit 100000 Klicks gleich teuer"""
+    import tempfile
+    import matplotlib
+    matplotlib.use("Agg")
+    import datensatz
+    import klickstatistik
+    import renderer
+    capitals = datensatz.laden(os.path.join(VERZEICHNIS, 'capital_continent_country_data.json'))
+    rng = np.random.default_rng(0)
+    breiten, laengen = rng.uniform(-60, 70, 100000), rng.uniform(-180, 180, 100000)
+    staedte = rng.integers(0, len(capitals), 100000)
+
+    def fuellen(statistik, anzahl):
+        for breite, laenge, stadt in zip(breiten[:anzahl].tolist(), laengen[:anzahl].tolist(), staedte[:anzahl].tolist()):
+            statistik.hinzufuegen(breite, laenge, stadt, 500.0, "Benchmark")
+        return statistik
+
+    im_speicher = klickstatistik.Klickstatistik(capitals.kontinent, capitals.kontinente)
+    im_speicher.histogramm("gesamt")
+    im_speicher.histogramm("spieler", "Benchmark")
+    ergebnisse = {"klickstatistik_hinzufuegen": (messen(lambda: fuellen(im_speicher, 1)), 1)}
+    with tempfile.TemporaryDirectory() as ordner:
+        in_datei = klickstatistik.Klickstatistik(capitals.kontinent, capitals.kontinente, ordner)
+        ergebnisse["klickstatistik_hinzufuegen_datei"] = (messen(lambda: fuellen(in_datei, 1)), 1)
+        in_datei.schliessen()
+
+    karte = renderer.erstellen("agg")
+    canvas = karte.offscreen()
+    karte.basiskarte_zeichnen()
+    canvas.draw()
+    hintergrund = canvas.copy_from_bbox(karte.fig.bbox)
+
+    def blit():
+        canvas.restore_region(hintergrund)
+        for artist in karte.bewegliche_artists():
+            karte.ax.draw_artist(artist)
+        canvas.blit(karte.fig.bbox)
+
+    for anzahl in (1000, 100000):
+        statistik = fuellen(klickstatistik.Klickstatistik(capitals.kontinent, capitals.kontinente), anzahl)
+        if anzahl == 100000:
+            def zaehlen():
+                statistik._histogramme.clear()
+                return statistik.histogramm("gesamt")
+            ergebnisse["klickstatistik_histogramm_100000"] = (messen(zaehlen, wiederholungen=3), anzahl)
+        karte.heatmap(*statistik.histogramm("gesamt"))
+        ergebnisse[f"klickstatistik_heatmap_blit_{anzahl}"] = (messen(blit), anzahl)
+    return ergebnisse
+
+
+def bench_ereignisprotokoll():
+    """Ereignisprotokoll: ein Ereignis eintragen, einen Block schreiben, das Öffnen eines Protokolls mit
+    100000 Ereignissen und das Lesen einer Spalte daraus (blockweise per mmap)"""
+    import tempfile
+    import ereignisprotokoll
+    with tempfile.TemporaryDirectory() as ordner:
+        pfad = os.path.join(ordner, "ereignisse.bin")
+        protokoll = ereignisprotokoll.Ereignisprotokoll(pfad)
+
+        def block():
+            for _ in range(protokoll.blockgroesse):
+                protokoll.eintragen("klick", "Benchmark", 1, 0, 48.1, 11.6, 500.0, 1)
+
+        ergebnisse = {
+            "ereignisprotokoll_eintragen": (messen(lambda: protokoll.eintragen("klick", "Benchmark", 1, 0, 48.1, 11.6,
+                                                                               500.0, 1)), 1),
+            "ereignisprotokoll_block": (messen(block, wiederholungen=3), protokoll.blockgroesse),
+        }
+        protokoll.schliessen()
+        #ein Spiel mit zehn Runden sind etwa 50 Ereignisse und ein Block
+        pfad = os.path.join(ordner, "lang.bin")
+        protokoll = ereignisprotokoll.Ereignisprotokoll(pfad, blockgroesse=50)
+        for _ in range(100000 // protokoll.blockgroesse):
+            block()
+        protokoll.schliessen()
+        anzahl = len(ereignisprotokoll.lesen(pfad, ["art"])["art"])
+        ergebnisse["ereignisprotokoll_oeffnen"] = (messen(lambda: ereignisprotokoll.Ereignisprotokoll(pfad).schliessen(),
+                                                          wiederholungen=3), anzahl)
+        ergebnisse["ereignisprotokoll_spalte_lesen"] = (messen(lambda: ereignisprotokoll.lesen(pfad, ["abstand"]),
+                                                               wiederholungen=3), anzahl)
+    return ergebnisse
+
+
+def bench_plot():
+    """plot_world (vollständig und geblittet), eine Folge von Zoom-Events, plot_capitals, abstand_berechnen
+    die Vorschau beim Verschieben der Karte und die vereinfachte gegen die genaue Karte"""
+    plotter = kopfloser_plotter()
+    import renderer
+
+    def plot_world_vollstaendig():
+        plotter.hintergrund = None
+        plotter.plot_world()
+
+    def zoom_folge():
+        for button in ["up"] * 5 + ["down"] * 5:
+            plotter.zoom(SimpleNamespace(button=button, xdata=15.0, ydata=50.0, inaxes=plotter.ax))
+        #die Zoom-Events werden gesammelt und erst im nächsten Bild gezeichnet
+        plotter.zoom_anwenden()
+        plotter.plot_world()
+
+    def plot_capitals():
+        plotter.plot_capitals()
+        plotter.plot_capitals()
+
+    def verschieben_vorschau():
+        plotter.onclick(SimpleNamespace(button=1, x=mitte_x, y=mitte_y, xdata=0.0, ydata=40.0, inaxes=plotter.ax))
+        for schritt in range(1, 11):
+            plotter.ziehen(SimpleNamespace(x=mitte_x + 10 * schritt, y=mitte_y))
+            plotter.verschieben_zeichnen()
+        #ohne Loslassen zurück zur Ausgangsansicht, deren Hintergrund noch gespeichert ist
+        plotter.druck = None
+        plotter.verschiebt = False
+        plotter.ax.set_xlim(ausgangsansicht[0])
+        plotter.ax.set_ylim(ausgangsansicht[1])
+
+    def plot_world_vollstaendig_welt():
+        #zum Vergleich: vor der Ausgangsansicht pro Kontinentauswahl war es immer die ganze Welt
+        grundansicht = plotter.grundansicht
+        plotter.grundansicht = renderer.WELTANSICHT
+        plot_world_vollstaendig()
+        plotter.grundansicht = grundansicht
+
+    ergebnisse = {
+        "plot_world_vollstaendig": (messen(plot_world_vollstaendig, anzahl=3), 1),
+        "plot_world_vollstaendig_welt": (messen(plot_world_vollstaendig_welt, anzahl=3), 1),
+        "plot_world_blit": (messen(plotter.plot_world), 1),
+        "plot_zoom_10_events": (messen(zoom_folge, anzahl=1, wiederholungen=3), 10),
+        "plot_capitals": (messen(plot_capitals, anzahl=3), 2),
+        "plot_abstand_berechnen": (messen(lambda: plotter.abstand_berechnen((48.1, 11.6), (52.5, 13.4))), 1),
+    }
+    #Verschieben: gezoomte Ansicht einmal voll zeichnen, gemessen wird nur die geblittete Vorschau
+    plotter.plot_world()
+    plotter.ax.set_xlim(-40, 40)
+    plotter.ax.set_ylim(20, 60)
+    plotter.fig.canvas.draw()
+    ausgangsansicht = plotter.ansicht()
+    mitte_x = plotter.ax.bbox.x0 + plotter.ax.bbox.width / 2
+    mitte_y = plotter.ax.bbox.y0 + plotter.ax.bbox.height / 2
+    ergebnisse["plot_verschieben_10_bilder"] = (messen(verschieben_vorschau, anzahl=3), 10)
+
+    #gezoomte Ansicht komplett zeichnen: vereinfachte Karte beim Zoomen gegen die genaue nach der Pause
+    def zoomansicht(vereinfacht):
+        plotter.karte_vereinfachen(vereinfacht)
+        plotter.fig.canvas.draw()
+
+    ergebnisse["plot_zoomansicht_vereinfacht"] = (messen(lambda: zoomansicht(True), anzahl=3), 1)
+    ergebnisse["plot_zoomansicht_genau"] = (messen(lambda: zoomansicht(False), anzahl=3), 1)
+    return ergebnisse
+
+
+def bench_speicher():
+    """Punkte speichern: ein Aufruf von punkt_hinzufuegen (SQLite und json) und 1000 schnelle Punkte
+    im json-Speicher bis zur fertig geschriebenen Datei - dabei wird auch gezählt, wie oft geschrieben wurde"""
+    import tempfile
+    import spielerspeicher
+
+    with tempfile.TemporaryDirectory() as ordner:
+        json_pfad = os.path.join(ordner, "spieler_score.json")
+        sqlite = spielerspeicher.SpielerSpeicher(os.path.join(ordner, "spieler_score.db"), None)
+        sqlite_punkt = messen(lambda: sqlite.punkt_hinzufuegen("Spielername"))
+        sqlite.schliessen()
+
+        json_speicher = spielerspeicher.JsonSpeicher(json_pfad)
+        json_punkt = messen(lambda: json_speicher.punkt_hinzufuegen("Spielername"))
+        json_speicher.schliessen()
+
+        def tausend_punkte():
+            speicher = spielerspeicher.JsonSpeicher(json_pfad, verzoegerung=0.05)
+            for _ in range(1000):
+                speicher.punkt_hinzufuegen("Spielername")
+            speicher.schliessen()
+            tausend_punkte.schreibvorgaenge = speicher.schreibvorgaenge
+
+        json_tausend = messen(tausend_punkte, wiederholungen=3, anzahl=1)
+        print(f"json-Speicher: {tausend_punkte.schreibvorgaenge} Schreibvorgänge für 1000 Punkte")
+
+    return {
+        "speicher_sqlite_punkt": (sqlite_punkt, 1),
+        "speicher_json_punkt": (json_punkt, 1),
+        "speicher_json_1000_punkte_gespeichert": (json_tausend, 1000),
+    }
+
+
+def bench_basiskarte():
+    """Laden der Kartenebenen aus basiskarte.bin (ohne Internet und Shapefiles) samt Umwandlung in Pfade"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import basiskarte
+    if not os.path.exists(basiskarte.BUNDLE_DATEI):
+        raise FileNotFoundError("basiskarte.bin fehlt, erst python karte_bauen.py ausführen")
+
+    def laden(massstab):
+        bundle = basiskarte.Kartenbundle()
+        for kategorie, name, _ in basiskarte.EBENEN.values():
+            basiskarte.Detailstufe(bundle.geometrien(kategorie, name, massstab))
+
+    return {f"basiskarte_laden_{massstab}": (messen(lambda: laden(massstab), wiederholungen=3, anzahl=1), 1)
+            for massstab in ("110m", "50m", "10m")}
+
+
+def bench_raster():
+    """Kartenbild mit Mipmap (KARTE = "raster"): Aufbau der Pyramide und Zeichnen von Welt und Zoomansicht"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import rasterkarte
+    bild = os.path.join(VERZEICHNIS, "world_map_600.png")
+    if not os.path.exists(bild):
+        raise FileNotFoundError("world_map_600.png fehlt")
+
+    fig = plt.figure(figsize=(15, 8))
+    ax = fig.add_axes([0, 0, 1, 1])
+    canvas = FigureCanvasAgg(fig)
+    ebene = rasterkarte.Rasterebene(ax, bild)
+    ax.add_image(ebene)
+
+    def zeichnen(xlim, ylim):
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        ebene._schluessel = None
+        canvas.draw()
+
+    ergebnisse = {
+        "raster_mipmap_aus_zwischenspeicher": (messen(lambda: rasterkarte.Mipmap(bild), wiederholungen=3), 1),
+        "raster_zeichnen_welt": (messen(lambda: zeichnen((-180, 180), (-90, 90)), wiederholungen=3, anzahl=1), 1),
+        "raster_zeichnen_zoom": (messen(lambda: zeichnen((0, 30), (40, 56)), wiederholungen=3, anzahl=1), 1),
+    }
+    plt.close(fig)
+    return ergebnisse
+
+
+def bench_renderer(art, name=None, **optionen):
+    """Kosten pro Bild eines Renderers: Welt und Zoomansicht komplett gezeichnet und ein geblittetes Bild
+    mit Stadt, Klick, Linie und Haken wie nach einem Treffer; name unterscheidet Varianten eines Renderers"""
+    name = name or art
+    import matplotlib
+    matplotlib.use("Agg")
+    import renderer
+    karte = renderer.erstellen(art, **optionen)
+    canvas = karte.offscreen()
+    karte.basiskarte_zeichnen()
+
+    def bild(xlim, ylim):
+        karte.ansicht_setzen(xlim, ylim)
+        canvas.draw()
+
+    #erstes Bild außerhalb der Messung: lädt die Kartendaten bzw. die Mipmap
+    bild(*renderer.WELTANSICHT)
+    ergebnisse = {
+        f"renderer_{name}_bild_welt": (messen(lambda: bild(*renderer.WELTANSICHT), wiederholungen=3, anzahl=1), 1),
+        f"renderer_{name}_bild_zoom": (messen(lambda: bild((-40, 40), (20, 60)), wiederholungen=3, anzahl=1), 1),
+    }
+
+    bild(*renderer.WELTANSICHT)
+    hintergrund = canvas.copy_from_bbox(karte.fig.bbox)
+    karte.marker(13.4, 52.5, "ziele")
+    karte.marker(11.6, 48.1, "klicks")
+    karte.linie([13.4, 11.6], [52.5, 48.1])
+    karte.overlay([-34, 12, 55], [4, -46, 37], "g")
+
+    def blit():
+        canvas.restore_region(hintergrund)
+        for artist in karte.bewegliche_artists():
+            karte.ax.draw_artist(artist)
+        canvas.blit(karte.fig.bbox)
+
+    ergebnisse[f"renderer_{name}_blit"] = (messen(blit), 1)
+    #viele Klicks und Linien landen in denselben Ebenen, es werden nicht mehr Artists
+    rng = np.random.default_rng(0)
+    for laenge, breite in zip(rng.uniform(-180, 180, 200), rng.uniform(-60, 70, 200)):
+        karte.marker(laenge, breite, "klicks")
+        karte.linie([13.4, laenge], [52.5, breite])
+    ergebnisse[f"renderer_{name}_blit_200_klicks"] = (messen(blit), 200)
+    return ergebnisse
+
+
+BENCHMARKS = {
+    "start": bench_start,
+    "abstaende": bench_abstaende,
+    "spiellogik": bench_spiellogik,
+    "trefferzonen": bench_trefferzonen,
+    "grosskreise": bench_grosskreise,
+    "export": bench_export,
+    "klickstatistik": bench_klickstatistik,
+    "ereignisprotokoll": bench_ereignisprotokoll,
+    "plot": bench_plot,
+    "speicher": bench_speicher,
+    "basiskarte": bench_basiskarte,
+    "raster": bench_raster,
+    "renderer_cartopy": functools.partial(bench_renderer, "cartopy"),
+    "renderer_raster": functools.partial(bench_renderer, "raster"),
+    "renderer_agg": functools.partial(bench_renderer, "agg"),
+    "renderer_gradnetz": functools.partial(bench_renderer, "agg", "gradnetz", nur_gradnetz=True),
+}
+
+
+def metadaten():
+    """Angaben zum Lauf, damit Ergebnisse verschiedener Commits und Rechner vergleichbar sind"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=VERZEICHNIS,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "datum": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "rechner": platform.node(),
+    }
+
+
+def ausfuehren(auswahl=None):
+    """führt die Benchmarks aus, Fehler (z.B. fehlende Kartendaten) werden vermerkt statt abzubrechen"""
+    ergebnisse = {}
+    for gruppe, benchmark in BENCHMARKS.items():
+        if auswahl and not any(gruppe.startswith(name) for name in auswahl):
+            continue
+        try:
+            for name, (sekunden, elemente) in benchmark().items():
+                ergebnisse[name] = {"sekunden": sekunden, "elemente": elemente}
+        except Exception as fehler:
+            ergebnisse[gruppe] = {"fehler": f"{type(fehler).__name__}: {fehler}"}
+    return ergebnisse
+
+
+def vergleichen(ergebnisse, alt, toleranz):
+    """gibt die Benchmarks zurück, die gegenüber einem früheren Lauf um mehr als die Toleranz langsamer sind"""
+    langsamer = []
+    print(f"\n{'Vergleich':<42} {'alt':>12} {'neu':>12} {'Faktor':>8}")
+    for name, neu in ergebnisse.items():
+        vorher = alt.get("ergebnisse", {}).get(name)
+        if not vorher or "sekunden" not in vorher or "sekunden" not in neu:
+            continue
+        faktor = neu["sekunden"] / vorher["sekunden"]
+        markierung = ""
+        if faktor > 1 + toleranz:
+            langsamer.append(name)
+            markierung = "  <-- langsamer"
+        print(f"{name:<42} {vorher['sekunden'] * 1e3:>9.3f} ms {neu['sekunden'] * 1e3:>9.3f} ms {faktor:>7.2f}x{markierung}")
+    return langsamer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für das Geoquiz")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als json-Datei speichern")
+    parser.add_argument("--vergleich", help="json-Datei eines früheren Laufs zum Vergleich")
+    parser.add_argument("--toleranz", type=float, default=0.2, help="erlaubte Verschlechterung, 0.2 = 20%%")
+    parser.add_argument("--nur", nargs="*", help="nur diese Benchmark-Gruppen ausführen")
+    argumente = parser.parse_args()
+
+    os.chdir(VERZEICHNIS)
+    ergebnisse = ausfuehren(argumente.nur)
+
+    print(f"{'Benchmark':<42} {'pro Aufruf':>14} {'Elemente/ms':>14}")
+    for name, wert in ergebnisse.items():
+        if "fehler" in wert:
+            print(f"{name:<42} übersprungen: {wert['fehler']}")
+            continue
+        sekunden = wert["sekunden"]
+        print(f"{name:<42} {sekunden * 1e3:>11.4f} ms {wert['elemente'] / (sekunden * 1e3):>14.1f}")
+
+    if argumente.json:
+        with open(argumente.json, 'w') as datei:
+            json.dump({"meta": metadaten(), "ergebnisse": ergebnisse}, datei, indent=2)
+
+    if argumente.vergleich:
+        with open(argumente.vergleich, 'r') as datei:
+            alt = json.load(datei)
+        if vergleichen(ergebnisse, alt, argumente.toleranz):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Binärer Zwischenspeicher der Hauptstadtliste.
+
+Die json-Datei ist eine Liste von dicts mit Schlüsseln wie "Längengrad" oder "Bevölkerung". Beim ersten Start
+(und immer, wenn sich die json-Datei ändert) wird sie in ein strukturiertes NumPy-Array mit einer Spalte pro
+Feld übersetzt und als hauptstaedte.npy im Ordner .geoquiz_cache neben der json-Datei abgelegt - inklusive
+Bogenmaß, cos(Breite), Einheitsvektoren und einem Kontinent-Code. Bei jedem weiteren Start wird die Datei
+nur noch per mmap eingeblendet, statt die json-Datei komplett zu parsen.
+
+Ob der Zwischenspeicher noch passt, steht in meta.json: Änderungszeit und Größe der json-Datei werden
+verglichen, erst wenn die abweichen, wird der SHA-1-Hash berechnet und bei Bedarf neu gebaut.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import geodaesie
+
+CACHE_ORDNER = ".geoquiz_cache"
+CACHE_DATEI = "hauptstaedte.npy"
+FORMAT_VERSION = 1
+
+#Spaltenname im Zwischenspeicher: Schlüssel in der json-Datei
+TEXTSPALTEN = {"land": "Land", "hauptstadt": "Hauptstadt", "hauptstadttyp": "Hauptstadttyp"}
+ZAHLENSPALTEN = {"breite": "Breitengrad", "laenge": "Längengrad", "bevoelkerung": "Bevölkerung"}
+
+
+class Hauptstadtdaten:
+    """Die Hauptstadtliste als Spalten (Felder eines strukturierten NumPy-Arrays).
+
+    Einzelne Einträge können weiterhin wie in der json-Datei als dict abgefragt werden (daten[i]["Hauptstadt"]),
+    die Hot Paths arbeiten aber direkt auf den Spalten. indizes sind die Zeilennummern im vollständigen
+    Datensatz (bei einer Auswahl nach Kontinenten nicht mehr 0, 1, 2, ...). ordner ist der Zwischenspeicher
+    neben der json-Datei, None wenn die Daten nicht aus laden() kommen.
+    ausdehnung ist das Rechteck (West, Ost, Süd, Nord) in Grad um alle Städte, über die Datumsgrenze hinweg
+    mit West > Ost - da jede Auswahl in auswahl_kontinente gemerkt wird, nur einmal pro Kontinentkombination.
+    """
+    def __init__(self, spalten, kontinente, indizes=None, ordner=None):
+        self.spalten = spalten
+        self.ordner = ordner
+        self.indizes = np.arange(len(spalten)) if indizes is None else indizes
+        self.kontinente = list(kontinente)
+        self.hauptstadttyp = spalten["hauptstadttyp"]
+        self._eintraege = {}
+        self.land = spalten["land"]
+        self.hauptstadt = spalten["hauptstadt"]
+        self.breite = spalten["breite"]
+        self.laenge = spalten["laenge"]
+        self.bevoelkerung = spalten["bevoelkerung"]
+        self.kontinent = spalten["kontinent"]
+        self.koordinaten = geodaesie.Koordinaten.aus_spalten(spalten["breite"], spalten["laenge"], spalten["breite_rad"],
+                                                              spalten["laenge_rad"], spalten["cos_breite"],
+                                                              spalten["vektoren"])
+        self._auswahl_cache = {}
+        self.kontinent_index = self._kontinent_index_bauen()
+        self.laender_index = {str(land): index for index, land in enumerate(self.land)}
+        self.ausdehnung = self._ausdehnung_berechnen()
+
+    def __len__(self):
+        return len(self.breite)
+
+    def __getitem__(self, index):
+        """ein Eintrag als dict mit den Schlüsseln der json-Datei (wird beim ersten Zugriff erzeugt und gemerkt)"""
+        eintrag = self._eintraege.get(index)
+        if eintrag is not None:
+            return eintrag
+        eintrag = {
+            "Land": str(self.land[index]),
+            "Hauptstadt": str(self.hauptstadt[index]),
+            "Breitengrad": float(self.breite[index]),
+            "Längengrad": float(self.laenge[index]),
+            "Bevölkerung": int(self.bevoelkerung[index]),
+            "Kontinent": self.kontinente[self.kontinent[index]],
+        }
+        if self.hauptstadttyp[index]:
+            eintrag["Hauptstadttyp"] = str(self.hauptstadttyp[index])
+        self._eintraege[index] = eintrag
+        return eintrag
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _ausdehnung_berechnen(self):
+        laengenbereich = geodaesie.laengenbereich(self.laenge)
+        if laengenbereich is None:
+            return None
+        return laengenbereich + (float(np.min(self.breite)), float(np.max(self.breite)))
+
+    def _kontinent_index_bauen(self):
+        """Kontinent -> Array der Zeilenindizes, einmal sortiert statt für jede Auswahl die ganze Liste zu durchsuchen"""
+        codes = np.asarray(self.kontinent)
+        reihenfolge = np.argsort(codes, kind="stable")
+        grenzen = np.searchsorted(codes[reihenfolge], np.arange(len(self.kontinente) + 1))
+        return {name: reihenfolge[grenzen[code]:grenzen[code + 1]] for code, name in enumerate(self.kontinente)}
+
+    def indizes_fuer_kontinente(self, kontinente):
+        """Zeilenindizes aller Städte der ausgewählten Kontinente (in der Reihenfolge der Kontinent-Codes)"""
+        teile = [self.kontinent_index[name] for name in self.kontinente if name in kontinente]
+        if not teile:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(teile)
+
+    def auswahl_kontinente(self, kontinente):
+        """Hauptstadtdaten der ausgewählten Kontinente, pro Kombination nur einmal berechnet"""
+        schluessel = frozenset(kontinente)
+        auswahl = self._auswahl_cache.get(schluessel)
+        if auswahl is None:
+            auswahl = self.auswahl(self.indizes_fuer_kontinente(schluessel))
+            self._auswahl_cache[schluessel] = auswahl
+        return auswahl
+
+    def auswahl(self, indizes):
+        """neue Hauptstadtdaten mit den ausgewählten Zeilen (z.B. nach Kontinent gefiltert)"""
+        indizes = np.asarray(indizes, dtype=np.intp)
+        return Hauptstadtdaten(self.spalten[indizes], self.kontinente, self.indizes[indizes], self.ordner)
+
+
+def spalten_bauen(hauptstaedte):
+    """übersetzt die Liste von dicts in ein strukturiertes Array samt vorberechneter Hilfsspalten"""
+    texte = {name: [stadt.get(schluessel, "") for stadt in hauptstaedte] for name, schluessel in TEXTSPALTEN.items()}
+    kontinente = []
+    for stadt in hauptstaedte:
+        if stadt["Kontinent"] not in kontinente:
+            kontinente.append(stadt["Kontinent"])
+    codes = {name: code for code, name in enumerate(kontinente)}
+
+    dtype = [(name, f"U{max([len(text) for text in werte] + [1])}") for name, werte in texte.items()]
+    dtype += [("breite", "f8"), ("laenge", "f8"), ("bevoelkerung", "i8"), ("breite_rad", "f8"), ("laenge_rad", "f8"),
+              ("cos_breite", "f8"), ("vektoren", "f8", (3,)), ("kontinent", "i1")]
+    spalten = np.zeros(len(hauptstaedte), dtype=dtype)
+    for name, werte in texte.items():
+        spalten[name] = werte
+    for name, schluessel in ZAHLENSPALTEN.items():
+        spalten[name] = [stadt[schluessel] for stadt in hauptstaedte]
+    koordinaten = geodaesie.Koordinaten(spalten["breite"], spalten["laenge"])
+    spalten["breite_rad"] = koordinaten.breite_rad
+    spalten["laenge_rad"] = koordinaten.laenge_rad
+    spalten["cos_breite"] = koordinaten.cos_breite
+    spalten["vektoren"] = koordinaten.vektoren
+    spalten["kontinent"] = [codes[stadt["Kontinent"]] for stadt in hauptstaedte]
+    return spalten, kontinente
+
+
+def _datei_hash(pfad):
+    with open(pfad, "rb") as datei:
+        return hashlib.sha1(datei.read()).hexdigest()
+
+
+def _meta_lesen(ordner):
+    try:
+        with open(os.path.join(ordner, "meta.json"), "r") as datei:
+            return json.load(datei)
+    except (OSError, ValueError):
+        return None
+
+
+def _meta_schreiben(ordner, meta):
+    """schreibt meta.json atomar (temporäre Datei + rename), erst danach gilt der Zwischenspeicher als gültig"""
+    temp = os.path.join(ordner, f"meta.json.{os.getpid()}.tmp")
+    with open(temp, "w") as datei:
+        json.dump(meta, datei)
+    os.replace(temp, os.path.join(ordner, "meta.json"))
+
+
+def zwischenspeicher_bauen(json_pfad, ordner, quelle_meta):
+    """liest die json-Datei und schreibt das Spalten-Array als .npy-Datei in den Zwischenspeicher"""
+    with open(json_pfad, "r") as staedte:
+        hauptstaedte = json.load(staedte)
+    spalten, kontinente = spalten_bauen(hauptstaedte)
+    os.makedirs(ordner, exist_ok=True)
+    temp = os.path.join(ordner, f"{CACHE_DATEI}.{os.getpid()}.tmp.npy")
+    np.save(temp, spalten)
+    os.replace(temp, os.path.join(ordner, CACHE_DATEI))
+    _meta_schreiben(ordner, dict(quelle_meta, version=FORMAT_VERSION, kontinente=kontinente))
+    return spalten, kontinente
+
+
+def laden(json_pfad='./capital_continent_country_data.json', ordner=None):
+    """lädt die Hauptstadtdaten aus dem Zwischenspeicher und baut ihn neu, wenn sich die json-Datei geändert hat"""
+    if ordner is None:
+        ordner = os.path.join(os.path.dirname(os.path.abspath(json_pfad)), CACHE_ORDNER)
+    status = os.stat(json_pfad)
+    quelle_meta = {"mtime_ns": status.st_mtime_ns, "groesse": status.st_size}
+    meta = _meta_lesen(ordner)
+
+    if meta is not None and meta.get("version") == FORMAT_VERSION:
+        aktuell = meta.get("mtime_ns") == quelle_meta["mtime_ns"] and meta.get("groesse") == quelle_meta["groesse"]
+        if not aktuell:
+            #nur die Änderungszeit ist anders (z.B. nach einem git checkout): Hash vergleichen
+            quelle_meta["sha1"] = _datei_hash(json_pfad)
+            aktuell = meta.get("sha1") == quelle_meta["sha1"]
+            if aktuell:
+                _meta_schreiben(ordner, dict(meta, **quelle_meta))
+        if aktuell:
+            try:
+                spalten = np.load(os.path.join(ordner, CACHE_DATEI), mmap_mode="r")
+                return Hauptstadtdaten(spalten, meta["kontinente"], ordner=ordner)
+            except (OSError, ValueError, KeyError):
+                pass #unvollständiger Zwischenspeicher, wird neu gebaut
+
+    quelle_meta.setdefault("sha1", _datei_hash(json_pfad))
+    try:
+        spalten, kontinente = zwischenspeicher_bauen(json_pfad, ordner, quelle_meta)
+    except OSError:
+        #Ordner nicht beschreibbar: dann eben ohne Zwischenspeicher direkt aus der json-Datei
+        with open(json_pfad, "r") as staedte:
+            spalten, kontinente = spalten_bauen(json.load(staedte))
+    return Hauptstadtdaten(spalten, kontinente, ordner=ordner)
@@ -0,0 +1,262 @@
+"""
+Protokoll aller Spiele: Spielstart, Zielstadt jeder Runde, jeder Klick und das Ergebnis jeder Runde.
+
+Bisher blieb von einem Spiel nur der Punktestand in der Spielerdatei. Das Ereignisprotokoll hängt die
+Ereignisse der Spielsitzung (spiel_verfolgen) an ereignisse.bin an, die Nummern der Spieler vergibt
+namensliste (ereignisse_spieler.jsonl). Es wird nie etwas überschrieben oder abgeschnitten.
+
+Die Datei ist spaltenweise in Blöcken gespeichert: nach dem Dateikopf (MAGIC) folgt Block auf Block, jeder
+mit einem Kopf (BLOCKKOPF: Kennung, Zahl der Zeilen, Länge und CRC32 der Daten) und danach jede Spalte aus
+SPALTEN am Stück, auf 8 Byte aufgefüllt. Ereignisse werden im Speicher in festen Arrays gesammelt (eintragen,
+O(1)) und als ein Block mit einem einzigen write angehängt, wenn der Puffer voll ist, ein Spiel endet oder das
+Protokoll geschlossen wird. So können mehrere Spiele gleichzeitig in dieselbe Datei schreiben.
+
+Lesen geht ohne die ganze Geschichte zu laden: bloecke() blendet die Datei per mmap ein und liefert die
+Spalten jedes Blocks als Sicht in die Datei, lesen() hängt die gewünschten Spalten aneinander. Ein Block, der
+bei einem Absturz nur halb geschrieben wurde, fällt durch die Prüfsumme auf; er wird übersprungen und beim
+nächsten Blockkopf weitergelesen.
+"""
+
+import math
+import mmap
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+import namensliste
+
+PROTOKOLL_DATEI = './ereignisse.bin'
+MAGIC = b"GQPROT02"
+#Kennung, Zahl der Zeilen, Länge der Daten in Bytes, CRC32 der Daten
+BLOCKKOPF = struct.Struct("<4sIII")
+BLOCKKENNUNG = b"BLK2"
+#so viele Ereignisse werden höchstens gesammelt, bevor ein Block geschrieben wird
+BLOCKGROESSE = 256
+
+#Arten der Ereignisse, gespeichert wird die Nummer
+ARTEN = ("spiel_gestartet", "neue_runde", "klick", "runde_beendet")
+#Spalten: zeit in Sekunden seit 1970, spieler ist die Nummer in ereignisse_spieler.jsonl, stadt die Zeile im
+#vollständigen Datensatz (-1 ohne Stadt). wert ist beim Spielstart der Schwierigkeitsgrad in km, bei einem
+#Klick der wievielte Versuch der Runde und beim Rundenende 1 für gewonnen, 0 für verloren.
+SPALTEN = (("zeit", "<f8"), ("breite", "<f4"), ("laenge", "<f4"), ("abstand", "<f4"), ("stadt", "<i4"),
+           ("spieler", "<u4"), ("wert", "<i2"), ("art", "u1"), ("runde", "u1"))
+_BREITEN = tuple(np.dtype(typ).itemsize for _, typ in SPALTEN)
+
+
+def _aufgefuellt(groesse):
+    return -(-groesse // 8) * 8
+
+
+def _blocklaenge(anzahl):
+    """Bytes eines Blocks mit anzahl Zeilen, ohne Blockkopf"""
+    return sum(_aufgefuellt(anzahl * breite) for breite in _BREITEN)
+
+
+def _namen_pfad(pfad):
+    return os.path.splitext(pfad)[0] + "_spieler.jsonl"
+
+
+def spielernamen(pfad=PROTOKOLL_DATEI):
+    """die Spielernamen eines Protokolls, Index ist die Spalte spieler (None für eine kaputte Zeile)"""
+    return namensliste.Namensliste(_namen_pfad(pfad)).namen
+
+
+def _blockanfaenge(daten):
+    """geht die Blockköpfe durch und gibt (Anfang der Spalten, Zeilen) der vollständigen Blöcke zurück.
+    Passt ein Kopf nicht (Länge, Prüfsumme), wird ab dem nächsten Vorkommen von BLOCKKENNUNG weitergesucht."""
+    bloecke = []
+    puffer = memoryview(daten)
+    position = len(MAGIC)
+    while position + BLOCKKOPF.size <= len(daten):
+        kennung, anzahl, laenge, pruefsumme = BLOCKKOPF.unpack_from(puffer, position)
+        anfang = position + BLOCKKOPF.size
+        if (kennung == BLOCKKENNUNG and laenge == _blocklaenge(anzahl) and anfang + laenge <= len(daten)
+                and zlib.crc32(puffer[anfang:anfang + laenge]) == pruefsumme):
+            bloecke.append((anfang, anzahl))
+            position = anfang + laenge
+        else:
+            position = daten.find(BLOCKKENNUNG, position + 1)
+            if position < 0:
+                break
+    puffer.release()
+    return bloecke
+
+
+def _einblenden(pfad):
+    """die Datei als mmap, None für eine leere Datei"""
+    if not os.path.exists(pfad) or os.path.getsize(pfad) <= len(MAGIC):
+        return None
+    with open(pfad, "rb") as datei:
+        daten = mmap.mmap(datei.fileno(), 0, access=mmap.ACCESS_READ)
+    if daten[:len(MAGIC)] != MAGIC:
+        daten.close()
+        raise ValueError(f"{pfad} ist kein Ereignisprotokoll in diesem Format")
+    return daten
+
+
+def bloecke(pfad=PROTOKOLL_DATEI, spalten=None):
+    """liefert Block für Block ein dict {Spalte: Array}, die Arrays sind Sichten in die eingeblendete Datei"""
+    daten = _einblenden(pfad)
+    if daten is None:
+        return
+    namen = set(spalten) if spalten is not None else None
+    #als ndarray: Ausschnitte davon sind Sichten ohne Kopie, die mmap bleibt offen, solange eine davon lebt
+    bytes_ = np.frombuffer(daten, dtype=np.uint8)
+    for anfang, anzahl in _blockanfaenge(daten):
+        block = {}
+        for (name, typ), breite in zip(SPALTEN, _BREITEN):
+            groesse = anzahl * breite
+            if namen is None or name in namen:
+                block[name] = bytes_[anfang:anfang + groesse].view(typ)
+            anfang += _aufgefuellt(groesse)
+        yield block
+
+
+def lesen(pfad=PROTOKOLL_DATEI, spalten=None):
+    """die gewünschten Spalten (ohne Angabe alle) über alle Blöcke als zusammenhängende Arrays"""
+    teile = {name: [] for name, _ in SPALTEN if spalten is None or name in spalten}
+    for block in bloecke(pfad, teile):
+        for name, werte in block.items():
+            teile[name].append(werte)
+    typen = dict(SPALTEN)
+    return {name: np.concatenate(werte) if werte else np.zeros(0, dtype=typen[name])
+            for name, werte in teile.items()}
+
+
+class Ereignisprotokoll:
+    """Hängt Ereignisse blockweise an pfad an.
+
+    eintragen() legt ein Ereignis nur in den Puffer, speichern() schreibt den Puffer als einen Block.
+    spiel_verfolgen() trägt die Ereignisse einer Spielsitzung automatisch ein.
+    """
+
+    def __init__(self, pfad=PROTOKOLL_DATEI, blockgroesse=BLOCKGROESSE):
+        self.pfad = pfad
+        self.blockgroesse = blockgroesse
+        self._puffer = {name: np.zeros(blockgroesse, dtype=typ) for name, typ in SPALTEN}
+        self.anzahl = 0 #Ereignisse im Puffer
+        self._datei = self._oeffnen()
+        self._namen = namensliste.Namensliste(_namen_pfad(pfad) if self._datei is not None else None)
+
+    @property
+    def spieler(self):
+        """die Spielernamen, Index ist die Spalte spieler"""
+        return self._namen.namen
+
+    def _oeffnen(self):
+        """öffnet die Datei ungepuffert zum Anhängen, eine neue Datei wird mit MAGIC angelegt"""
+        try:
+            self._anlegen()
+            return open(self.pfad, "ab", buffering=0)
+        except OSError as fehler:
+            print(f"Ereignisse werden nicht gespeichert: {fehler}")
+            return None
+
+    def _anlegen(self):
+        """legt die Datei mit MAGIC an, falls es sie noch nicht gibt. Eine Datei in einem anderen Format wird
+        mit der Endung .alt beiseitegelegt. Die neue Datei entsteht fertig mit Kopf (os.link schlägt fehl, wenn
+        ein anderes Spiel schneller war), so schreibt nie ein Block vor den Kopf."""
+        if os.path.exists(self.pfad):
+            with open(self.pfad, "rb") as datei:
+                kopf = datei.read(len(MAGIC))
+            if kopf == MAGIC:
+                return
+            print(f"{self.pfad} hat ein anderes Format und wird beiseitegelegt")
+            for pfad in (self.pfad, _namen_pfad(self.pfad)):
+                try:
+                    os.replace(pfad, pfad + ".alt")
+                except FileNotFoundError:
+                    pass
+        temp = f"{self.pfad}.{os.getpid()}.tmp"
+        with open(temp, "wb") as datei:
+            datei.write(MAGIC)
+        try:
+            os.link(temp, self.pfad)
+        except FileExistsError:
+            pass
+        except OSError:
+            #Dateisystem ohne harte Links: die Datei exklusiv anlegen, der Kopf ist dann nur ein kurzes write
+            try:
+                datei = os.open(self.pfad, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+            except FileExistsError:
+                pass
+            else:
+                try:
+                    os.write(datei, MAGIC)
+                finally:
+                    os.close(datei)
+        finally:
+            os.remove(temp)
+
+    def spieler_nummer(self, name):
+        """Nummer eines Spielers in der Spalte spieler, neue Spieler werden in ereignisse_spieler.jsonl
+        angehängt"""
+        return self._namen.nummer(name)
+
+    def eintragen(self, art, spieler="", runde=0, stadt=-1, breite=math.nan, laenge=math.nan, abstand=math.nan,
+                  wert=0, zeit=None):
+        """legt ein Ereignis in den Puffer, ein voller Puffer wird als Block geschrieben"""
+        i = self.anzahl
+        puffer = self._puffer
+        puffer["zeit"][i] = time.time() if zeit is None else zeit
+        puffer["art"][i] = ARTEN.index(art)
+        puffer["spieler"][i] = self.spieler_nummer(spieler)
+        puffer["runde"][i] = runde
+        puffer["stadt"][i] = stadt
+        puffer["breite"][i] = breite
+        puffer["laenge"][i] = laenge
+        puffer["abstand"][i] = abstand
+        puffer["wert"][i] = wert
+        self.anzahl += 1
+        if self.anzahl == self.blockgroesse:
+            self.speichern()
+
+    def speichern(self):
+        """schreibt die gesammelten Ereignisse als einen Block ans Ende der Datei"""
+        if self.anzahl == 0:
+            return
+        if self._datei is not None:
+            teile = []
+            for name, _ in SPALTEN:
+                spalte = self._puffer[name][:self.anzahl].tobytes()
+                teile.append(spalte + bytes(_aufgefuellt(len(spalte)) - len(spalte)))
+            daten = b"".join(teile)
+            #Kopf und Daten in einem write: andere Spiele, die gleichzeitig anhängen, kommen davor oder danach
+            self._datei.write(BLOCKKOPF.pack(BLOCKKENNUNG, self.anzahl, len(daten), zlib.crc32(daten)) + daten)
+        self.anzahl = 0
+
+    def spiel_verfolgen(self, spiel, spielername=lambda: ""):
+        """trägt die Ereignisse einer Spielsitzung ein; spielername liefert den Namen des aktuellen Spielers.
+        Nach jedem Spiel wird ein Block geschrieben."""
+        def gestartet(schwierigkeitsgrad):
+            self.eintragen("spiel_gestartet", spielername(), wert=schwierigkeitsgrad)
+
+        def neue_runde(stadt):
+            self.eintragen("neue_runde", spielername(), spiel.runde, spiel.datensatz_index())
+
+        def klick(breite, laenge, stadt, abstand):
+            versuch = len(spiel.klick_liste)
+            self.eintragen("klick", spielername(), spiel.runde, stadt, breite, laenge, abstand, versuch)
+
+        def runde_beendet(runde, gewonnen):
+            self.eintragen("runde_beendet", spielername(), runde, spiel.datensatz_index(), wert=int(gewonnen))
+
+        def spiel_beendet(ergebnisse):
+            runde_beendet(spiel.runde, spiel.gewonnen)
+            self.speichern()
+
+        spiel.abonnieren("spiel_gestartet", gestartet)
+        spiel.abonnieren("neue_runde", neue_runde)
+        spiel.abonnieren("klick", klick)
+        spiel.abonnieren("runde_beendet", runde_beendet)
+        spiel.abonnieren("spiel_beendet", spiel_beendet)
+
+    def schliessen(self):
+        """schreibt die restlichen Ereignisse und schließt die Datei"""
+        self.speichern()
+        if self._datei is not None:
+            self._datei.close()
+            self._datei = None
@@ -0,0 +1,335 @@
+"""
+Geodätische Berechnungen für das Geoquiz.
+
+Die Abstände werden mit der Haversine-Formel berechnet, allerdings nicht mehr Punkt für Punkt mit den
+math-Funktionen, sondern mit NumPy auf ganzen Arrays: ein Klick gegen alle Hauptstädte oder viele Klicks
+gegen viele Ziele auf einmal. Die Spalten, die bei jeder Abfrage gebraucht werden (Bogenmaß, cos der
+Breite, Einheitsvektoren), werden in der Klasse Koordinaten einmalig vorberechnet.
+
+Für die Karte gibt es außerdem Kreise um einen Punkt (kreis) und Großkreisbögen zwischen zwei Punkten
+(grosskreise), beide an der Datumsgrenze in Teilstücke zerlegbar (datumsgrenze_teilen).
+"""
+
+from collections import OrderedDict
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+ERDRADIUS = 6371.0 #Erdradius in km
+#Großkreisbögen bekommen einen Punkt pro GROSSKREIS_SCHRITT Grad Bogenlänge
+GROSSKREIS_SCHRITT = 1.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Abstand in km zwischen Punkten in Grad (Breite, Länge).
+
+    Alle Argumente dürfen Zahlen oder Arrays sein, sie werden nach den NumPy-Regeln gebroadcastet.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(wert, dtype=float)) for wert in (lat1, lon1, lat2, lon2))
+    return _haversine_bogenmass(lat1, lon1, np.cos(lat1), lat2, lon2, np.cos(lat2))
+
+
+def _haversine_bogenmass(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """Kern der Haversine-Formel im Bogenmaß, cos der Breiten werden vorberechnet übergeben"""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * ERDRADIUS * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def abstand(p1, p2):
+    """Abstand in km zwischen zwei Punkten (Breite, Länge) als float - Ersatz für die alte Skalarfunktion"""
+    return float(haversine(p1[0], p1[1], p2[0], p2[1]))
+
+
+def kreis(breite, laenge, radius_km, punkte=128):
+    """Punkte auf dem Kreis mit radius_km um einen oder mehrere Mittelpunkte (Grad), also alle Orte, die
+    genau radius_km entfernt sind. Gibt (Breiten, Längen) in Grad zurück, Form (Mittelpunkte..., punkte + 1),
+    der erste Punkt wird am Ende wiederholt. Die Längen liegen zwischen -180 und 180."""
+    lat = np.radians(np.asarray(breite, dtype=float))[..., np.newaxis]
+    lon = np.radians(np.asarray(laenge, dtype=float))[..., np.newaxis]
+    winkel = np.minimum(radius_km, np.pi * ERDRADIUS) / ERDRADIUS
+    richtung = np.linspace(0, 2 * np.pi, punkte + 1)
+    sin_lat = np.sin(lat)
+    lat2 = np.arcsin(np.clip(sin_lat * np.cos(winkel) + np.cos(lat) * np.sin(winkel) * np.cos(richtung), -1, 1))
+    lon2 = lon + np.arctan2(np.sin(richtung) * np.sin(winkel) * np.cos(lat), np.cos(winkel) - sin_lat * np.sin(lat2))
+    return np.degrees(lat2), (np.degrees(lon2) + 180) % 360 - 180
+
+
+def laengenbereich(laengen):
+    """kleinster Längenbereich (West, Ost) in Grad, der alle Längen enthält, oder None ohne Längen.
+
+    Gesucht wird die größte Lücke zwischen benachbarten Längen (auch über die Datumsgrenze hinweg), der
+    Bereich ist der Rest des Kreises. Liegt er über der Datumsgrenze (z.B. Ozeanien), ist West > Ost."""
+    laengen = np.sort(np.asarray(laengen, dtype=float).ravel())
+    if not len(laengen):
+        return None
+    luecken = np.diff(np.append(laengen, laengen[0] + 360))
+    i = int(np.argmax(luecken))
+    return float(laengen[(i + 1) % len(laengen)]), float(laengen[i])
+
+
+def datumsgrenze_teilen(laengen, breiten):
+    """zerlegt eine Linie (Grad) dort, wo sie über die Datumsgrenze springt, und verlängert die Teilstücke
+    bis genau an den Kartenrand. Gibt eine Liste von n x 2 Arrays (Länge, Breite) zurück."""
+    laengen = np.asarray(laengen, dtype=float)
+    breiten = np.asarray(breiten, dtype=float)
+    spruenge = np.nonzero(np.abs(np.diff(laengen)) > 180)[0]
+    if not len(spruenge):
+        return [np.column_stack((laengen, breiten))]
+    teile = []
+    anfang = [np.empty((0, 2))]
+    start = 0
+    for i in spruenge.tolist():
+        rand = 180.0 if laengen[i] > 0 else -180.0
+        #Länge des nächsten Punkts auf der anderen Seite weitergezählt, z.B. -179 als 181
+        weiter = laengen[i + 1] + 2 * rand
+        anteil = (rand - laengen[i]) / (weiter - laengen[i]) if weiter != laengen[i] else 0.0
+        schnitt = breiten[i] + anteil * (breiten[i + 1] - breiten[i])
+        teile.append(np.concatenate(anfang + [np.column_stack((laengen[start:i + 1], breiten[start:i + 1])),
+                                              [(rand, schnitt)]]))
+        anfang = [np.array([(-rand, schnitt)])]
+        start = i + 1
+    teile.append(np.concatenate(anfang + [np.column_stack((laengen[start:], breiten[start:]))]))
+    return teile
+
+
+def grosskreise(breiten1, laengen1, breiten2, laengen2, schritt=GROSSKREIS_SCHRITT):
+    """Großkreisbögen (kürzester Weg auf der Kugel) zwischen Punktpaaren in Grad, alle auf einmal.
+
+    Die Punkte entstehen durch sphärische Interpolation (slerp) der Einheitsvektoren, ihre Zahl richtet
+    sich nach der Bogenlänge (ein Punkt pro schritt Grad, mindestens Anfang und Ende). Gibt pro Paar die
+    Liste der Teilstücke aus datumsgrenze_teilen zurück."""
+    breiten1, laengen1, breiten2, laengen2 = (np.atleast_1d(np.asarray(wert, dtype=float))
+                                              for wert in (breiten1, laengen1, breiten2, laengen2))
+    a = einheitsvektoren(np.radians(breiten1), np.radians(laengen1))
+    b = einheitsvektoren(np.radians(breiten2), np.radians(laengen2))
+    winkel = np.arccos(np.clip((a * b).sum(axis=1), -1, 1))
+    anzahl = np.maximum(2, np.ceil(np.degrees(winkel) / schritt).astype(int) + 1)
+    ende = np.cumsum(anzahl)
+    start = ende - anzahl
+    #für alle Punkte aller Bögen auf einmal: zu welchem Bogen sie gehören und wie weit sie darauf liegen
+    bogen = np.repeat(np.arange(len(anzahl)), anzahl)
+    t = (np.arange(ende[-1] if len(ende) else 0) - start[bogen]) / (anzahl[bogen] - 1)
+    w = winkel[bogen]
+    sin_w = np.sin(w)
+    kurz = sin_w < 1e-12 #(fast) gleiche Punkte: einfach linear
+    sin_w = np.where(kurz, 1.0, sin_w)
+    faktor_a = np.where(kurz, 1 - t, np.sin((1 - t) * w) / sin_w)
+    faktor_b = np.where(kurz, t, np.sin(t * w) / sin_w)
+    punkte = faktor_a[:, np.newaxis] * a[bogen] + faktor_b[:, np.newaxis] * b[bogen]
+    punkte /= np.maximum(np.linalg.norm(punkte, axis=1), 1e-15)[:, np.newaxis]
+    breiten = np.degrees(np.arcsin(np.clip(punkte[:, 2], -1, 1)))
+    laengen = np.degrees(np.arctan2(punkte[:, 1], punkte[:, 0]))
+    return [datumsgrenze_teilen(laengen[von:bis], breiten[von:bis]) for von, bis in zip(start.tolist(), ende.tolist())]
+
+
+class Grosskreiscache:
+    """Merkt sich die zuletzt berechneten Großkreisbögen (LRU), Schlüssel sind die Endpunkte.
+
+    Fehlende Bögen einer Anfrage werden zusammen in einem Aufruf von grosskreise berechnet, so kostet die
+    Auswertung mit allen zehn Runden nur einen NumPy-Durchlauf - und beim nächsten Zeichnen gar nichts.
+    """
+    def __init__(self, groesse=256):
+        self.groesse = groesse
+        self._boegen = OrderedDict()
+
+    def __len__(self):
+        return len(self._boegen)
+
+    def teilstuecke(self, breiten1, laengen1, breiten2, laengen2):
+        """alle Teilstücke der Bögen zwischen den Punktpaaren, in einer Liste"""
+        paare = list(zip(*(np.atleast_1d(np.asarray(wert, dtype=float)).tolist()
+                           for wert in (breiten1, laengen1, breiten2, laengen2))))
+        fehlend = [paar for paar in dict.fromkeys(paare) if paar not in self._boegen]
+        if fehlend:
+            for paar, teile in zip(fehlend, grosskreise(*np.array(fehlend).T)):
+                self._boegen[paar] = teile
+        ergebnis = []
+        for paar in paare:
+            self._boegen.move_to_end(paar)
+            ergebnis.extend(self._boegen[paar])
+        while len(self._boegen) > self.groesse:
+            self._boegen.popitem(last=False)
+        return ergebnis
+
+
+def einheitsvektoren(lat_rad, lon_rad):
+    """wandelt Breite/Länge im Bogenmaß in 3D-Einheitsvektoren (n x 3) um"""
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+
+class Koordinaten:
+    """Spaltenweise Koordinaten einer Punktliste mit vorberechneten Hilfsspalten.
+
+    Nach dem Anlegen stehen Bogenmaß, cos(Breite) und Einheitsvektoren als Arrays bereit, damit bei
+    jeder Abfrage nur noch die Werte des Klickpunkts umgerechnet werden müssen.
+    """
+    def __init__(self, breiten, laengen):
+        self.breite = np.asarray(breiten, dtype=float)
+        self.laenge = np.asarray(laengen, dtype=float)
+        self.breite_rad = np.radians(self.breite)
+        self.laenge_rad = np.radians(self.laenge)
+        self.cos_breite = np.cos(self.breite_rad)
+        self.vektoren = einheitsvektoren(self.breite_rad, self.laenge_rad)
+        self._listen_anlegen()
+
+    @classmethod
+    def aus_spalten(cls, breite, laenge, breite_rad, laenge_rad, cos_breite, vektoren):
+        """übernimmt bereits vorberechnete Spalten (z.B. aus dem Zwischenspeicher in datensatz) ohne Neuberechnung"""
+        koordinaten = cls.__new__(cls)
+        koordinaten.breite = breite
+        koordinaten.laenge = laenge
+        koordinaten.breite_rad = breite_rad
+        koordinaten.laenge_rad = laenge_rad
+        koordinaten.cos_breite = cos_breite
+        koordinaten.vektoren = vektoren
+        koordinaten._listen_anlegen()
+        return koordinaten
+
+    def _listen_anlegen(self):
+        #für Einzelabfragen sind Python-floats mit math schneller als NumPy-Skalare
+        self._breite_rad_liste = self.breite_rad.tolist()
+        self._laenge_rad_liste = self.laenge_rad.tolist()
+        self._cos_breite_liste = self.cos_breite.tolist()
+
+    @classmethod
+    def aus_hauptstaedten(cls, hauptstaedte):
+        """erstellt die Koordinaten aus der Hauptstadtliste (Liste von dicts wie in der json-Datei)"""
+        return cls([stadt["Breitengrad"] for stadt in hauptstaedte], [stadt["Längengrad"] for stadt in hauptstaedte])
+
+    def __len__(self):
+        return len(self.breite)
+
+    def abstand_zu(self, index, breite, laenge):
+        """Abstand in km von einem Punkt zu einem einzelnen Eintrag (ohne NumPy-Overhead)"""
+        lat, lon = radians(breite), radians(laenge)
+        a = (sin((self._breite_rad_liste[index] - lat) / 2) ** 2
+             + cos(lat) * self._cos_breite_liste[index] * sin((self._laenge_rad_liste[index] - lon) / 2) ** 2)
+        return 2 * ERDRADIUS * atan2(sqrt(a), sqrt(1 - a))
+
+    def abstaende(self, breite, laenge, indizes=None):
+        """Abstände in km von einem Punkt zu allen (oder den ausgewählten) Einträgen"""
+        if indizes is None:
+            indizes = slice(None)
+        lat, lon = np.radians(breite), np.radians(laenge)
+        return self._abstaende_bogenmass(lat, lon, indizes)
+
+    def abstaende_matrix(self, breiten, laengen, indizes=None):
+        """Abstandsmatrix (Klicks x Ziele) in km für viele Klicks gegen alle (oder ausgewählte) Einträge"""
+        if indizes is None:
+            indizes = slice(None)
+        lat = np.radians(np.asarray(breiten, dtype=float))[:, np.newaxis]
+        lon = np.radians(np.asarray(laengen, dtype=float))[:, np.newaxis]
+        return self._abstaende_bogenmass(lat, lon, indizes)
+
+    def abstaende_paarweise(self, breiten, laengen, indizes):
+        """Abstände in km von Klick i zu Ziel indizes[i] (gleich lange Arrays)"""
+        indizes = np.asarray(indizes)
+        lat = np.radians(np.asarray(breiten, dtype=float))
+        lon = np.radians(np.asarray(laengen, dtype=float))
+        return self._abstaende_bogenmass(lat, lon, indizes)
+
+    def _abstaende_bogenmass(self, lat, lon, indizes):
+        return _haversine_bogenmass(lat, lon, np.cos(lat), self.breite_rad[indizes], self.laenge_rad[indizes],
+                                    self.cos_breite[indizes])
+
+
+def sehne_zu_km(sehne):
+    """wandelt den Abstand zweier Einheitsvektoren (Sehne) in den Großkreisabstand in km um"""
+    return 2 * ERDRADIUS * np.arcsin(np.clip(np.asarray(sehne) / 2, 0, 1))
+
+
+def km_zu_sehne(km):
+    """wandelt einen Großkreisabstand in km in die Sehnenlänge zwischen Einheitsvektoren um"""
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype=float), np.pi * ERDRADIUS) / (2 * ERDRADIUS))
+
+
+class Raumindex:
+    """KD-Baum über den 3D-Einheitsvektoren einer Koordinaten-Liste.
+
+    Die Sehnenlänge zwischen zwei Einheitsvektoren wächst monoton mit dem Großkreisabstand, deshalb
+    findet eine euklidische Suche im 3D-Raum auch die geographisch nächste Hauptstadt - ohne Sonderfälle
+    an der Datumsgrenze oder an den Polen. Eine Abfrage besucht nur wenige Knoten statt alle Städte
+    durchzugehen und ist damit schnell genug für jedes Mausbewegungs-Event.
+    """
+    BLATTGROESSE = 8
+
+    def __init__(self, koordinaten):
+        self.koordinaten = koordinaten
+        self._reihenfolge = np.arange(len(koordinaten))
+        self._knoten = []
+        vektoren = koordinaten.vektoren
+        self._wurzel = self._bauen(vektoren, 0, len(koordinaten))
+        self._punkte = vektoren[self._reihenfolge]
+
+    def _bauen(self, vektoren, start, ende):
+        """baut den Baum rekursiv auf, die Knoten werden als Tupel (start, ende, achse, teilwert, links, rechts)
+        gespeichert, Blätter haben die Achse -1"""
+        if ende - start <= self.BLATTGROESSE:
+            self._knoten.append((start, ende, -1, 0.0, -1, -1))
+            return len(self._knoten) - 1
+        teil = vektoren[self._reihenfolge[start:ende]]
+        achse = int(np.argmax(teil.max(axis=0) - teil.min(axis=0)))
+        sortiert = np.argsort(teil[:, achse], kind="stable")
+        self._reihenfolge[start:ende] = self._reihenfolge[start:ende][sortiert]
+        mitte = (start + ende) // 2
+        teilwert = float(vektoren[self._reihenfolge[mitte], achse])
+        links = self._bauen(vektoren, start, mitte)
+        rechts = self._bauen(vektoren, mitte, ende)
+        self._knoten.append((start, ende, achse, teilwert, links, rechts))
+        return len(self._knoten) - 1
+
+    def _naechster_suchen(self, knoten_nr, ziel, bester):
+        """Nächster-Nachbar-Suche: bester = [quadrierte Sehne, Position im Baum], wird während der Suche verkleinert"""
+        start, ende, achse, teilwert, links, rechts = self._knoten[knoten_nr]
+        if achse < 0:
+            quadrate = ((self._punkte[start:ende] - ziel) ** 2).sum(axis=1)
+            i = int(np.argmin(quadrate))
+            if quadrate[i] < bester[0]:
+                bester[0], bester[1] = float(quadrate[i]), start + i
+            return
+        differenz = ziel[achse] - teilwert
+        nah, fern = (links, rechts) if differenz < 0 else (rechts, links)
+        self._naechster_suchen(nah, ziel, bester)
+        if differenz * differenz <= bester[0]:
+            self._naechster_suchen(fern, ziel, bester)
+
+    def _umkreis_suchen(self, knoten_nr, ziel, radius_quadrat, treffer):
+        """sammelt die Blätter, die Punkte mit quadrierter Sehne <= radius_quadrat enthalten können"""
+        start, ende, achse, teilwert, links, rechts = self._knoten[knoten_nr]
+        if achse < 0:
+            treffer.append((start, ((self._punkte[start:ende] - ziel) ** 2).sum(axis=1)))
+            return
+        differenz = ziel[achse] - teilwert
+        nah, fern = (links, rechts) if differenz < 0 else (rechts, links)
+        self._umkreis_suchen(nah, ziel, radius_quadrat, treffer)
+        if differenz * differenz <= radius_quadrat:
+            self._umkreis_suchen(fern, ziel, radius_quadrat, treffer)
+
+    def naechster(self, breite, laenge):
+        """gibt (Index, Abstand in km) der nächstgelegenen Stadt zurück"""
+        if len(self.koordinaten) == 0:
+            return -1, float("inf")
+        ziel = einheitsvektoren(np.radians([breite]), np.radians([laenge]))[0]
+        bester = [np.inf, -1]
+        self._naechster_suchen(self._wurzel, ziel, bester)
+        return int(self._reihenfolge[bester[1]]), float(sehne_zu_km(np.sqrt(bester[0])))
+
+    def im_umkreis(self, breite, laenge, radius_km):
+        """gibt die Indizes und Abstände (km) aller Städte im Umkreis zurück, nach Abstand sortiert"""
+        ziel = einheitsvektoren(np.radians([breite]), np.radians([laenge]))[0]
+        radius_quadrat = float(km_zu_sehne(radius_km)) ** 2
+        treffer = []
+        self._umkreis_suchen(self._wurzel, ziel, radius_quadrat, treffer)
+        indizes = []
+        quadrate = []
+        for start, blatt_quadrate in treffer:
+            innen = np.nonzero(blatt_quadrate <= radius_quadrat)[0]
+            indizes.append(self._reihenfolge[start + innen])
+            quadrate.append(blatt_quadrate[innen])
+        if not indizes:
+            return np.empty(0, dtype=int), np.empty(0)
+        indizes = np.concatenate(indizes)
+        abstaende = sehne_zu_km(np.sqrt(np.concatenate(quadrate)))
+        sortiert = np.argsort(abstaende, kind="stable")
+        return indizes[sortiert], abstaende[sortiert]
@@ -0,0 +1,97 @@
+"""
+Erzeugt basiskarte.bin, die Kartendaten für das Geoquiz ohne Internetzugang.
+
+Aufruf:
+    python karte_bauen.py                          alle Ebenen in 110m, 50m und 10m (lädt die Natural-Earth-Daten
+                                                   einmalig über cartopy herunter)
+    python karte_bauen.py --massstaebe 110m 50m    nur diese Maßstäbe
+    python karte_bauen.py --ausgabe andere.bin     an einen anderen Ort schreiben
+
+Die Geometrien (Küsten, Ländergrenzen, Ozeane) liegen bei Natural Earth schon in Längen- und Breitengrad vor,
+also direkt in PlateCarree. Sie werden pro Maßstab so weit vereinfacht, dass der Unterschied auf dem Bildschirm
+nicht zu sehen ist, und als float32-Koordinaten mit int32-Offsets (shapely.to_ragged_array) hintereinander in
+eine Datei geschrieben. Das Format ist in basiskarte.Kartenbundle beschrieben.
+"""
+
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+import shapely
+
+import basiskarte
+
+#Toleranz der Vereinfachung in Grad: etwa ein halbes Pixel bei dem Zoom, ab dem der Maßstab benutzt wird
+TOLERANZEN = {"110m": 0.05, "50m": 0.01, "10m": 0.004}
+
+
+def vereinfachen(geometrien, toleranz):
+    """vereinfacht die Geometrien und wirft dabei leer gewordene weg"""
+    geometrien = shapely.simplify(np.asarray(geometrien, dtype=object), toleranz, preserve_topology=True)
+    return geometrien[~shapely.is_empty(geometrien)]
+
+
+def bundle_schreiben(pfad, ebenen):
+    """schreibt {(Kategorie, Name, Maßstab): Geometrien} als Kartenbundle (atomar über eine temporäre Datei)"""
+    bloecke = []
+    kopf = {"version": basiskarte.BUNDLE_VERSION, "ebenen": {}}
+    for (kategorie, name, massstab), geometrien in ebenen.items():
+        typ, koordinaten, offsets = shapely.to_ragged_array(geometrien)
+        bloecke.append(np.ascontiguousarray(koordinaten, dtype="<f4"))
+        eintrag = {"typ": int(typ), "koordinaten": len(bloecke) - 1, "offsets": []}
+        for offset in offsets:
+            bloecke.append(np.ascontiguousarray(offset, dtype="<i4"))
+            eintrag["offsets"].append(len(bloecke) - 1)
+        kopf["ebenen"][basiskarte.bundle_schluessel(kategorie, name, massstab)] = eintrag
+
+    #Lage der Blöcke hängt von der Länge des Kopfs ab, der sie enthält: so lange rechnen, bis sie stabil ist
+    lage = []
+    kopf_laenge = 0
+    while True:
+        position = 16 + kopf_laenge
+        lage = []
+        for block in bloecke:
+            position += -position % 8
+            lage.append([position, int(block.size)])
+            position += block.nbytes
+        eintraege = {}
+        for schluessel, eintrag in kopf["ebenen"].items():
+            eintraege[schluessel] = {"typ": eintrag["typ"], "koordinaten": lage[eintrag["koordinaten"]],
+                                     "offsets": [lage[i] for i in eintrag["offsets"]]}
+        text = json.dumps({"version": kopf["version"], "ebenen": eintraege}).encode("utf-8")
+        if len(text) == kopf_laenge:
+            break
+        kopf_laenge = len(text)
+
+    temp = f"{pfad}.{os.getpid()}.tmp"
+    with open(temp, "wb") as datei:
+        datei.write(basiskarte.BUNDLE_KENNUNG)
+        datei.write(struct.pack("<Q", kopf_laenge))
+        datei.write(text)
+        for (position, _), block in zip(lage, bloecke):
+            datei.write(b"\0" * (position - datei.tell()))
+            datei.write(block.tobytes())
+    os.replace(temp, pfad)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kartendaten für das Geoquiz als basiskarte.bin erzeugen")
+    parser.add_argument("--ausgabe", default=basiskarte.BUNDLE_DATEI, help="Zieldatei")
+    parser.add_argument("--massstaebe", nargs="*", default=list(TOLERANZEN), choices=list(TOLERANZEN))
+    argumente = parser.parse_args()
+
+    ebenen = {}
+    for kategorie, name, _ in basiskarte.EBENEN.values():
+        for massstab in argumente.massstaebe:
+            geometrien = vereinfachen(basiskarte.natural_earth(kategorie, name, massstab), TOLERANZEN[massstab])
+            ebenen[(kategorie, name, massstab)] = geometrien
+            print(f"{kategorie}/{name}/{massstab}: {len(geometrien)} Geometrien, "
+                  f"{int(shapely.get_num_coordinates(geometrien).sum())} Punkte")
+    bundle_schreiben(argumente.ausgabe, ebenen)
+    print(f"{argumente.ausgabe}: {os.path.getsize(argumente.ausgabe) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Alle Klicks aller Spiele, kompakt gespeichert und als Heatmap auswertbar.
+
+Bisher sammelte die Spielsitzung die Klicks einer Runde in klick_liste und verwarf sie mit der nächsten
+Runde. Hier wird jeder Klick mit Zielstadt (Zeile im vollständigen Datensatz), Abstand und Spieler als ein
+20-Byte-Datensatz (KLICK_DTYPE) mit einem einzigen write an klicks.bin angehängt. So können mehrere Spiele
+gleichzeitig in dieselbe Datei schreiben. Die Nummern der Spieler vergibt namensliste (klicks_spieler.jsonl),
+in klicks.json stehen Format und Zahl der Städte des Datensatzes.
+
+Für die Heatmap wird die Welt in Zellen von ZELLE_GRAD Grad geteilt (abstandstreu, Zeile 0 im Norden).
+Ein Histogramm (uint32, ZEILEN x SPALTEN) gibt es für alle Klicks, pro Stadt, pro Kontinent und pro Spieler.
+Es wird beim ersten Abruf einmal aus den gespeicherten Klicks gezählt und danach bei jedem Klick nur um eins
+erhöht (eine Zelle, O(1)). Das Bild auf der Karte hat immer die Größe des Histogramms - es kostet gleich
+viel, egal wie viele Klicks darin stecken.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+import namensliste
+
+#Kantenlänge einer Zelle der Heatmap in Grad
+ZELLE_GRAD = 2
+ZEILEN = 180 // ZELLE_GRAD
+SPALTEN = 360 // ZELLE_GRAD
+FORMAT_VERSION = 2
+KLICK_DTYPE = np.dtype([("breite", "<f4"), ("laenge", "<f4"), ("abstand", "<f4"), ("stadt", "<i4"),
+                        ("spieler", "<u4")])
+KLICK_DATEI = "klicks.bin"
+META_DATEI = "klicks.json"
+SPIELER_DATEI = "klicks_spieler.jsonl"
+#ein nach einem Absturz unvollständiger Datensatz wird mit diesem Byte aufgefüllt: spieler wird 0xFFFFFFFF,
+#fehlende Koordinaten NaN - beim Laden wird er übergangen
+FUELLBYTE = b"\xff"
+UNGUELTIGER_SPIELER = 0xFFFFFFFF
+#so lange wird höchstens auf die Sperre beim Auffüllen gewartet, danach gilt sie als liegengeblieben
+SPERRE_TIMEOUT = 2.0
+#Platz für so viele Klicks wird am Anfang reserviert, danach wird jeweils verdoppelt
+ANFANGSGROESSE = 1024
+ARTEN = ("gesamt", "stadt", "kontinent", "spieler")
+
+
+def zellen(breiten, laengen):
+    """Zeile und Spalte der Heatmap für Punkte in Grad (auch Arrays)"""
+    zeilen = np.clip(((90 - np.asarray(breiten, dtype=float)) // ZELLE_GRAD).astype(np.intp), 0, ZEILEN - 1)
+    spalten = np.clip(((np.asarray(laengen, dtype=float) + 180) // ZELLE_GRAD).astype(np.intp), 0, SPALTEN - 1)
+    return zeilen, spalten
+
+
+class Klickstatistik:
+    """Die gespeicherten Klicks und ihre Histogramme.
+
+    kontinent_codes ist der Kontinent-Code jeder Zeile des Datensatzes (datensatz.Hauptstadtdaten.kontinent),
+    kontinente die Namen dazu. Ohne ordner bleibt alles im Speicher. Histogramme werden über
+    histogramm(art, wert) abgefragt, art ist "gesamt", "stadt" (Zeile im Datensatz), "kontinent" (Name)
+    oder "spieler" (Name).
+    """
+
+    def __init__(self, kontinent_codes, kontinente, ordner=None):
+        self.kontinent_codes = np.asarray(kontinent_codes)
+        self.kontinente = list(kontinente)
+        self.ordner = ordner
+        self._namen = namensliste.Namensliste()
+        self._klicks = np.zeros(ANFANGSGROESSE, dtype=KLICK_DTYPE)
+        self.anzahl = 0
+        self._histogramme = {}
+        self._maxima = {}
+        self._datei = None
+        if ordner is not None:
+            self._laden()
+
+    def __len__(self):
+        return self.anzahl
+
+    @property
+    def spieler(self):
+        """die Spielernamen, Index ist die Nummer in den Datensätzen"""
+        return self._namen.namen
+
+    @property
+    def klicks(self):
+        """alle Klicks als Array mit den Feldern von KLICK_DTYPE"""
+        return self._klicks[:self.anzahl]
+
+    def _pfad(self, name):
+        return os.path.join(self.ordner, name)
+
+    def _laden(self):
+        """liest die gespeicherten Klicks und öffnet klicks.bin zum Anhängen. Passen die Dateien nicht zum
+        Format oder Datensatz, werden sie mit der Endung .alt beiseitegelegt und es wird neu angefangen."""
+        try:
+            os.makedirs(self.ordner, exist_ok=True)
+            self._meta_pruefen()
+            self._namen = namensliste.Namensliste(self._pfad(SPIELER_DATEI))
+            self._ausrichten()
+            self._datei = open(self._pfad(KLICK_DATEI), "ab", buffering=0)
+        except OSError as fehler:
+            print(f"Klicks werden nicht gespeichert: {fehler}")
+            self._datei = None
+            return
+        anzahl = os.path.getsize(self._pfad(KLICK_DATEI)) // KLICK_DTYPE.itemsize
+        gespeichert = np.fromfile(self._pfad(KLICK_DATEI), dtype=KLICK_DTYPE, count=anzahl)
+        gespeichert = gespeichert[(gespeichert["spieler"] != UNGUELTIGER_SPIELER) & (gespeichert["stadt"] >= 0)
+                                  & (gespeichert["stadt"] < len(self.kontinent_codes))
+                                  & np.isfinite(gespeichert["breite"]) & np.isfinite(gespeichert["laenge"])]
+        self._klicks = np.zeros(max(ANFANGSGROESSE, 2 * len(gespeichert)), dtype=KLICK_DTYPE)
+        self._klicks[:len(gespeichert)] = gespeichert
+        self.anzahl = len(gespeichert)
+
+    def _meta_pruefen(self):
+        """legt klicks.json an oder prüft, ob die vorhandenen Dateien zu Format und Datensatz passen"""
+        meta_pfad = self._pfad(META_DATEI)
+        meta = {"version": FORMAT_VERSION, "staedte": len(self.kontinent_codes)}
+        try:
+            with open(meta_pfad, "r", encoding="utf-8") as datei:
+                vorhanden = json.load(datei)
+        except FileNotFoundError:
+            vorhanden = None
+        except ValueError:
+            vorhanden = {}
+        if vorhanden == meta:
+            return
+        if vorhanden is not None:
+            print(f"{META_DATEI} passt nicht zu Format oder Datensatz, die alten Klicks werden beiseitegelegt")
+            for name in (KLICK_DATEI, SPIELER_DATEI, META_DATEI):
+                try:
+                    os.replace(self._pfad(name), self._pfad(name) + ".alt")
+                except FileNotFoundError:
+                    pass
+        #alle Spiele schreiben denselben Inhalt, gleichzeitiges Anlegen schadet also nicht
+        temp = f"{meta_pfad}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as datei:
+            json.dump(meta, datei)
+        os.replace(temp, meta_pfad)
+
+    def _ausrichten(self):
+        """Ist klicks.bin nach einem Absturz mitten in einem Datensatz zu Ende, wird er mit FUELLBYTE aufgefüllt,
+        damit neue Datensätze wieder auf der Grenze beginnen. Eine Sperrdatei verhindert, dass zwei
+        gleichzeitig startende Spiele beide auffüllen."""
+        pfad = self._pfad(KLICK_DATEI)
+        if not os.path.exists(pfad) or os.path.getsize(pfad) % KLICK_DTYPE.itemsize == 0:
+            return
+        sperre = pfad + ".lock"
+        frist = time.monotonic() + SPERRE_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(sperre, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                if time.monotonic() > frist:
+                    #liegengebliebene Sperre eines abgestürzten Spiels
+                    try:
+                        os.remove(sperre)
+                    except FileNotFoundError:
+                        pass
+                    frist = time.monotonic() + SPERRE_TIMEOUT
+                time.sleep(0.01)
+        try:
+            rest = os.path.getsize(pfad) % KLICK_DTYPE.itemsize
+            if rest:
+                with open(pfad, "ab", buffering=0) as datei:
+                    datei.write(FUELLBYTE * (KLICK_DTYPE.itemsize - rest))
+        finally:
+            os.remove(sperre)
+
+    def spieler_nummer(self, name):
+        """Nummer eines Spielers in den Datensätzen, neue Spieler werden angelegt"""
+        return self._namen.nummer(name)
+
+    def _schluessel(self, stadt, spieler):
+        return (("gesamt", None), ("stadt", stadt), ("kontinent", int(self.kontinent_codes[stadt])),
+                ("spieler", spieler))
+
+    def hinzufuegen(self, breite, laenge, stadt, abstand, spieler=""):
+        """speichert einen Klick auf die Stadt (Zeile im Datensatz) und zählt ihn in den schon
+        berechneten Histogrammen mit"""
+        nummer = self.spieler_nummer(spieler)
+        if self.anzahl == len(self._klicks):
+            self._klicks = np.concatenate((self._klicks, np.zeros(len(self._klicks), dtype=KLICK_DTYPE)))
+        self._klicks[self.anzahl] = (breite, laenge, abstand, stadt, nummer)
+        if self._datei is not None:
+            #ungepuffert: ein Datensatz ist ein write, auch wenn andere Spiele gleichzeitig anhängen
+            self._datei.write(self._klicks[self.anzahl:self.anzahl + 1].tobytes())
+        self.anzahl += 1
+
+        zeile = min(max(int((90 - breite) // ZELLE_GRAD), 0), ZEILEN - 1)
+        spalte = min(max(int((laenge + 180) // ZELLE_GRAD), 0), SPALTEN - 1)
+        for schluessel in self._schluessel(stadt, nummer):
+            histogramm = self._histogramme.get(schluessel)
+            if histogramm is not None:
+                histogramm[zeile, spalte] += 1
+                self._maxima[schluessel] = max(self._maxima[schluessel], int(histogramm[zeile, spalte]))
+
+    def histogramm(self, art="gesamt", wert=None):
+        """das Histogramm (ZEILEN x SPALTEN, Zeile 0 im Norden) und seine größte Zelle.
+
+        Beim ersten Abruf wird einmal über die gespeicherten Klicks gezählt, danach hält hinzufuegen
+        es aktuell."""
+        if art not in ARTEN:
+            raise ValueError(f"Unbekannte Auswertung: {art}")
+        if art == "kontinent":
+            wert = self.kontinente.index(wert)
+        elif art == "spieler":
+            if self._namen.pfad is not None:
+                self._namen.einlesen()
+            if wert not in self._namen:
+                #ein Spieler ohne Klicks wird nur durchs Nachschauen nicht angelegt
+                return np.zeros((ZEILEN, SPALTEN), dtype=np.uint32), 0
+            wert = self.spieler_nummer(wert)
+        elif art == "stadt":
+            wert = int(wert)
+        schluessel = (art, wert)
+        histogramm = self._histogramme.get(schluessel)
+        if histogramm is None:
+            klicks = self.klicks
+            if art == "stadt":
+                klicks = klicks[klicks["stadt"] == wert]
+            elif art == "kontinent":
+                klicks = klicks[self.kontinent_codes[klicks["stadt"]] == wert]
+            elif art == "spieler":
+                klicks = klicks[klicks["spieler"] == wert]
+            zeilen, spalten = zellen(klicks["breite"], klicks["laenge"])
+            histogramm = np.bincount(zeilen * SPALTEN + spalten, minlength=ZEILEN * SPALTEN)
+            histogramm = histogramm.astype(np.uint32).reshape(ZEILEN, SPALTEN)
+            self._histogramme[schluessel] = histogramm
+            self._maxima[schluessel] = int(histogramm.max())
+        return histogramm, self._maxima[schluessel]
+
+    def schliessen(self):
+        if self._datei is not None:
+            self._datei.close()
+            self._datei = None
@@ -0,0 +1,80 @@
+"""
+Nummern für Spielernamen, die mehrere gleichzeitig laufende Spiele gemeinsam vergeben (klickstatistik,
+ereignisprotokoll).
+
+Die Nummer eines Namens ist seine Zeile in der Datei. Die Datei wird nur angehängt, eine Zeile json pro Name mit
+einem einzigen write, vorhandene Zeilen ändern sich nie. Ist ein Name neu, wird er angehängt und die Datei
+danach weitergelesen: es gilt die erste Zeile mit dem Namen. Hängen zwei Spiele denselben Namen gleichzeitig an,
+bekommen so beide dieselbe Nummer, verschiedene Namen bekommen nie dieselbe. Eine kaputte Zeile (Absturz
+mitten im Schreiben) zählt als Zeile ohne Namen, damit die Nummern aller folgenden Zeilen stimmen.
+"""
+
+import json
+import os
+
+#O_BINARY gibt es nur unter Windows, dort würde sonst aus jedem \n ein \r\n
+_ANHAENGEN = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+class Namensliste:
+    """Namen und ihre Nummern aus einer Datei, die nur angehängt wird; ohne pfad nur im Speicher"""
+
+    def __init__(self, pfad=None):
+        self.pfad = pfad
+        self.namen = [] #Index ist die Nummer, None für eine kaputte Zeile
+        self._nummer = {}
+        self._gelesen = 0 #so viele Bytes der Datei sind schon eingelesen
+        if pfad is not None:
+            self.einlesen()
+
+    def __len__(self):
+        return len(self.namen)
+
+    def __contains__(self, name):
+        return name in self._nummer
+
+    def einlesen(self):
+        """liest die Zeilen, die seit dem letzten Aufruf (auch von anderen Spielen) angehängt wurden"""
+        try:
+            with open(self.pfad, "rb") as datei:
+                datei.seek(self._gelesen)
+                neu = datei.read()
+        except FileNotFoundError:
+            return
+        #eine Zeile ohne \n wird vielleicht gerade noch geschrieben, sie kommt beim nächsten Mal dran
+        ende = neu.rfind(b"\n") + 1
+        for zeile in neu[:ende].split(b"\n")[:-1]:
+            try:
+                name = json.loads(zeile.decode("utf-8"))
+            except ValueError:
+                name = None
+            if not isinstance(name, str):
+                name = None
+            elif name not in self._nummer:
+                self._nummer[name] = len(self.namen)
+            self.namen.append(name)
+        self._gelesen += ende
+
+    def nummer(self, name):
+        """Nummer eines Namens, ein neuer Name wird angehängt"""
+        nummer = self._nummer.get(name)
+        if nummer is not None:
+            return nummer
+        if self.pfad is not None:
+            self.einlesen()
+            if name not in self._nummer:
+                try:
+                    datei = os.open(self.pfad, _ANHAENGEN, 0o666)
+                    try:
+                        os.write(datei, (json.dumps(name, ensure_ascii=False) + "\n").encode("utf-8"))
+                    finally:
+                        os.close(datei)
+                    self.einlesen()
+                except OSError as fehler:
+                    print(f"Spielernamen werden nicht gespeichert: {fehler}")
+                    self.pfad = None
+        if name not in self._nummer:
+            #nur im Speicher (kein pfad oder Datei nicht beschreibbar)
+            self._nummer[name] = len(self.namen)
+            self.namen.append(name)
+        return self._nummer[name]
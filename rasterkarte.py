@@ -0,0 +1,160 @@
+"""
+Weltkarte aus einem Bild (world_map_300.png, world_map_600.png oder ein größeres) statt mit cartopy-Features.
+
+Früher wurde das PNG bei jedem plot_world neu dekodiert und bei jedem Zeichnen komplett auf die Achse skaliert,
+auch wenn nur ein kleiner Ausschnitt zu sehen war. Hier wird das Bild einmal in eine Mipmap-Pyramide übersetzt
+(jede Stufe halb so groß wie die vorige) und als .npy-Dateien im Ordner .geoquiz_cache abgelegt, die bei
+weiteren Starts nur noch per mmap eingeblendet werden. Beim Zeichnen wird die Stufe gewählt, deren Auflösung
+gerade noch für den sichtbaren Ausschnitt reicht, und nur dieser Ausschnitt an matplotlib übergeben - der
+Aufwand hängt so von der Bildschirmgröße ab und nicht davon, wie groß das Bild ist.
+
+Das Bild muss die ganze Welt in PlateCarree zeigen (Länge -180 bis 180, Breite 90 oben bis -90 unten).
+"""
+
+import json
+import os
+
+import numpy as np
+from matplotlib.image import AxesImage
+
+import datensatz
+
+#die kleinste Stufe der Pyramide ist höchstens so breit
+KLEINSTE_BREITE = 256
+WELT = (-180.0, 180.0, -90.0, 90.0)
+
+
+def bild_laden(pfad):
+    """dekodiert das Bild als uint8-Array (RGB, oder RGBA wenn es durchsichtige Stellen gibt)"""
+    from PIL import Image
+    with Image.open(pfad) as bild:
+        pixel = np.asarray(bild.convert("RGBA"))
+    if pixel[..., 3].min() == 255:
+        pixel = pixel[..., :3]
+    return np.ascontiguousarray(pixel)
+
+
+def verkleinern(pixel):
+    """halbiert Breite und Höhe, je 2x2 Pixel werden gemittelt (eine ungerade letzte Zeile/Spalte fällt weg)"""
+    hoehe, breite = pixel.shape[0] // 2 * 2, pixel.shape[1] // 2 * 2
+    summe = pixel[:hoehe:2, :breite:2].astype(np.uint16)
+    summe += pixel[1:hoehe:2, :breite:2]
+    summe += pixel[:hoehe:2, 1:breite:2]
+    summe += pixel[1:hoehe:2, 1:breite:2]
+    return ((summe + 2) // 4).astype(np.uint8)
+
+
+class Mipmap:
+    """Die Stufen eines Kartenbilds, Stufe 0 ist das Originalbild.
+
+    Die Stufen liegen als <Bildname>_<Stufe>.npy im Zwischenspeicher, daneben <Bildname>.json mit Änderungszeit
+    und Größe des Bilds. Ändert sich das Bild, wird die Pyramide neu gebaut.
+    """
+
+    def __init__(self, pfad, ordner=None):
+        self.pfad = pfad
+        if ordner is None:
+            ordner = os.path.join(os.path.dirname(os.path.abspath(pfad)), datensatz.CACHE_ORDNER)
+        self.ordner = ordner
+        self.name = os.path.splitext(os.path.basename(pfad))[0]
+        self.stufen = self._laden()
+
+    def _stufen_datei(self, stufe):
+        return os.path.join(self.ordner, f"{self.name}_{stufe}.npy")
+
+    def _laden(self):
+        status = os.stat(self.pfad)
+        quelle = {"mtime_ns": status.st_mtime_ns, "groesse": status.st_size, "kleinste_breite": KLEINSTE_BREITE}
+        meta_pfad = os.path.join(self.ordner, f"{self.name}.json")
+        try:
+            with open(meta_pfad, "r") as datei:
+                meta = json.load(datei)
+            if all(meta.get(schluessel) == wert for schluessel, wert in quelle.items()):
+                return [np.load(self._stufen_datei(stufe), mmap_mode="r") for stufe in range(meta["stufen"])]
+        except (OSError, ValueError, KeyError):
+            pass #kein oder unvollständiger Zwischenspeicher, wird neu gebaut
+
+        stufen = [bild_laden(self.pfad)]
+        while stufen[-1].shape[1] > KLEINSTE_BREITE and min(stufen[-1].shape[:2]) >= 2:
+            stufen.append(verkleinern(stufen[-1]))
+        try:
+            os.makedirs(self.ordner, exist_ok=True)
+            for stufe, pixel in enumerate(stufen):
+                temp = f"{self._stufen_datei(stufe)}.{os.getpid()}.tmp.npy"
+                np.save(temp, pixel)
+                os.replace(temp, self._stufen_datei(stufe))
+            temp = f"{meta_pfad}.{os.getpid()}.tmp"
+            with open(temp, "w") as datei:
+                json.dump(dict(quelle, stufen=len(stufen)), datei)
+            os.replace(temp, meta_pfad)
+        except OSError:
+            pass #Ordner nicht beschreibbar: dann eben nur im Speicher
+        return stufen
+
+    def stufe_fuer(self, grad_breite, grad_hoehe, pixel_breite, pixel_hoehe, groeber=0):
+        """die kleinste Stufe, die für einen Ausschnitt (in Grad) auf pixel_breite x pixel_hoehe Bildschirmpixeln
+        noch mindestens ein Bildpixel pro Bildschirmpixel hat; groeber nimmt entsprechend viele Stufen kleiner"""
+        gewaehlt = 0
+        for stufe in range(len(self.stufen) - 1, -1, -1):
+            hoehe, breite = self.stufen[stufe].shape[:2]
+            if grad_breite / 360 * breite >= pixel_breite and grad_hoehe / 180 * hoehe >= pixel_hoehe:
+                gewaehlt = stufe
+                break
+        return min(gewaehlt + groeber, len(self.stufen) - 1)
+
+    def ausschnitt(self, stufe, x0, x1, y0, y1):
+        """schneidet aus einer Stufe den Bereich aus, der (x0, x1, y0, y1) in Grad abdeckt (mit einem Pixel Rand).
+        Gibt die Pixel und deren extent (links, rechts, unten, oben) zurück."""
+        pixel = self.stufen[stufe]
+        hoehe, breite = pixel.shape[:2]
+        links, rechts, unten, oben = WELT
+        spalte0 = max(0, int(np.floor((x0 - links) / (rechts - links) * breite)) - 1)
+        spalte1 = min(breite, int(np.ceil((x1 - links) / (rechts - links) * breite)) + 1)
+        zeile0 = max(0, int(np.floor((oben - y1) / (oben - unten) * hoehe)) - 1)
+        zeile1 = min(hoehe, int(np.ceil((oben - y0) / (oben - unten) * hoehe)) + 1)
+        if spalte1 <= spalte0 or zeile1 <= zeile0:
+            return None, None
+        extent = (links + spalte0 * (rechts - links) / breite, links + spalte1 * (rechts - links) / breite,
+                  oben - zeile1 * (oben - unten) / hoehe, oben - zeile0 * (oben - unten) / hoehe)
+        return pixel[zeile0:zeile1, spalte0:spalte1], extent
+
+
+class Rasterebene(AxesImage):
+    """Die Weltkarte als Bild, das sich vor jedem Zeichnen Stufe und Ausschnitt passend zur Ansicht aussucht.
+
+    Wie die Kartenebenen in basiskarte: mit vereinfacht = True wird während schneller Eingaben eine Stufe
+    gröber gezeichnet.
+    """
+
+    def __init__(self, ax, pfad, ordner=None, **kwargs):
+        super().__init__(ax, origin="upper", interpolation=kwargs.pop("interpolation", "bilinear"), **kwargs)
+        self.name = "raster"
+        self.mipmap = Mipmap(pfad, ordner)
+        self.vereinfacht = False
+        self._rasterausschnitt = WELT
+        self._schluessel = None
+        self.set_data(self.mipmap.stufen[-1])
+
+    def get_extent(self):
+        return self._rasterausschnitt
+
+    def ausschnitt_setzen(self):
+        """wählt Stufe und Ausschnitt für die aktuellen Achsengrenzen und Fenstergröße"""
+        xlim, ylim = self.axes.get_xlim(), self.axes.get_ylim()
+        x0, x1, y0, y1 = min(xlim), max(xlim), min(ylim), max(ylim)
+        stufe = self.mipmap.stufe_fuer(x1 - x0, y1 - y0, self.axes.bbox.width, self.axes.bbox.height,
+                                       groeber=1 if self.vereinfacht else 0)
+        schluessel = (stufe, x0, x1, y0, y1)
+        if schluessel == self._schluessel:
+            return
+        pixel, extent = self.mipmap.ausschnitt(stufe, x0, x1, y0, y1)
+        if pixel is not None:
+            self.set_data(pixel)
+            self._rasterausschnitt = extent
+        self._schluessel = schluessel
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        self.ausschnitt_setzen()
+        super().draw(renderer)
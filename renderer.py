@@ -0,0 +1,397 @@
+"""
+Renderer für die Weltkarte: eine Schnittstelle, mehrere Arten die Karte zu zeichnen.
+
+Bisher steckte die Wahl zwischen cartopy und dem Hintergrundbild direkt im Hauptstadtplotter, in
+Geoquiz_Abgabe.py musste man dafür noch Zeilen aus- und einkommentieren. Jetzt legt ein Renderer Figur und
+Achse an, baut die statische Karte und zeichnet Marker, Linien und Überlagerungen. Der Hauptstadtplotter
+kümmert sich nur noch um Spiel, Zoom, Verschieben und Blitting. Die Datenkoordinaten sind bei allen
+Renderern Längen- und Breitengrad.
+
+Die beweglichen Elemente (Klicks, Städte, Linien, Haken/Kreuz, Toleranzringe) liegen in wenigen festen
+Ebenen, die bei jedem neuen Element nur neue Daten bekommen: Punkte in einer Line2D ohne Linie (Agg stempelt
+die Marker dann aus einem zwischengespeicherten Bild, das ist schneller als eine PathCollection aus
+ax.scatter), Linien in einer LineCollection. Früher legte jedes ax.plot einen eigenen Artist an, nach vielen
+Klicks und der Auswertung wurde jedes Blitting damit langsamer - jetzt hängt es von der Zahl der Ebenen ab.
+Die Heatmap der Klicks (klickstatistik) ist ein Bild fester Größe in der untersten Ebene.
+Die Linien zwischen Klick und Stadt sind Großkreisbögen aus geodaesie.grosskreise (über einen LRU-Cache),
+die Auswertung legt die Bögen aller Runden mit einer einzigen Änderung der LineCollection an.
+
+Welcher Renderer benutzt wird, entscheidet erstellen() (in Geoquiz.py über KARTE):
+    "cartopy": GeoAxes mit Küsten, Grenzen und Ozeanen aus basiskarte (Natural Earth bzw. basiskarte.bin)
+    "raster":  normale matplotlib-Achse mit dem Kartenbild aus rasterkarte, braucht kein cartopy
+    "agg":     wie "raster", aber von Anfang an auf einem eigenen Agg-Canvas - zeichnet ohne Bildschirm, z.B.
+               für Simulationen, Benchmarks und Bildexport; mit nur_gradnetz=True ohne Kartenbild, nur
+               Ozeanfläche und Gradnetz
+
+Alle Renderer zeichnen auf einem Agg-Canvas (im Spiel FigureCanvasTkAgg, sonst mit offscreen()).
+Was ein Bild bei welchem Renderer kostet, misst python benchmark.py --nur renderer.
+"""
+
+import os
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+
+import geodaesie
+
+WELTANSICHT = ((-180, 180), (-90, 90))
+#Kartenbild für "raster" und "agg", liegt im Repo neben diesem Modul
+KARTENBILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "world_map_600.png")
+#Ozeanfarbe wie bei cartopy (cfeature.COLORS["water"]), ohne cartopy importieren zu müssen
+OZEANFARBE = (152 / 256, 183 / 256, 226 / 256)
+#Abstand der Linien des Gradnetzes beim Renderer "agg" mit nur_gradnetz=True in Grad
+GRADNETZ_ABSTAND = 30
+#Rand um die Städte bei ansicht_fuer: Anteil der Ausdehnung, mindestens ANSICHT_RAND_GRAD
+ANSICHT_RAND = 0.1
+ANSICHT_RAND_GRAD = 5
+
+
+def erstellen(art="cartopy", **optionen):
+    """erstellt den Renderer art ("cartopy", "raster" oder "agg"), optionen gehen an dessen Konstruktor"""
+    if art not in RENDERER:
+        raise ValueError(f"Unbekannter Renderer: {art}")
+    return RENDERER[art](**optionen)
+
+
+def vorladen(art="cartopy"):
+    """importiert, was der Renderer art braucht (matplotlib und ggf. cartopy), z.B. in einem Hintergrund-Thread"""
+    if art not in RENDERER:
+        raise ValueError(f"Unbekannter Renderer: {art}")
+    RENDERER[art].vorladen()
+
+
+def begrenzen(xlim, ylim, grenzen=WELTANSICHT):
+    """schiebt einen Ausschnitt zurück in grenzen ((x0, x1), (y0, y1)); ist er in einer Richtung mindestens so
+    groß wie grenzen, gibt es grenzen selbst zurück"""
+    (x0, x1), (y0, y1) = grenzen
+    if xlim[1] - xlim[0] >= x1 - x0 or ylim[1] - ylim[0] >= y1 - y0:
+        return [x0, x1], [y0, y1]
+    return list(_einpassen(xlim[0], xlim[1], x0, x1)), list(_einpassen(ylim[0], ylim[1], y0, y1))
+
+
+def _einpassen(von, bis, grenze_von, grenze_bis):
+    """ein Intervall, nötigenfalls verschoben oder gekürzt, damit es in die Grenzen passt"""
+    if bis - von >= grenze_bis - grenze_von:
+        return float(grenze_von), float(grenze_bis)
+    verschiebung = max(0, grenze_von - von) - max(0, bis - grenze_bis)
+    return float(von + verschiebung), float(bis + verschiebung)
+
+
+class Renderer:
+    """Grundklasse: Figur mit einer Achse, die Karte und die beweglichen Elemente darauf.
+
+    Unterklassen legen die Achse an (achse_erstellen) und bauen die statische Karte (basiskarte_zeichnen).
+    Die Ebenen der Karte stehen danach in karte, jede hat einen name und ein Attribut vereinfacht, mit dem
+    der Hauptstadtplotter während schneller Eingaben auf eine gröbere Darstellung umschaltet.
+    Marker, Linien und Überlagerungen kommen in die Ebenen in ebenen (Reihenfolge = Zeichenreihenfolge),
+    deren Artists sind 'animated', damit sie fürs Blitting nicht im Hintergrund landen.
+    """
+    name = None
+
+    def __init__(self, figsize=(16, 10)):
+        self.fig = Figure(figsize=figsize)
+        self.ax = self.achse_erstellen()
+        self.fig.tight_layout()
+        self.karte = []
+        self.ebenen = self.ebenen_erstellen()
+        self.grosskreiscache = geodaesie.Grosskreiscache()
+
+    @classmethod
+    def vorladen(cls):
+        """importiert die Module, die der Renderer zum Zeichnen braucht"""
+
+    def achse_erstellen(self):
+        """normale matplotlib-Achse ohne Beschriftung, ein Grad Länge so breit wie ein Grad Breite hoch"""
+        ax = self.fig.add_subplot(1, 1, 1)
+        ax.set_aspect("equal")
+        ax.set_xticks([])
+        ax.set_yticks([])
+        return ax
+
+    def offscreen(self):
+        """zeichnet ohne Fenster auf einem eigenen Agg-Canvas"""
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        return FigureCanvasAgg(self.fig)
+
+    def basiskarte_zeichnen(self):
+        """fügt die statische Karte zur (leeren) Achse hinzu und gibt ihre Ebenen zurück"""
+        raise NotImplementedError
+
+    def ansicht_fuer(self, ausdehnung):
+        """Ausschnitt ((x0, x1), (y0, y1)) für Städte in ausdehnung (West, Ost, Süd, Nord, wie in
+        datensatz.Hauptstadtdaten), mit Rand und passend zum Seitenverhältnis der Achse, damit sie ganz
+        ausgefüllt wird. Ohne Ausdehnung die ganze Welt.
+
+        Die Karte reicht nur von -180 bis 180 Grad: liegt die Ausdehnung über der Datumsgrenze (Ozeanien),
+        bleibt nur die volle Breite."""
+        if ausdehnung is None:
+            return WELTANSICHT
+        west, ost, sued, nord = ausdehnung
+        if west > ost:
+            west, ost = WELTANSICHT[0]
+        rand_x = max(ANSICHT_RAND_GRAD, (ost - west) * ANSICHT_RAND)
+        rand_y = max(ANSICHT_RAND_GRAD, (nord - sued) * ANSICHT_RAND)
+        x0, x1, y0, y1 = west - rand_x, ost + rand_x, sued - rand_y, nord + rand_y
+        #Seitenverhältnis der Achse vor dem Anpassen an die Limits (aspect="equal" verkleinert sonst die Achse)
+        position = self.ax.get_position(original=True)
+        breite, hoehe = self.fig.get_size_inches()
+        verhaeltnis = (breite * position.width) / (hoehe * position.height)
+        if x1 - x0 < (y1 - y0) * verhaeltnis:
+            mitte, halb = (x0 + x1) / 2, (y1 - y0) * verhaeltnis / 2
+            x0, x1 = mitte - halb, mitte + halb
+        else:
+            mitte, halb = (y0 + y1) / 2, (x1 - x0) / verhaeltnis / 2
+            y0, y1 = mitte - halb, mitte + halb
+        return _einpassen(x0, x1, *WELTANSICHT[0]), _einpassen(y0, y1, *WELTANSICHT[1])
+
+    def ansicht_setzen(self, xlim, ylim):
+        """setzt den sichtbaren Ausschnitt in Grad"""
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+
+    def ebenen_erstellen(self):
+        """die festen Ebenen für die beweglichen Elemente, von unten nach oben"""
+        ax = self.ax
+        return {
+            "heatmap": Heatmapebene(ax),
+            "ringe": Linienebene(ax, "C3", linewidths=1.5, linestyles="dashed"),
+            "hauptstaedte": Punktebene(ax, "o", "C0"),
+            "linien": Linienebene(ax, "C0", linestyles="dotted"),
+            "richtig": Punktebene(ax, "o", "g"),
+            "falsch": Punktebene(ax, "o", "r"),
+            "ziele": Punktebene(ax, "o", "C1"),
+            "klicks": Punktebene(ax, "^", "C0"),
+            "overlay": Linienebene(ax, "g", linewidths=10, alpha=0.5, capstyle="projecting", joinstyle="round"),
+        }
+
+    def bewegliche_artists(self):
+        """die Artists aller Ebenen, in denen gerade etwas liegt"""
+        return [ebene.artist for ebene in self.ebenen.values() if len(ebene)]
+
+    def ebenen_leeren(self):
+        """entfernt alle beweglichen Elemente, die Artists bleiben für die nächste Runde bestehen"""
+        for ebene in self.ebenen.values():
+            ebene.leeren()
+
+    def nicht_animiert(self):
+        """für Bilder ohne Blitting (z.B. spielexport): die Ebenen werden bei jedem Zeichnen mitgezeichnet"""
+        for ebene in self.ebenen.values():
+            ebene.artist.set_animated(False)
+
+    def marker(self, x, y, ebene="ziele"):
+        """Punkt(e) in eine Punktebene: "ziele" (Stadt), "klicks" (Dreieck), "richtig" oder "falsch" (Auswertung)"""
+        self.ebenen[ebene].hinzufuegen(x, y)
+
+    def linie(self, x, y, farbe=None):
+        """gepunktete Linie durch die Punkte x, y, z.B. zwischen Klick und Stadt"""
+        self.ebenen["linien"].hinzufuegen(x, y, farbe)
+
+    def grosskreise(self, breiten1, laengen1, breiten2, laengen2, farbe=None):
+        """gepunktete Großkreisbögen zwischen Punktpaaren (einzeln oder als Arrays), alle in einem Rutsch"""
+        self.ebenen["linien"].erweitern(self.grosskreiscache.teilstuecke(breiten1, laengen1, breiten2, laengen2),
+                                        farbe)
+
+    def punkte(self, x, y):
+        """ersetzt die angezeigten Hauptstädte durch die Punkte x, y"""
+        self.ebenen["hauptstaedte"].setzen(x, y)
+
+    def overlay(self, x, y, farbe):
+        """breite, durchscheinende Linie über der ganzen Karte (Haken bei Treffer, Kreuz bei verloren)"""
+        self.ebenen["overlay"].hinzufuegen(x, y, farbe)
+
+    def heatmap(self, histogramm=None, maximum=None):
+        """zeigt ein Histogramm über die ganze Welt (z.B. aus klickstatistik) als Heatmap, None blendet sie aus"""
+        if histogramm is None:
+            self.ebenen["heatmap"].leeren()
+        else:
+            self.ebenen["heatmap"].setzen(histogramm, maximum)
+
+    def ring(self, laengen, breiten, farbe=None):
+        """Toleranzring (z.B. aus trefferzonen), an der Datumsgrenze in Teilstücke zerlegt"""
+        teile = geodaesie.datumsgrenze_teilen(laengen, breiten)
+        self.ebenen["ringe"].erweitern([teil for teil in teile if len(teil) > 1], farbe)
+
+    def tooltip(self):
+        """unsichtbares Textfeld, das später an eine Stadt gesetzt wird"""
+        tooltip = self.ax.annotate("", xy=(0, 0), xytext=(10, 10), textcoords="offset points",
+                                   bbox=dict(boxstyle="round", fc="white", alpha=0.8), animated=True)
+        tooltip.set_visible(False)
+        return tooltip
+
+    def bild(self):
+        """zeichnet die Figur und gibt sie als RGBA-Array zurück (braucht einen Agg-Canvas)"""
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba())
+
+
+class Punktebene:
+    """Punkte einer Sorte (z.B. alle Klicks) als eine einzige Line2D ohne Linie.
+
+    Neue Punkte ändern nur die Daten der Line2D, es entsteht kein neuer Artist.
+    """
+
+    def __init__(self, ax, marker, farbe, **darstellung):
+        self.artist, = ax.plot([], [], marker=marker, linestyle="none", color=farbe, animated=True, **darstellung)
+        self._x = np.empty(0)
+        self._y = np.empty(0)
+
+    def __len__(self):
+        return len(self._x)
+
+    def hinzufuegen(self, x, y):
+        self.setzen(np.concatenate((self._x, np.ravel(x))), np.concatenate((self._y, np.ravel(y))))
+
+    def setzen(self, x, y):
+        self._x = np.asarray(x, dtype=float).ravel()
+        self._y = np.asarray(y, dtype=float).ravel()
+        self.artist.set_data(self._x, self._y)
+
+    def leeren(self):
+        if len(self._x):
+            self.setzen(np.empty(0), np.empty(0))
+
+
+class Heatmapebene:
+    """Ein Histogramm über die ganze Welt (Zeile 0 im Norden) als halb durchsichtiges Bild, leere Zellen bleiben
+    frei. Das Bild hat die Größe des Histogramms, nicht die Zahl der Klicks bestimmt die Kosten."""
+
+    def __init__(self, ax, farbskala="YlOrRd", alpha=0.7):
+        links, rechts = WELTANSICHT[0]
+        unten, oben = WELTANSICHT[1]
+        self.artist = AxesImage(ax, cmap=farbskala, origin="upper", interpolation="nearest", alpha=alpha,
+                                extent=(links, rechts, unten, oben), animated=True)
+        self.artist.set_data(np.ma.masked_all((1, 1)))
+        ax.add_artist(self.artist)
+        self._sichtbar = False
+
+    def __len__(self):
+        return int(self._sichtbar)
+
+    def setzen(self, histogramm, maximum=None):
+        """zeigt das Histogramm, die Farbskala reicht von einem Klick bis maximum (ohne Angabe die größte Zelle)"""
+        if maximum is None:
+            maximum = int(histogramm.max())
+        self.artist.set_data(np.ma.masked_equal(histogramm, 0))
+        self.artist.set_clim(1, max(1, maximum))
+        self._sichtbar = True
+
+    def leeren(self):
+        self._sichtbar = False
+
+
+class Linienebene:
+    """Linien einer Sorte (z.B. alle Linien Klick - Stadt) in einer einzigen LineCollection"""
+
+    def __init__(self, ax, farbe, **darstellung):
+        self.farbe = farbe
+        self.artist = LineCollection([], animated=True, **darstellung)
+        ax.add_collection(self.artist, autolim=False)
+        self._linien = []
+        self._farben = []
+
+    def __len__(self):
+        return len(self._linien)
+
+    def hinzufuegen(self, x, y, farbe=None):
+        self.erweitern([np.column_stack((np.ravel(x), np.ravel(y)))], farbe)
+
+    def erweitern(self, linien, farbe=None):
+        """mehrere Linien (n x 2 Arrays mit x, y) auf einmal, die Collection wird nur einmal geändert"""
+        linien = [np.asarray(linie, dtype=float) for linie in linien]
+        if not linien:
+            return
+        self._linien.extend(linien)
+        self._farben.extend([farbe or self.farbe] * len(linien))
+        self._aktualisieren()
+
+    def leeren(self):
+        if self._linien:
+            self._linien = []
+            self._farben = []
+            self._aktualisieren()
+
+    def _aktualisieren(self):
+        self.artist.set_segments(self._linien)
+        self.artist.set_color(self._farben)
+
+
+class CartopyRenderer(Renderer):
+    """Küsten, Ländergrenzen und Ozeane als Vektordaten auf einer cartopy-GeoAxes (PlateCarree)"""
+    name = "cartopy"
+
+    @classmethod
+    def vorladen(cls):
+        import cartopy.crs
+        import basiskarte
+
+    def achse_erstellen(self):
+        import cartopy.crs as ccrs
+        return self.fig.add_subplot(1, 1, 1, projection=ccrs.PlateCarree())
+
+    def basiskarte_zeichnen(self):
+        #statt cfeature.BORDERS, COASTLINE und OCEAN: Ebenen, die je nach Zoom 110m, 50m oder 10m zeichnen
+        #und nur die Geometrien im sichtbaren Ausschnitt an matplotlib übergeben
+        import basiskarte
+        self.karte = [basiskarte.Kartenebene("grenzen"), basiskarte.Kartenebene("kueste"),
+                      basiskarte.Kartenebene("ozean")]
+        for ebene in self.karte:
+            self.ax.add_collection(ebene, autolim=False)
+        return self.karte
+
+
+class RasterRenderer(Renderer):
+    """Weltkarte aus einem Bild (Mipmap-Pyramide aus rasterkarte), gezeichnet wird nur der sichtbare Ausschnitt"""
+    name = "raster"
+
+    def __init__(self, bild=KARTENBILD, figsize=(16, 10)):
+        self.pfad = bild
+        super().__init__(figsize)
+
+    @classmethod
+    def vorladen(cls):
+        import rasterkarte
+
+    def basiskarte_zeichnen(self):
+        import rasterkarte
+        self.karte = [rasterkarte.Rasterebene(self.ax, self.pfad)]
+        self.ax.add_image(self.karte[0])
+        return self.karte
+
+
+class Gradnetz(LineCollection):
+    """Längen- und Breitengrade alle abstand Grad als eine LineCollection"""
+
+    def __init__(self, abstand=GRADNETZ_ABSTAND, **darstellung):
+        linien = [[(laenge, -90), (laenge, 90)] for laenge in range(-180, 181, abstand)]
+        linien += [[(-180, breite), (180, breite)] for breite in range(-90, 91, abstand)]
+        super().__init__(linien, **dict(dict(colors="white", linewidths=0.8), **darstellung))
+        self.name = "gradnetz"
+        self.vereinfacht = False
+
+
+class AggRenderer(RasterRenderer):
+    """Die Weltkarte aus dem Kartenbild wie bei "raster", aber mit einem eigenen Agg-Canvas von Anfang an.
+
+    Braucht weder cartopy noch Internet noch einen Bildschirm, so lassen sich Spiele nachzeichnen und als Bild
+    exportieren. Mit nur_gradnetz=True wird statt des Bilds nur Ozeanfläche und Gradnetz gezeichnet, damit
+    misst der Benchmark die Kosten der beweglichen Elemente allein.
+    """
+    name = "agg"
+
+    def __init__(self, bild=KARTENBILD, figsize=(16, 10), nur_gradnetz=False):
+        self.nur_gradnetz = nur_gradnetz
+        super().__init__(bild, figsize)
+        self.offscreen()
+
+    def basiskarte_zeichnen(self):
+        if not self.nur_gradnetz:
+            return super().basiskarte_zeichnen()
+        self.ax.set_facecolor(OZEANFARBE)
+        self.karte = [Gradnetz()]
+        self.ax.add_collection(self.karte[0], autolim=False)
+        return self.karte
+
+
+RENDERER = {klasse.name: klasse for klasse in (CartopyRenderer, RasterRenderer, AggRenderer)}
@@ -0,0 +1,172 @@
+"""
+Spielerliste für das Spielermenü, auch für sehr viele Spieler.
+
+Bisher kam jeder Spieler als Zeile in eine Tk-Listbox, nach jedem Zurücksetzen oder Löschen wurde die ganze
+Listbox geleert und neu befüllt und der Name danach wieder aus dem Text "Name: Punkte" herausgeschnitten.
+Bei einer ganzen Schule mit tausenden Spielern dauert das spürbar.
+
+Hier liegen die Namen sortiert in einer Liste (Namensindex), Einfügen und Löschen eines Spielers geht per bisect,
+und alle Namen mit einem bestimmten Anfang bilden einen zusammenhängenden Bereich, der mit zwei binären Suchen
+gefunden wird. Angezeigt werden nur so viele Label-Zeilen, wie sichtbar sind (Spielerliste); beim Scrollen
+bekommen dieselben Labels nur einen neuen Text.
+"""
+
+import bisect
+
+import tkinter as tk
+
+
+class Namensindex:
+    """Sortierte Spielernamen mit Punkten und Präfixsuche (Groß-/Kleinschreibung egal)"""
+
+    def __init__(self, eintraege=()):
+        self.punkte = dict(eintraege)
+        #sortiert nach (kleingeschriebener Name, Name), damit gleiche Anfänge zusammen liegen
+        self._sortiert = sorted((name.casefold(), name) for name in self.punkte)
+
+    def __len__(self):
+        return len(self._sortiert)
+
+    def __contains__(self, name):
+        return name in self.punkte
+
+    def setzen(self, name, punkte):
+        """trägt einen Spieler ein oder ändert seine Punkte, gibt True zurück, wenn er neu ist"""
+        neu = name not in self.punkte
+        self.punkte[name] = punkte
+        if neu:
+            bisect.insort(self._sortiert, (name.casefold(), name))
+        return neu
+
+    def entfernen(self, name):
+        """löscht einen Spieler, gibt seine bisherige Position in der sortierten Liste zurück"""
+        del self.punkte[name]
+        position = bisect.bisect_left(self._sortiert, (name.casefold(), name))
+        del self._sortiert[position]
+        return position
+
+    def position(self, name):
+        """Position des Spielers in der sortierten Liste"""
+        return bisect.bisect_left(self._sortiert, (name.casefold(), name))
+
+    def bereich(self, praefix=""):
+        """(Anfang, Ende) der Namen, die mit praefix beginnen"""
+        if not praefix:
+            return 0, len(self._sortiert)
+        schluessel = praefix.casefold()
+        anfang = bisect.bisect_left(self._sortiert, (schluessel,))
+        ende = bisect.bisect_left(self._sortiert, (schluessel + "\U0010ffff",), anfang)
+        return anfang, ende
+
+    def name(self, position):
+        return self._sortiert[position][1]
+
+
+class Spielerliste(tk.Frame):
+    """Liste der Spieler mit Scrollbar, von der nur die sichtbaren Zeilen als Labels existieren.
+
+    Mit filtern() werden nur die Spieler angezeigt, deren Name mit dem Text beginnt. Beim Anklicken einer
+    Zeile wird auswahl_callback mit dem Spielernamen aufgerufen, der ausgewählte Name steht in ausgewaehlt.
+    """
+
+    def __init__(self, master, spieler, auswahl_callback=None, zeilen=10, breite=30):
+        super().__init__(master, borderwidth=1, relief="sunken", bg="white")
+        self.index = Namensindex(spieler.items())
+        self.auswahl_callback = auswahl_callback
+        self.ausgewaehlt = None
+        self.praefix = ""
+        self.anfang, self.ende = self.index.bereich()
+        self.oben = 0 #erste sichtbare Zeile innerhalb des gefilterten Bereichs
+
+        self.grid_columnconfigure(0, weight=1)
+        self.labels = []
+        for zeile in range(zeilen):
+            label = tk.Label(self, anchor="w", width=breite, bg="white")
+            label.grid(row=zeile, column=0, sticky="ew")
+            label.bind("<Button-1>", lambda event, zeile=zeile: self.angeklickt(zeile))
+            self.mausrad_binden(label)
+            self.labels.append(label)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.scrollen)
+        self.scrollbar.grid(row=0, column=1, rowspan=zeilen, sticky="ns")
+        self.mausrad_binden(self)
+        self.zeichnen()
+
+    def mausrad_binden(self, widget):
+        widget.bind("<MouseWheel>", lambda event: self.verschieben(-1 if event.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda event: self.verschieben(-1))
+        widget.bind("<Button-5>", lambda event: self.verschieben(1))
+
+    @property
+    def anzahl(self):
+        """Anzahl der Spieler, die zum Filter passen"""
+        return self.ende - self.anfang
+
+    def zeichnen(self):
+        """schreibt die sichtbaren Spieler in die Labels und stellt die Scrollbar ein"""
+        self.oben = max(0, min(self.oben, self.anzahl - len(self.labels)))
+        for zeile, label in enumerate(self.labels):
+            position = self.anfang + self.oben + zeile
+            if position < self.ende:
+                name = self.index.name(position)
+                label.config(text=f"{name}: {self.index.punkte[name]} Punkte",
+                             bg="lightblue" if name == self.ausgewaehlt else "white")
+            else:
+                label.config(text="", bg="white")
+        if self.anzahl:
+            self.scrollbar.set(self.oben / self.anzahl, min(1.0, (self.oben + len(self.labels)) / self.anzahl))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def sichtbar(self, position):
+        """True, wenn die Position in der sortierten Liste gerade angezeigt wird"""
+        return self.anfang + self.oben <= position < self.anfang + self.oben + len(self.labels)
+
+    def scrollen(self, befehl, wert, einheit=None):
+        """Callback der Scrollbar ("moveto", Anteil) oder ("scroll", Anzahl, "units"/"pages")"""
+        if befehl == "moveto":
+            self.oben = int(float(wert) * self.anzahl)
+            self.zeichnen()
+        elif befehl == "scroll":
+            schritt = len(self.labels) if einheit == "pages" else 1
+            self.verschieben(int(wert) * schritt)
+
+    def verschieben(self, zeilen):
+        self.oben += zeilen
+        self.zeichnen()
+
+    def angeklickt(self, zeile):
+        position = self.anfang + self.oben + zeile
+        if position >= self.ende:
+            return
+        self.ausgewaehlt = self.index.name(position)
+        self.zeichnen()
+        if self.auswahl_callback is not None:
+            self.auswahl_callback(self.ausgewaehlt)
+
+    def filtern(self, praefix):
+        """zeigt nur noch die Spieler, deren Name mit praefix beginnt"""
+        if praefix == self.praefix:
+            return
+        self.praefix = praefix
+        self.anfang, self.ende = self.index.bereich(praefix)
+        self.oben = 0
+        self.zeichnen()
+
+    def eintragen(self, name, punkte):
+        """neuer Spieler oder neuer Punktestand - neu gezeichnet wird nur, wenn sich die Anzeige ändert"""
+        if not self.index.setzen(name, punkte):
+            if self.sichtbar(self.index.position(name)):
+                self.zeichnen()
+            return
+        self.anfang, self.ende = self.index.bereich(self.praefix)
+        self.zeichnen()
+
+    def entfernen(self, name):
+        """löscht einen Spieler aus der Liste"""
+        if name not in self.index:
+            return
+        self.index.entfernen(name)
+        if name == self.ausgewaehlt:
+            self.ausgewaehlt = None
+        self.anfang, self.ende = self.index.bereich(self.praefix)
+        self.zeichnen()
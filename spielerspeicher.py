@@ -0,0 +1,228 @@
+"""
+Spieler und Punktestände in einer SQLite-Datenbank.
+
+Bisher stand alles in spieler_score.json und wurde nur beim Beenden mit Quit komplett neu geschrieben - bei einem
+Absturz war die ganze Sitzung verloren und zwei gleichzeitig laufende Spiele haben sich gegenseitig überschrieben.
+Hier wird jeder Punkt sofort als eigene kleine Transaktion gespeichert (UPDATE punkte = punkte + 1), das ist auch
+bei mehreren Spielinstanzen sicher. Die Datenbank läuft im WAL-Modus, damit Lesen und Schreiben sich nicht blockieren.
+
+Beim ersten Start wird die alte json-Datei einmalig übernommen.
+
+Wer beim json-Format bleiben will, nimmt JsonSpeicher: Die Änderungen landen zuerst im Speicher, ein
+Hintergrund-Thread sammelt sie kurz und schreibt die Datei dann atomar (temporäre Datei + rename), ohne die
+Tk-Hauptschleife aufzuhalten. Welcher Speicher benutzt wird, entscheidet oeffnen().
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+
+#Wartezeit in Sekunden, in der weitere Änderungen gesammelt werden, bevor die json-Datei geschrieben wird
+SCHREIBVERZOEGERUNG = 0.5
+#so lange wartet schliessen() höchstens auf den letzten Schreibvorgang
+SCHLIESSEN_TIMEOUT = 2.0
+
+
+def oeffnen(art='sqlite', pfad='./spieler_score.db', json_pfad='./spieler_score.json'):
+    """öffnet den Spielerspeicher: art "sqlite" (Datenbank, alte json-Datei wird übernommen) oder "json" """
+    if art == 'sqlite':
+        return SpielerSpeicher(pfad, json_pfad)
+    if art == 'json':
+        return JsonSpeicher(json_pfad)
+    raise ValueError(f"Unbekannter Spielerspeicher: {art}")
+
+
+class SpielerSpeicher(MutableMapping):
+    """Verhält sich wie das frühere dict {Spielername: Punkte}, jede Änderung wird aber sofort gespeichert."""
+
+    def __init__(self, pfad='./spieler_score.db', json_pfad='./spieler_score.json'):
+        self.pfad = pfad
+        #isolation_level=None: jede Anweisung ist ihre eigene Transaktion, außer es wird explizit BEGIN benutzt
+        self.verbindung = sqlite3.connect(pfad, timeout=10, isolation_level=None)
+        self.verbindung.execute("PRAGMA journal_mode=WAL")
+        self.verbindung.execute("PRAGMA synchronous=NORMAL")
+        self.verbindung.execute("CREATE TABLE IF NOT EXISTS spieler ("
+                                "id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, punkte INTEGER NOT NULL DEFAULT 0)")
+        self.verbindung.execute("CREATE TABLE IF NOT EXISTS meta (schluessel TEXT PRIMARY KEY, wert TEXT)")
+        if json_pfad is not None:
+            self.json_importieren(json_pfad)
+
+    def json_importieren(self, json_pfad):
+        """übernimmt die Spieler aus der alten json-Datei, aber nur ein einziges Mal pro Datenbank"""
+        if not os.path.exists(json_pfad):
+            return
+        #BEGIN IMMEDIATE sperrt die Datenbank zum Schreiben, damit zwei gleichzeitig startende Spiele
+        #nicht beide importieren
+        self.verbindung.execute("BEGIN IMMEDIATE")
+        try:
+            erledigt = self.verbindung.execute("SELECT wert FROM meta WHERE schluessel = 'json_importiert'").fetchone()
+            if erledigt is None:
+                with open(json_pfad, 'r') as spieler_logbuch:
+                    spieler = json.load(spieler_logbuch)
+                self.verbindung.executemany("INSERT OR IGNORE INTO spieler (name, punkte) VALUES (?, ?)",
+                                            spieler.items())
+                self.verbindung.execute("INSERT INTO meta (schluessel, wert) VALUES ('json_importiert', ?)",
+                                        (os.path.abspath(json_pfad),))
+            self.verbindung.execute("COMMIT")
+        except BaseException:
+            self.verbindung.execute("ROLLBACK")
+            raise
+
+    def __getitem__(self, name):
+        zeile = self.verbindung.execute("SELECT punkte FROM spieler WHERE name = ?", (name,)).fetchone()
+        if zeile is None:
+            raise KeyError(name)
+        return zeile[0]
+
+    def __setitem__(self, name, punkte):
+        self.verbindung.execute("INSERT INTO spieler (name, punkte) VALUES (?, ?) "
+                                "ON CONFLICT(name) DO UPDATE SET punkte = excluded.punkte", (name, punkte))
+
+    def __delitem__(self, name):
+        if self.verbindung.execute("DELETE FROM spieler WHERE name = ?", (name,)).rowcount == 0:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return self.verbindung.execute("SELECT 1 FROM spieler WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        #in der Reihenfolge, in der die Spieler angelegt wurden - wie beim dict
+        for (name,) in self.verbindung.execute("SELECT name FROM spieler ORDER BY id"):
+            yield name
+
+    def __len__(self):
+        return self.verbindung.execute("SELECT COUNT(*) FROM spieler").fetchone()[0]
+
+    def items(self):
+        """alle (Name, Punkte) mit einer einzigen Abfrage statt einer pro Spieler"""
+        return self.verbindung.execute("SELECT name, punkte FROM spieler ORDER BY id").fetchall()
+
+    def punkt_hinzufuegen(self, name, anzahl=1):
+        """Zählt Punkte direkt in der Datenbank hoch, Punkte anderer Spielinstanzen gehen dabei nicht verloren.
+        Gibt den neuen Punktestand zurück."""
+        self.verbindung.execute("BEGIN IMMEDIATE")
+        try:
+            self.verbindung.execute("INSERT INTO spieler (name, punkte) VALUES (?, ?) "
+                                    "ON CONFLICT(name) DO UPDATE SET punkte = punkte + excluded.punkte", (name, anzahl))
+            punkte = self.verbindung.execute("SELECT punkte FROM spieler WHERE name = ?", (name,)).fetchone()[0]
+            self.verbindung.execute("COMMIT")
+        except BaseException:
+            self.verbindung.execute("ROLLBACK")
+            raise
+        return punkte
+
+    def schliessen(self):
+        self.verbindung.close()
+
+
+class JsonSpeicher(MutableMapping):
+    """Die Spieler im alten json-Format, gespeichert von einem Hintergrund-Thread.
+
+    Jede Änderung (Punkt, Zurücksetzen, Löschen) ändert nur das dict im Speicher und weckt den Schreib-Thread.
+    Der wartet SCHREIBVERZOEGERUNG Sekunden, damit viele schnelle Punkte zu einem einzigen Schreibvorgang
+    zusammengefasst werden, und schreibt dann eine Kopie des dicts. Weil die Datei erst in eine temporäre
+    Datei geschrieben und dann per os.replace umbenannt wird, liegt auch nach einem Absturz immer eine
+    vollständige json-Datei (alter oder neuer Stand) auf der Platte.
+    """
+
+    def __init__(self, json_pfad='./spieler_score.json', verzoegerung=SCHREIBVERZOEGERUNG):
+        self.json_pfad = json_pfad
+        self.verzoegerung = verzoegerung
+        try:
+            with open(json_pfad, 'r') as spieler_logbuch:
+                self._spieler = json.load(spieler_logbuch)
+        except FileNotFoundError:
+            self._spieler = {}
+        self._bedingung = threading.Condition()
+        self._geaendert = False
+        self._beenden = False
+        self.schreibvorgaenge = 0
+        self._schreiber = threading.Thread(target=self._schreiben_schleife, name="JsonSpeicher", daemon=True)
+        self._schreiber.start()
+
+    def _aenderung_melden(self):
+        #muss mit gehaltener Bedingung aufgerufen werden
+        self._geaendert = True
+        self._bedingung.notify()
+
+    def _schreiben_schleife(self):
+        while True:
+            with self._bedingung:
+                while not self._geaendert and not self._beenden:
+                    self._bedingung.wait()
+                if not self._beenden:
+                    #weitere Änderungen sammeln, schliessen() weckt den Thread vorzeitig
+                    self._bedingung.wait_for(lambda: self._beenden, timeout=self.verzoegerung)
+                if not self._geaendert:
+                    return
+                stand = dict(self._spieler)
+                self._geaendert = False
+                beenden = self._beenden
+            try:
+                self._datei_schreiben(stand)
+            except OSError as fehler:
+                print("Spielerliste konnte nicht gespeichert werden:", fehler)
+                with self._bedingung:
+                    self._geaendert = True
+                time.sleep(self.verzoegerung)
+            if beenden:
+                return
+
+    def _datei_schreiben(self, stand):
+        temp = f"{self.json_pfad}.{os.getpid()}.tmp"
+        with open(temp, 'w') as spieler_logbuch:
+            json.dump(stand, spieler_logbuch)
+            spieler_logbuch.flush()
+            os.fsync(spieler_logbuch.fileno())
+        os.replace(temp, self.json_pfad)
+        self.schreibvorgaenge += 1
+
+    def __getitem__(self, name):
+        with self._bedingung:
+            return self._spieler[name]
+
+    def __setitem__(self, name, punkte):
+        with self._bedingung:
+            self._spieler[name] = punkte
+            self._aenderung_melden()
+
+    def __delitem__(self, name):
+        with self._bedingung:
+            del self._spieler[name]
+            self._aenderung_melden()
+
+    def __contains__(self, name):
+        with self._bedingung:
+            return name in self._spieler
+
+    def __iter__(self):
+        with self._bedingung:
+            return iter(list(self._spieler))
+
+    def __len__(self):
+        with self._bedingung:
+            return len(self._spieler)
+
+    def items(self):
+        with self._bedingung:
+            return list(self._spieler.items())
+
+    def punkt_hinzufuegen(self, name, anzahl=1):
+        """zählt Punkte im Speicher hoch, geschrieben wird im Hintergrund; gibt den neuen Punktestand zurück"""
+        with self._bedingung:
+            punkte = self._spieler.get(name, 0) + anzahl
+            self._spieler[name] = punkte
+            self._aenderung_melden()
+        return punkte
+
+    def schliessen(self, timeout=SCHLIESSEN_TIMEOUT):
+        """schreibt ausstehende Änderungen sofort und wartet höchstens timeout Sekunden darauf.
+        Gibt False zurück, wenn der letzte Schreibvorgang in der Zeit nicht fertig wurde."""
+        with self._bedingung:
+            self._beenden = True
+            self._bedingung.notify()
+        self._schreiber.join(timeout)
+        return not self._schreiber.is_alive()
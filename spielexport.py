@@ -0,0 +1,193 @@
+"""
+Gespeicherte Spiele als Auswertungsbilder (PNG oder SVG) exportieren, ohne Bildschirm.
+
+Aufruf:
+    python spielexport.py                                alle Spiele aus spiele.jsonl als PNG nach export/
+    python spielexport.py --format svg                   als SVG
+    python spielexport.py --karte cartopy --prozesse 4   mit den cartopy-Kartendaten, vier Arbeitsprozesse
+    python spielexport.py andere.jsonl --ordner bilder   andere Spieldatei, anderer Zielordner
+
+Die Auswertung im Spiel ist ein Tk-Fenster mit einer Tabelle, die Städte werden auf der laufenden Karte
+eingezeichnet - danach ist sie weg. Jetzt hängt Geoquiz.py jedes beendete Spiel als eine Zeile json an
+spiele.jsonl an (spiel_als_dict, speichern). Dieses Skript zeichnet daraus pro Spiel ein Bild: Karte mit den
+Städten (grün richtig, rot falsch), allen Klicks und den Großkreisbögen von der Stadt zu jedem Klick, darunter
+die Tabelle der Auswertung.
+
+Gezeichnet wird mit dem Agg-Backend in einem ProcessPoolExecutor: jeder Arbeitsprozess baut seine Figur samt
+Karte nur einmal (Auswertungsbild) und leert für jedes weitere Spiel nur die Ebenen des Renderers. So lassen
+sich hunderte Spiele auf allen Kernen in Sekunden neu zeichnen, das Spiel selbst wird dabei nicht blockiert.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SPIELE_DATEI = './spiele.jsonl'
+EXPORT_ORDNER = './export'
+#Renderer für den Export (siehe renderer.py), "agg" zeichnet das Kartenbild aus dem Repo und braucht kein cartopy
+EXPORT_KARTE = "agg"
+BILDGROESSE = (12, 10)
+#Lage der Karte in der Figur (links, unten, Breite, Höhe), darunter steht die Tabelle
+KARTENBEREICH = (0.03, 0.36, 0.94, 0.58)
+#diese Felder einer Stadt werden mit dem Spiel gespeichert
+STADTFELDER = ("Hauptstadt", "Land", "Breitengrad", "Längengrad")
+#Spalten der Tabelle unter der Karte: (Überschrift, linker Rand in Figurkoordinaten)
+TABELLENSPALTEN = (("Runde", 0.05), ("Hauptstadt", 0.14), ("Land", 0.42), ("Ergebnis", 0.75))
+#Grundlinie der Überschriften und Abstand der Zeilen in Figurkoordinaten
+TABELLE_OBEN = 0.31
+ZEILENABSTAND = 0.022
+
+
+def spiel_als_dict(spiel, spieler=""):
+    """ein beendetes Spiel (spiellogik.Spielsitzung) als json-taugliches dict zum Speichern"""
+    runden = []
+    for (runde, stadt, ergebnis), klicks in zip(spiel.auswertung(), spiel.runden_klicks):
+        runden.append({"stadt": {feld: stadt[feld] for feld in STADTFELDER},
+                       "ergebnis": bool(ergebnis),
+                       "klicks": [[float(breite), float(laenge)] for breite, laenge in klicks]})
+    return {"spieler": spieler, "zeit": datetime.datetime.now().isoformat(timespec="seconds"),
+            "schwierigkeitsgrad": spiel.schwierigkeitsgrad, "runden": runden}
+
+
+def speichern(spiel, pfad=SPIELE_DATEI):
+    """hängt ein Spiel (dict aus spiel_als_dict) als eine Zeile an die Spieldatei an"""
+    with open(pfad, "a", encoding="utf-8") as datei:
+        datei.write(json.dumps(spiel, ensure_ascii=False) + "\n")
+
+
+def laden(pfad=SPIELE_DATEI):
+    """alle gespeicherten Spiele; eine unvollständige Zeile (z.B. nach einem Absturz) wird übersprungen"""
+    spiele = []
+    with open(pfad, "r", encoding="utf-8") as datei:
+        for nummer, zeile in enumerate(datei, start=1):
+            if not zeile.strip():
+                continue
+            try:
+                spiele.append(json.loads(zeile))
+            except ValueError:
+                print(f"{pfad}, Zeile {nummer}: kein gültiges Spiel, übersprungen")
+    return spiele
+
+
+def dateiname(nummer, spiel, format="png"):
+    """Dateiname für das Bild eines Spiels: laufende Nummer und Spielername"""
+    spieler = re.sub(r"[^\w-]+", "_", spiel.get("spieler") or "").strip("_") or "spiel"
+    return f"{nummer:04d}_{spieler}.{format}"
+
+
+class Auswertungsbild:
+    """Figur für den Export: oben die Karte eines Renderers, darüber der Titel, darunter die Tabelle.
+
+    Die Figur wird einmal aufgebaut, zeichnen() leert nur die Ebenen des Renderers und setzt die Texte neu.
+    Die Tabelle besteht aus einem Text pro Zelle statt einer mit Leerzeichen ausgerichteten Tabelle wie im
+    Auswertungsfenster: Agg kostet jedes Zeichen, auch ein Leerzeichen, das halbiert die Zeit für ein Bild.
+    """
+
+    def __init__(self, karte=EXPORT_KARTE, figsize=BILDGROESSE):
+        import matplotlib
+        matplotlib.use("Agg")
+        import renderer
+        self.renderer = renderer.erstellen(karte, figsize=figsize)
+        self.renderer.offscreen()
+        self.renderer.basiskarte_zeichnen()
+        #ohne Blitting: die Ebenen sollen in savefig mit drin sein
+        self.renderer.nicht_animiert()
+        self.renderer.ax.set_position(KARTENBEREICH)
+        self.renderer.ansicht_setzen(*renderer.WELTANSICHT)
+        fig = self.renderer.fig
+        self.titel = fig.text(0.5, 0.98, "", ha="center", va="top", fontsize=14)
+        self.zellen = [] #pro Tabellenzeile die Texte der Spalten, werden bei Bedarf angelegt
+
+    def zeichnen(self, spiel):
+        """trägt ein gespeichertes Spiel ein (Städte, Klicks, Großkreisbögen, Titel und Tabelle)"""
+        karte = self.renderer
+        karte.ebenen_leeren()
+        runden = spiel["runden"]
+        for runde in runden:
+            stadt = runde["stadt"]
+            karte.marker(stadt["Längengrad"], stadt["Breitengrad"], "richtig" if runde["ergebnis"] else "falsch")
+        #alle Klicks aller Runden mit ihrer Stadt, die Bögen werden zusammen berechnet
+        paare = [(runde["stadt"]["Breitengrad"], runde["stadt"]["Längengrad"], breite, laenge)
+                 for runde in runden for breite, laenge in runde["klicks"]]
+        if paare:
+            breiten1, laengen1, breiten2, laengen2 = np.array(paare).T
+            karte.marker(laengen2, breiten2, "klicks")
+            karte.grosskreise(breiten1, laengen1, breiten2, laengen2)
+        richtig = sum(runde["ergebnis"] for runde in runden)
+        self.titel.set_text(f"{spiel.get('spieler') or 'Unbekannt'} - {spiel.get('zeit', '')} - "
+                            f"{spiel.get('schwierigkeitsgrad', '?')} km - {richtig} von {len(runden)} richtig")
+        zeilen = [[ueberschrift for ueberschrift, _ in TABELLENSPALTEN]]
+        zeilen += [(str(nummer), runde["stadt"]["Hauptstadt"], runde["stadt"]["Land"],
+                    "Richtig" if runde["ergebnis"] else "Falsch") for nummer, runde in enumerate(runden, start=1)]
+        for nummer in range(max(len(zeilen), len(self.zellen))):
+            werte = zeilen[nummer] if nummer < len(zeilen) else [""] * len(TABELLENSPALTEN)
+            for text, wert in zip(self._tabellenzeile(nummer), werte):
+                text.set_text(wert)
+
+    def _tabellenzeile(self, nummer):
+        """die Texte einer Tabellenzeile, noch fehlende Zeilen werden angelegt"""
+        while len(self.zellen) <= nummer:
+            hoehe = TABELLE_OBEN - len(self.zellen) * ZEILENABSTAND
+            self.zellen.append([self.renderer.fig.text(links, hoehe, "", ha="left", va="baseline", fontsize=10)
+                                for _, links in TABELLENSPALTEN])
+        return self.zellen[nummer]
+
+    def speichern(self, spiel, pfad):
+        """zeichnet ein Spiel und speichert das Bild, das Format ergibt sich aus der Dateiendung"""
+        self.zeichnen(spiel)
+        self.renderer.fig.savefig(pfad)
+        return pfad
+
+
+#pro Arbeitsprozess ein Auswertungsbild, das für alle Spiele des Prozesses wiederverwendet wird
+_bild = None
+
+
+def _arbeiter_starten(karte):
+    global _bild
+    _bild = Auswertungsbild(karte)
+
+
+def _spiel_exportieren(auftrag):
+    spiel, pfad = auftrag
+    return _bild.speichern(spiel, pfad)
+
+
+def exportieren(spiele, ordner=EXPORT_ORDNER, format="png", karte=EXPORT_KARTE, prozesse=None):
+    """zeichnet alle Spiele in Arbeitsprozessen (höchstens prozesse, sonst einer pro Kern) als Bilder in
+    ordner und gibt die Pfade zurück"""
+    os.makedirs(ordner, exist_ok=True)
+    auftraege = [(spiel, os.path.join(ordner, dateiname(nummer, spiel, format)))
+                 for nummer, spiel in enumerate(spiele, start=1)]
+    if not auftraege:
+        return []
+    prozesse = min(prozesse or os.cpu_count() or 1, len(auftraege))
+    #größere Pakete sparen die Übertragung einzelner Aufträge, ein paar pro Prozess gleichen die Last aus
+    paketgroesse = max(1, len(auftraege) // (4 * prozesse))
+    with ProcessPoolExecutor(max_workers=prozesse, initializer=_arbeiter_starten, initargs=(karte,)) as pool:
+        return list(pool.map(_spiel_exportieren, auftraege, chunksize=paketgroesse))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gespeicherte Geoquiz-Spiele als Auswertungsbilder exportieren")
+    parser.add_argument("spiele", nargs="?", default=SPIELE_DATEI, help="Spieldatei (eine Zeile json pro Spiel)")
+    parser.add_argument("--ordner", default=EXPORT_ORDNER, help="Zielordner")
+    parser.add_argument("--format", default="png", choices=["png", "svg"])
+    parser.add_argument("--karte", default=EXPORT_KARTE, choices=["agg", "raster", "cartopy"])
+    parser.add_argument("--prozesse", type=int, default=None, help="Zahl der Arbeitsprozesse (Standard: alle Kerne)")
+    argumente = parser.parse_args()
+
+    spiele = laden(argumente.spiele)
+    start = time.perf_counter()
+    pfade = exportieren(spiele, argumente.ordner, argumente.format, argumente.karte, argumente.prozesse)
+    print(f"{len(pfade)} Spiele nach {argumente.ordner} exportiert ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
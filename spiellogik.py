@@ -0,0 +1,261 @@
+"""
+Die Spielregeln des Geoquiz ohne Tkinter und matplotlib.
+
+Eine Spielsitzung hält Runde, Versuche, Zielstadt, Ergebnisse und Punktestand. Die Fenster (Hauptfenster,
+Hauptstadtplotter) sind nur noch Ansichten: Sie melden Klicks an die Sitzung und abonnieren deren
+Ereignisse, um Labels und Karte zu aktualisieren. Ohne Abonnenten läuft eine Sitzung komplett ohne
+Bildschirm, so können Spiele simuliert und viele Sitzungen in einem Prozess gehalten werden.
+
+Ereignisse (Name: Schlüsselwortargumente für die Abonnenten):
+    spiel_gestartet: schwierigkeitsgrad         - neues_spiel() wurde aufgerufen, gleich kommt Runde 1
+    neue_runde:      stadt                      - eine neue Zielstadt wurde ausgewählt
+    stapel_leer:     durchgaenge                - alle Städte waren dran, der Stapel wurde neu aufgefüllt
+    klick:           breite, laenge, stadt, abstand - jeder ausgewertete Klick, stadt ist datensatz_index()
+    daneben:         abstand                    - Klick außerhalb des Schwierigkeitsgrads, noch Versuche übrig
+    treffer:         abstand                    - Klick innerhalb des Schwierigkeitsgrads, Runde gewonnen
+    verloren:        abstand                    - letzter Versuch daneben, Runde verloren
+    punkt:           punkte                     - der Spieler hat einen Punkt bekommen, punkte zählt nur das
+                                                  aktuelle Spiel (neues_spiel() setzt sie auf 0)
+    runde_beendet:   runde, gewonnen            - Runde vorbei, als Nächstes kommt naechste_runde()
+    spiel_beendet:   ergebnisse                 - alle Runden gespielt, Auswertung kann angezeigt werden
+"""
+
+import random
+
+import geodaesie
+
+RUNDEN_PRO_SPIEL = 10
+VERSUCHE_PRO_RUNDE = 3
+
+
+class Kartenstapel:
+    """Zieht Indizes ohne Zurücklegen in konstanter Zeit.
+
+    Die Indizes liegen in einer Liste, gezogen wird eine zufällige Position aus dem noch nicht gezogenen Teil,
+    die mit dessen letztem Element getauscht wird (Fisher-Yates Schritt für Schritt). So gibt es keine
+    Wiederholungsschleife und keine Suche in einer Liste. Ist der Stapel leer, wird er ohne Kopieren wieder
+    aufgefüllt und durchgaenge hochgezählt.
+    """
+    def __init__(self, anzahl, rng):
+        if anzahl < 1:
+            raise ValueError("Der Stapel braucht mindestens eine Stadt")
+        self.rng = rng
+        self._karten = list(range(anzahl))
+        self._rest = anzahl
+        self.durchgaenge = 0
+
+    def __len__(self):
+        """Anzahl der Karten, die noch gezogen werden können, bevor neu aufgefüllt wird"""
+        return self._rest
+
+    @property
+    def leer(self):
+        return self._rest == 0
+
+    def auffuellen(self):
+        """legt alle gezogenen Karten zurück in den Stapel"""
+        self._rest = len(self._karten)
+        self.durchgaenge += 1
+
+    def ziehen(self):
+        """zieht eine zufällige Karte, ein leerer Stapel wird vorher aufgefüllt"""
+        if self._rest == 0:
+            self.auffuellen()
+        karten = self._karten
+        i = self.rng.randrange(self._rest)
+        self._rest -= 1
+        karten[i], karten[self._rest] = karten[self._rest], karten[i]
+        return karten[self._rest]
+
+
+class Spielsitzung:
+    """Zustand und Regeln eines Spiels für einen Spieler.
+
+    Die Hauptstädte werden als Liste von dicts (wie in der json-Datei) übergeben, der Schwierigkeitsgrad
+    ist der maximale Abstand in km zwischen Klick und Stadt, der noch als Treffer zählt.
+    Mit seed (oder einem eigenen random.Random als rng) sind die Spiele reproduzierbar.
+    Mit trefferzonen (trefferzonen.Trefferzonen des vollständigen Datensatzes) werden Klicks über die
+    vorberechneten Masken entschieden und die Toleranzringe nicht jedes Mal neu berechnet.
+    """
+    def __init__(self, hauptstaedte=(), schwierigkeitsgrad=500, rng=None, seed=None, trefferzonen=None):
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.schwierigkeitsgrad = schwierigkeitsgrad
+        self.trefferzonen = trefferzonen
+        self._abonnenten = {}
+        self.hauptstaedte_setzen(hauptstaedte)
+
+        #Spielvariablen
+        self.runde = 0
+        self.versuche = VERSUCHE_PRO_RUNDE
+        self.index = -1
+        self.stadt = None
+        self.gewonnen = False
+        self.verloren = False
+        self.punkte = 0
+
+        #Auswertungslisten
+        self.abgehakt = []
+        self.ergebnisse = []
+        self.runden_klicks = [] #pro Runde die Liste der Klicks als (Breite, Länge), der letzte hat entschieden
+        self.klick_liste = []
+
+    def hauptstaedte_setzen(self, hauptstaedte):
+        """setzt die Städte, aus denen gespielt wird (z.B. nach Kontinenten gefiltert).
+
+        Das können datensatz.Hauptstadtdaten sein, deren Koordinaten schon vorberechnet sind,
+        oder eine Liste von dicts wie in der json-Datei.
+        """
+        self._auswahl = hauptstaedte
+        koordinaten = getattr(hauptstaedte, "koordinaten", None)
+        if koordinaten is not None:
+            self.hauptstaedte = hauptstaedte
+            self.koordinaten = koordinaten
+        else:
+            self.hauptstaedte = list(hauptstaedte)
+            self.koordinaten = geodaesie.Koordinaten.aus_hauptstaedten(self.hauptstaedte)
+        #Zeilen im vollständigen Datensatz, nur damit lassen sich die Trefferzonen nachschlagen
+        self.datensatz_indizes = getattr(hauptstaedte, "indizes", None)
+        #Städte, die schon dran waren, kommen erst wieder, wenn alle anderen auch dran waren
+        self.stapel = Kartenstapel(len(self.hauptstaedte), self.rng) if len(self.hauptstaedte) else None
+
+    def gleiche_auswahl(self, hauptstaedte):
+        """True, wenn hauptstaedte dieselben Städte sind, aus denen schon gespielt wird (dasselbe Objekt oder
+        dieselben Zeilen des Datensatzes)"""
+        if hauptstaedte is self._auswahl:
+            return True
+        indizes = getattr(hauptstaedte, "indizes", None)
+        if indizes is None or self.datensatz_indizes is None or len(indizes) != len(self.datensatz_indizes):
+            return False
+        return bool((indizes == self.datensatz_indizes).all())
+
+    def abonnieren(self, ereignis, callback):
+        """registriert einen Callback für ein Ereignis, die Daten kommen als Schlüsselwortargumente"""
+        self._abonnenten.setdefault(ereignis, []).append(callback)
+
+    def _melden(self, ereignis, **daten):
+        for callback in self._abonnenten.get(ereignis, ()):
+            callback(**daten)
+
+    @property
+    def runde_vorbei(self):
+        """True, solange die Runde entschieden ist und noch keine neue Stadt gewählt wurde"""
+        return self.gewonnen or self.verloren
+
+    def neues_spiel(self, hauptstaedte=None):
+        """setzt alle Spielstände zurück und beginnt mit Runde 1.
+        Bleibt die Auswahl der Städte gleich, bleibt auch der Stapel: die Städte wiederholen sich erst,
+        wenn alle dran waren, auch über mehrere Spiele hinweg."""
+        if hauptstaedte is not None and not self.gleiche_auswahl(hauptstaedte):
+            self.hauptstaedte_setzen(hauptstaedte)
+        self.abgehakt.clear()
+        self.ergebnisse.clear()
+        self.runden_klicks.clear()
+        self.runde = 0
+        self.punkte = 0
+        self._melden("spiel_gestartet", schwierigkeitsgrad=self.schwierigkeitsgrad)
+        self.naechste_runde()
+
+    def random_capital(self):
+        """Zieht eine zufällige Stadt, die noch nicht dran war, vom Stapel.
+        Waren alle Städte dran (z.B. bei einem kleinen Kontinent), wird der Stapel neu aufgefüllt
+        und True zurückgegeben."""
+        if self.stapel is None:
+            raise ValueError("Es sind keine Hauptstädte ausgewählt")
+        aufgefuellt = self.stapel.leer
+        if aufgefuellt:
+            self.stapel.auffuellen()
+        self.index = self.stapel.ziehen()
+        self.stadt = self.hauptstaedte[self.index]
+        return aufgefuellt
+
+    def naechste_runde(self):
+        """beginnt die nächste Runde mit einer neuen Stadt und wieder allen Versuchen"""
+        self.runde += 1
+        self.versuche = VERSUCHE_PRO_RUNDE
+        self.gewonnen = False
+        self.verloren = False
+        self.klick_liste.clear()
+        aufgefuellt = self.random_capital()
+        self._melden("neue_runde", stadt=self.stadt)
+        if aufgefuellt:
+            self._melden("stapel_leer", durchgaenge=self.stapel.durchgaenge)
+
+    def datensatz_index(self):
+        """Zeile der aktuellen Stadt im vollständigen Datensatz (bei einer Liste von dicts ihr Index darin)"""
+        if self.datensatz_indizes is None:
+            return self.index
+        return int(self.datensatz_indizes[self.index])
+
+    def _zonen_index(self):
+        """Index der aktuellen Stadt in den Trefferzonen, oder None, wenn es für sie keine gibt"""
+        if self.trefferzonen is None or self.datensatz_indizes is None or self.schwierigkeitsgrad not in self.trefferzonen:
+            return None
+        return self.datensatz_index()
+
+    def getroffen(self, breite, laenge, abstand):
+        """True, wenn der Klick nah genug an der Stadt ist - über die Trefferzonen, sonst über den Abstand"""
+        zone = self._zonen_index()
+        if zone is None:
+            return abstand <= self.schwierigkeitsgrad
+        return self.trefferzonen.treffer(zone, self.schwierigkeitsgrad, breite, laenge)
+
+    def toleranzring(self, breite=None, laenge=None):
+        """Kreis mit dem Schwierigkeitsgrad als Radius als (Breiten, Längen): um die aktuelle Stadt
+        (aus den Trefferzonen, wenn vorhanden) oder um den angegebenen Punkt"""
+        if breite is None:
+            zone = self._zonen_index()
+            if zone is not None:
+                return self.trefferzonen.ring(zone, self.schwierigkeitsgrad)
+            breite, laenge = self.koordinaten.breite[self.index], self.koordinaten.laenge[self.index]
+        return geodaesie.kreis(breite, laenge, self.schwierigkeitsgrad)
+
+    def klick(self, breite, laenge):
+        """Wertet einen Klick aus.
+
+        Gibt "treffer", "daneben" oder "verloren" zurück, oder None, wenn die Runde schon entschieden ist
+        und Klicks gesperrt sind.
+        """
+        if self.runde_vorbei or self.stadt is None:
+            return None
+        self.klick_liste.append((breite, laenge))
+        abstand = self.koordinaten.abstand_zu(self.index, breite, laenge)
+        self.versuche -= 1
+        self._melden("klick", breite=breite, laenge=laenge, stadt=self.datensatz_index(), abstand=abstand)
+
+        if self.getroffen(breite, laenge, abstand):
+            self.gewonnen = True
+            self.punkte += 1
+            self._melden("punkt", punkte=self.punkte)
+            self._melden("treffer", abstand=abstand)
+            ergebnis = "treffer"
+        elif self.versuche < 1:
+            self.verloren = True
+            self._melden("verloren", abstand=abstand)
+            ergebnis = "verloren"
+        else:
+            self._melden("daneben", abstand=abstand)
+            return "daneben"
+
+        self.abgehakt.append(self.index)
+        self.ergebnisse.append(self.gewonnen)
+        self.runden_klicks.append(list(self.klick_liste))
+        if self.runde >= RUNDEN_PRO_SPIEL:
+            self._melden("spiel_beendet", ergebnisse=list(zip(self.abgehakt, self.ergebnisse)))
+        else:
+            self._melden("runde_beendet", runde=self.runde, gewonnen=self.gewonnen)
+        return ergebnis
+
+    def auswertung(self):
+        """Liste der gespielten Runden als (Rundennummer, Stadt-dict, Ergebnis) mit Ergebnis True/False"""
+        return [(i + 1, self.hauptstaedte[index], ergebnis)
+                for i, (index, ergebnis) in enumerate(zip(self.abgehakt, self.ergebnisse))]
+
+    def auswertungstext(self):
+        """baut die Tabelle für das Auswertungsfenster"""
+        zeilen = ["\n\nRUNDE BEENDET - SPIELAUSWERTUNG\n",
+                  f"Runde #{' ':>2} {'Hauptstadt':<24} {'Land':<27} {'Ergebnis':<8}",
+                  f"{'-' * 8}-{'-' * 24}-{'-' * 27}-{'-' * 8}"]
+        for runde, stadt, ergebnis in self.auswertung():
+            zeilen.append(f"Runde {runde:>2}  {stadt['Hauptstadt']:<24} {stadt['Land']:<27} "
+                          f"{'Richtig' if ergebnis else 'Falsch'}")
+        return "\n".join(zeilen) + "\n"
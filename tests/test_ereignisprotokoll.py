@@ -0,0 +1,99 @@
+"""
+Tests für das Ereignisprotokoll: mehrere Spiele hängen gleichzeitig an dieselbe Datei an, ein halb
+geschriebener Block verdirbt die folgenden nicht und Spielernummern passen auch über 65535 hinaus.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import ereignisprotokoll
+
+VERZEICHNIS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#ein Spiel, das als Spieler sys.argv[2] 500 Klicks in Blöcken zu 7 Ereignissen anhängt
+SCHREIBER = """
+import sys
+import ereignisprotokoll
+protokoll = ereignisprotokoll.Ereignisprotokoll(sys.argv[1], blockgroesse=7)
+for i in range(500):
+    protokoll.eintragen("klick", sys.argv[2], 1, i, 10.0, 20.0, float(i), 1)
+protokoll.schliessen()
+"""
+
+
+class EreignisprotokollTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ordner = tempfile.TemporaryDirectory()
+        self.pfad = os.path.join(self.ordner.name, "ereignisse.bin")
+
+    def tearDown(self):
+        self.ordner.cleanup()
+
+    def klicks(self, protokoll, stadt, spieler="Anna"):
+        for i in stadt:
+            protokoll.eintragen("klick", spieler, 1, i, 10.0, 20.0, 100.0, 1)
+
+    def test_gleichzeitige_spiele(self):
+        """vier Spiele hängen gleichzeitig an: kein Ereignis geht verloren, kein Block wird zerrissen"""
+        namen = ["Anna", "Bob", "Anna", "Dora"]
+        prozesse = [subprocess.Popen([sys.executable, "-c", SCHREIBER, self.pfad, name], cwd=VERZEICHNIS)
+                    for name in namen]
+        for prozess in prozesse:
+            self.assertEqual(prozess.wait(timeout=60), 0)
+        daten = ereignisprotokoll.lesen(self.pfad, ["spieler", "stadt"])
+        self.assertEqual(len(daten["stadt"]), 2000)
+        spieler = ereignisprotokoll.spielernamen(self.pfad)
+        self.assertEqual(sorted(set(spieler)), ["Anna", "Bob", "Dora"])
+        gelesen = [spieler[nummer] for nummer in daten["spieler"]]
+        self.assertEqual(gelesen.count("Anna"), 1000)
+        self.assertEqual(gelesen.count("Dora"), 500)
+        self.assertEqual(sorted(daten["stadt"].tolist()), sorted(list(range(500)) * 4))
+
+    def test_halber_block(self):
+        """ein halb geschriebener Block wird übersprungen, danach angehängte Blöcke bleiben lesbar"""
+        protokoll = ereignisprotokoll.Ereignisprotokoll(self.pfad)
+        self.klicks(protokoll, range(3))
+        protokoll.schliessen()
+        groesse = os.path.getsize(self.pfad)
+        protokoll = ereignisprotokoll.Ereignisprotokoll(self.pfad)
+        self.klicks(protokoll, range(3, 6))
+        protokoll.schliessen()
+        #Absturz mitten im zweiten Block: nur sein Anfang steht in der Datei
+        with open(self.pfad, "r+b") as datei:
+            datei.truncate(groesse + ereignisprotokoll.BLOCKKOPF.size + 20)
+        protokoll = ereignisprotokoll.Ereignisprotokoll(self.pfad)
+        self.assertEqual(os.path.getsize(self.pfad), groesse + ereignisprotokoll.BLOCKKOPF.size + 20)
+        self.klicks(protokoll, range(6, 9))
+        protokoll.schliessen()
+        self.assertEqual(ereignisprotokoll.lesen(self.pfad, ["stadt"])["stadt"].tolist(), [0, 1, 2, 6, 7, 8])
+
+    def test_viele_spieler(self):
+        """Spielernummern über 65535 werden gespeichert, nicht abgeschnitten"""
+        with open(os.path.join(self.ordner.name, "ereignisse_spieler.jsonl"), "w", encoding="utf-8") as datei:
+            datei.writelines(json.dumps(f"Spieler{i}") + "\n" for i in range(70000))
+        protokoll = ereignisprotokoll.Ereignisprotokoll(self.pfad)
+        self.klicks(protokoll, [1], "Spieler69999")
+        self.klicks(protokoll, [2], "Neu")
+        protokoll.schliessen()
+        self.assertEqual(ereignisprotokoll.lesen(self.pfad, ["spieler"])["spieler"].tolist(), [69999, 70000])
+        self.assertEqual(ereignisprotokoll.spielernamen(self.pfad)[70000], "Neu")
+
+    def test_altes_format_wird_beiseitegelegt(self):
+        """eine Datei in einem anderen Format wird umbenannt statt überschrieben oder fortgeschrieben"""
+        with open(self.pfad, "wb") as datei:
+            datei.write(b"GQPROT01" + b"\x01" * 32)
+        protokoll = ereignisprotokoll.Ereignisprotokoll(self.pfad)
+        self.klicks(protokoll, [4])
+        protokoll.schliessen()
+        with open(self.pfad + ".alt", "rb") as datei:
+            self.assertEqual(datei.read(), b"GQPROT01" + b"\x01" * 32)
+        self.assertEqual(ereignisprotokoll.lesen(self.pfad, ["stadt"])["stadt"].tolist(), [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests für geodaesie: die NumPy-Abstände müssen mit der ursprünglichen Skalarformel übereinstimmen
+(benchmark.abstand_skalar, die alte Hauptstadtplotter.abstand_berechnen), und der Raumindex muss dieselben
+Städte finden wie der Vergleich mit allen.
+
+Aufruf (aus dem Projektordner): python -m unittest discover -s tests -t .
+"""
+
+import unittest
+
+import numpy as np
+
+import benchmark
+import geodaesie
+
+#Sonderfälle: gleiche Punkte, Gegenpunkte, Pole und Punkte beiderseits der Datumsgrenze
+SONDERFAELLE = [((52.52, 13.40), (52.52, 13.40)), ((0.0, 0.0), (0.0, 180.0)), ((90.0, 0.0), (-90.0, 0.0)),
+                ((89.9, -170.0), (89.9, 10.0)), ((-17.7, 178.4), (-13.8, -171.8)), ((64.1, -21.9), (-41.3, 174.8))]
+
+
+def zufallspunkte(anzahl, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-90, 90, anzahl), rng.uniform(-180, 180, anzahl)
+
+
+class HaversineTest(unittest.TestCase):
+
+    def test_wie_skalarformel(self):
+        """zufällige Punktpaare und Sonderfälle: haversine und abstand rechnen wie die alte Formel"""
+        breiten1, laengen1 = zufallspunkte(2000, 1)
+        breiten2, laengen2 = zufallspunkte(2000, 2)
+        paare = list(zip(zip(breiten1.tolist(), laengen1.tolist()), zip(breiten2.tolist(), laengen2.tolist())))
+        paare += SONDERFAELLE
+        erwartet = np.array([benchmark.abstand_skalar(p1, p2) for p1, p2 in paare])
+        p1, p2 = np.array(paare).transpose(1, 2, 0)
+        np.testing.assert_allclose(geodaesie.haversine(p1[0], p1[1], p2[0], p2[1]), erwartet, rtol=1e-9, atol=1e-6)
+        for (punkt1, punkt2), wert in zip(SONDERFAELLE, erwartet[-len(SONDERFAELLE):]):
+            self.assertAlmostEqual(geodaesie.abstand(punkt1, punkt2), wert, places=6)
+
+    def test_koordinaten(self):
+        """abstaende, abstaende_matrix und abstaende_paarweise stimmen mit der Skalarformel überein"""
+        breiten, laengen = zufallspunkte(50, 3)
+        klick_breiten, klick_laengen = zufallspunkte(20, 4)
+        koordinaten = geodaesie.Koordinaten(breiten, laengen)
+        erwartet = np.array([[benchmark.abstand_skalar((kb, kl), (b, l)) for b, l in zip(breiten, laengen)]
+                             for kb, kl in zip(klick_breiten, klick_laengen)])
+        np.testing.assert_allclose(koordinaten.abstaende_matrix(klick_breiten, klick_laengen), erwartet,
+                                   rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(koordinaten.abstaende(klick_breiten[0], klick_laengen[0]), erwartet[0],
+                                   rtol=1e-9, atol=1e-6)
+        auswahl = np.array([3, 7, 7, 49])
+        np.testing.assert_allclose(koordinaten.abstaende(klick_breiten[1], klick_laengen[1], auswahl),
+                                   erwartet[1, auswahl], rtol=1e-9, atol=1e-6)
+        ziele = np.arange(20) * 2
+        np.testing.assert_allclose(koordinaten.abstaende_paarweise(klick_breiten, klick_laengen, ziele),
+                                   erwartet[np.arange(20), ziele], rtol=1e-9, atol=1e-6)
+
+
+class RaumindexTest(unittest.TestCase):
+
+    def setUp(self):
+        #zufällige Städte, dazu Häufungen an der Datumsgrenze und um beide Pole
+        rng = np.random.default_rng(5)
+        breiten, laengen = zufallspunkte(1500, 6)
+        breiten = np.concatenate((breiten, rng.uniform(-60, 60, 100), rng.uniform(80, 90, 50), rng.uniform(-90, -80, 50)))
+        laengen = np.concatenate((laengen, rng.choice([-1, 1], 100) * rng.uniform(175, 180, 100),
+                                  rng.uniform(-180, 180, 100)))
+        self.koordinaten = geodaesie.Koordinaten(breiten, laengen)
+        self.index = geodaesie.Raumindex(self.koordinaten)
+        #Abfragen: zufällig, direkt an der Datumsgrenze (beide Seiten) und in Polnähe
+        anfragen = list(zip(*zufallspunkte(300, 7)))
+        anfragen += [(breite, seite * laenge) for breite in (-45.0, 0.0, 30.0, 65.0)
+                     for laenge in (179.99, 179.5, 178.0) for seite in (-1, 1)]
+        anfragen += [(seite * breite, laenge) for breite in (89.999, 89.5, 85.0) for laenge in (-180.0, -90.0, 0.0, 135.0)
+                     for seite in (-1, 1)]
+        self.anfragen = anfragen
+
+    def test_naechster_wie_alle_durchsuchen(self):
+        """naechster liefert dieselbe Stadt und denselben Abstand wie das Minimum über alle Abstände"""
+        for breite, laenge in self.anfragen:
+            abstaende = self.koordinaten.abstaende(breite, laenge)
+            erwartet = int(np.argmin(abstaende))
+            index, abstand = self.index.naechster(breite, laenge)
+            with self.subTest(breite=breite, laenge=laenge):
+                self.assertAlmostEqual(abstand, abstaende[erwartet], delta=1e-6)
+                self.assertAlmostEqual(abstaende[index], abstaende[erwartet], delta=1e-6)
+
+    def test_im_umkreis_wie_alle_durchsuchen(self):
+        """im_umkreis findet genau die Städte, deren Abstand höchstens der Radius ist, nach Abstand sortiert"""
+        for (breite, laenge), radius in zip(self.anfragen, [250, 500, 1000, 2500] * len(self.anfragen)):
+            abstaende = self.koordinaten.abstaende(breite, laenge)
+            indizes, gefunden = self.index.im_umkreis(breite, laenge, radius)
+            with self.subTest(breite=breite, laenge=laenge, radius=radius):
+                #genau auf dem Rand entscheidet die Rundung, diese Städte werden nicht verglichen
+                eindeutig = np.abs(abstaende - radius) > 1e-6
+                self.assertEqual(set(indizes.tolist()) & set(np.nonzero(eindeutig)[0].tolist()),
+                                 set(np.nonzero(eindeutig & (abstaende <= radius))[0].tolist()))
+                np.testing.assert_allclose(gefunden, abstaende[indizes], atol=1e-6)
+                self.assertTrue(np.all(np.diff(gefunden) >= 0))
+
+    def test_leerer_index(self):
+        index = geodaesie.Raumindex(geodaesie.Koordinaten([], []))
+        self.assertEqual(index.naechster(10.0, 20.0), (-1, float("inf")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests für die Klickstatistik: mehrere Spiele schreiben gleichzeitig in dieselben Dateien, ein abgebrochener
+Datensatz verschiebt die folgenden nicht und Spielernummern passen auch über 32767 hinaus.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import klickstatistik
+import namensliste
+
+VERZEICHNIS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KONTINENTE = ["Europa", "Afrika"]
+CODES = [0, 0, 1, 1]
+
+#ein Spiel, das als Spieler sys.argv[2] 200 Klicks auf Stadt sys.argv[3] anhängt
+SCHREIBER = """
+import sys
+import klickstatistik
+statistik = klickstatistik.Klickstatistik([0, 0, 1, 1], ["Europa", "Afrika"], sys.argv[1])
+for i in range(200):
+    statistik.hinzufuegen(10.0, 20.0, int(sys.argv[3]), float(i), sys.argv[2])
+statistik.schliessen()
+"""
+
+
+class KlickstatistikTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ordner = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.ordner.cleanup()
+
+    def oeffnen(self):
+        return klickstatistik.Klickstatistik(CODES, KONTINENTE, self.ordner.name)
+
+    def test_gleichzeitige_spiele(self):
+        """vier Spiele hängen gleichzeitig an: kein Klick geht verloren, jeder Spieler hat seine eigene Nummer"""
+        prozesse = [subprocess.Popen([sys.executable, "-c", SCHREIBER, self.ordner.name, name, str(stadt)],
+                                     cwd=VERZEICHNIS)
+                    for stadt, name in enumerate(["Anna", "Bob", "Anna", "Dora"])]
+        for prozess in prozesse:
+            self.assertEqual(prozess.wait(timeout=60), 0)
+        statistik = self.oeffnen()
+        self.assertEqual(len(statistik), 800)
+        namen = [name for name in statistik.spieler if name is not None]
+        self.assertEqual(sorted(set(namen)), ["Anna", "Bob", "Dora"])
+        #beide Anna-Spiele landen bei derselben Nummer
+        self.assertEqual(statistik.histogramm("spieler", "Anna")[0].sum(), 400)
+        self.assertEqual(statistik.histogramm("spieler", "Bob")[0].sum(), 200)
+        for stadt in range(4):
+            self.assertEqual(statistik.histogramm("stadt", stadt)[0].sum(), 200)
+        statistik.schliessen()
+
+    def test_abgebrochener_datensatz(self):
+        """ein halber Datensatz am Ende wird übergangen, danach geschriebene Klicks bleiben lesbar"""
+        statistik = self.oeffnen()
+        statistik.hinzufuegen(10.0, 20.0, 1, 5.0, "Anna")
+        statistik.schliessen()
+        with open(os.path.join(self.ordner.name, klickstatistik.KLICK_DATEI), "ab") as datei:
+            datei.write(b"\x00" * 7)
+        statistik = self.oeffnen()
+        self.assertEqual(len(statistik), 1)
+        statistik.hinzufuegen(-30.0, 40.0, 2, 6.0, "Bob")
+        statistik.schliessen()
+        statistik = self.oeffnen()
+        self.assertEqual(statistik.klicks["stadt"].tolist(), [1, 2])
+        self.assertEqual(statistik.klicks["breite"].tolist(), [10.0, -30.0])
+        statistik.schliessen()
+
+    def test_viele_spieler(self):
+        """Spielernummern über 32767 (Spielerlisten mit 100000 Namen) werden gespeichert, nicht abgeschnitten"""
+        pfad = os.path.join(self.ordner.name, klickstatistik.SPIELER_DATEI)
+        with open(pfad, "w", encoding="utf-8") as datei:
+            datei.writelines(json.dumps(f"Spieler{i}") + "\n" for i in range(70000))
+        statistik = self.oeffnen()
+        statistik.hinzufuegen(10.0, 20.0, 0, 1.0, "Spieler69999")
+        statistik.hinzufuegen(10.0, 20.0, 0, 1.0, "Neu")
+        statistik.schliessen()
+        statistik = self.oeffnen()
+        self.assertEqual(statistik.klicks["spieler"].tolist(), [69999, 70000])
+        self.assertEqual(statistik.histogramm("spieler", "Neu")[1], 1)
+        statistik.schliessen()
+
+    def test_alte_dateien_werden_beiseitegelegt(self):
+        """Dateien eines anderen Formats werden umbenannt statt überschrieben"""
+        with open(os.path.join(self.ordner.name, klickstatistik.META_DATEI), "w") as datei:
+            json.dump({"version": 1, "staedte": len(CODES), "spieler": ["Anna"]}, datei)
+        with open(os.path.join(self.ordner.name, klickstatistik.KLICK_DATEI), "wb") as datei:
+            datei.write(b"\x01" * 32)
+        statistik = self.oeffnen()
+        self.assertEqual(len(statistik), 0)
+        statistik.schliessen()
+        with open(os.path.join(self.ordner.name, klickstatistik.KLICK_DATEI + ".alt"), "rb") as datei:
+            self.assertEqual(datei.read(), b"\x01" * 32)
+
+
+class NamenslisteTest(unittest.TestCase):
+
+    def test_zwei_listen_eine_datei(self):
+        """zwei Listen auf derselben Datei vergeben keine Nummer doppelt und finden die Namen der anderen"""
+        with tempfile.TemporaryDirectory() as ordner:
+            pfad = os.path.join(ordner, "namen.jsonl")
+            erste, zweite = namensliste.Namensliste(pfad), namensliste.Namensliste(pfad)
+            self.assertEqual(erste.nummer("Anna"), 0)
+            self.assertEqual(zweite.nummer("Bob"), 1)
+            self.assertEqual(erste.nummer("Ćelina"), 2)
+            self.assertEqual(zweite.nummer("Anna"), 0)
+            self.assertEqual(erste.nummer("Bob"), 1)
+            self.assertEqual(namensliste.Namensliste(pfad).namen, ["Anna", "Bob", "Ćelina"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests für den json-Spielerspeicher: die Datei muss auch nach einem harten Abbruch immer lesbar sein, viele
+schnelle Punkte dürfen nur wenige Schreibvorgänge auslösen und beim Beenden geht nichts verloren.
+
+Aufruf (aus dem Projektordner): python -m unittest discover -s tests -t .
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import spielerspeicher
+
+VERZEICHNIS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#schreibt ohne Verzögerung so schnell wie möglich Punkte, bis der Prozess abgeschossen wird
+SCHREIBER = """
+import sys
+import spielerspeicher
+speicher = spielerspeicher.JsonSpeicher(sys.argv[1], verzoegerung=0)
+print("bereit", flush=True)
+i = 0
+while True:
+    speicher.punkt_hinzufuegen(f"Spieler{i % 50}")
+    i += 1
+"""
+
+#beendet sich normal, ohne schliessen() aufzurufen: atexit in Geoquiz muss die Punkte noch schreiben
+OHNE_SCHLIESSEN = """
+import sys
+import Geoquiz
+import spielerspeicher
+Geoquiz.spieler = spielerspeicher.JsonSpeicher(sys.argv[1], verzoegerung=60)
+for _ in range(5):
+    Geoquiz.spieler.punkt_hinzufuegen("Tester")
+"""
+
+
+def json_lesen(pfad):
+    with open(pfad, "r") as datei:
+        return json.load(datei)
+
+
+class JsonSpeicherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ordner = tempfile.TemporaryDirectory()
+        self.pfad = os.path.join(self.ordner.name, "spieler_score.json")
+
+    def tearDown(self):
+        self.ordner.cleanup()
+
+    def test_abbruch_mitten_im_schreiben(self):
+        """SIGKILL zu verschiedenen Zeitpunkten: die Datei ist vorher, währenddessen und danach gültiges json"""
+        for wartezeit in (0.05, 0.2, 0.5):
+            schreiber = subprocess.Popen([sys.executable, "-c", SCHREIBER, self.pfad], cwd=VERZEICHNIS,
+                                         stdout=subprocess.PIPE, text=True)
+            try:
+                self.assertEqual(schreiber.stdout.readline().strip(), "bereit")
+                ende = time.perf_counter() + wartezeit
+                gelesen = 0
+                while time.perf_counter() < ende:
+                    if os.path.exists(self.pfad):
+                        self.assertIsInstance(json_lesen(self.pfad), dict)
+                        gelesen += 1
+            finally:
+                schreiber.kill()
+                schreiber.wait()
+                schreiber.stdout.close()
+            self.assertGreater(gelesen, 0)
+            stand = json_lesen(self.pfad)
+            self.assertGreater(sum(stand.values()), 0)
+            self.assertTrue(all(isinstance(punkte, int) and punkte > 0 for punkte in stand.values()))
+
+    def test_viele_punkte_wenige_schreibvorgaenge(self):
+        """1000 schnelle Punkte: höchstens ein Schreibvorgang pro angefangener Wartezeit, plus dem beim Schließen"""
+        verzoegerung = 0.2
+        speicher = spielerspeicher.JsonSpeicher(self.pfad, verzoegerung=verzoegerung)
+        start = time.perf_counter()
+        for _ in range(1000):
+            speicher.punkt_hinzufuegen("Tester")
+        dauer = time.perf_counter() - start
+        self.assertTrue(speicher.schliessen())
+        hoechstens = int(dauer / verzoegerung) + 2
+        self.assertLessEqual(speicher.schreibvorgaenge, hoechstens)
+        self.assertGreaterEqual(speicher.schreibvorgaenge, 1)
+        self.assertEqual(json_lesen(self.pfad), {"Tester": 1000})
+
+    def test_schliessen_schreibt_sofort(self):
+        """schliessen() wartet nicht die Verzögerung ab, sondern schreibt ausstehende Punkte gleich"""
+        speicher = spielerspeicher.JsonSpeicher(self.pfad, verzoegerung=60)
+        speicher.punkt_hinzufuegen("Tester", 3)
+        start = time.perf_counter()
+        self.assertTrue(speicher.schliessen(timeout=5))
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(json_lesen(self.pfad), {"Tester": 3})
+
+    def test_atexit_schreibt_beim_beenden(self):
+        """endet das Programm ohne Quit (z.B. Fenster über die Titelleiste geschlossen), schreibt atexit"""
+        subprocess.run([sys.executable, "-c", OHNE_SCHLIESSEN, self.pfad], cwd=VERZEICHNIS, check=True,
+                       capture_output=True, timeout=60)
+        self.assertEqual(json_lesen(self.pfad), {"Tester": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Tests für die Spielsitzung ohne Fenster: Treffer und Fehlversuche, drei Versuche pro Runde, zehn Runden pro
+Spiel, der Punktestand pro Spiel und die Reihenfolge der Ereignisse. Dazu der Kartenstapel: keine Wiederholung,
+bis alle Städte dran waren, auch über mehrere Spiele hinweg, und reproduzierbare Spiele mit seed.
+"""
+
+import random
+import unittest
+
+import spiellogik
+
+#zwölf Städte am Äquator, 30 Grad (über 3000 km) auseinander
+STAEDTE = [{"Hauptstadt": f"Stadt{i}", "Land": f"Land{i}", "Kontinent": "Europa", "Breitengrad": 0.0,
+            "Längengrad": -165.0 + 30 * i} for i in range(12)]
+
+
+def treffen(spiel):
+    """klickt genau auf die gesuchte Stadt"""
+    return spiel.klick(spiel.stadt["Breitengrad"], spiel.stadt["Längengrad"])
+
+
+def danebenklicken(spiel):
+    """klickt auf den Gegenpunkt der gesuchten Stadt"""
+    return spiel.klick(-spiel.stadt["Breitengrad"], (spiel.stadt["Längengrad"] + 360) % 360 - 180)
+
+
+def spielen(spiel, hauptstaedte=None):
+    """spielt ein ganzes Spiel mit lauter Treffern und gibt die Indizes der gesuchten Städte zurück"""
+    spiel.neues_spiel(hauptstaedte)
+    staedte = []
+    for runde in range(spiellogik.RUNDEN_PRO_SPIEL):
+        staedte.append(spiel.index)
+        treffen(spiel)
+        if runde < spiellogik.RUNDEN_PRO_SPIEL - 1:
+            spiel.naechste_runde()
+    return staedte
+
+
+class KartenstapelTest(unittest.TestCase):
+
+    def test_ziehen_ohne_wiederholung(self):
+        """jede Karte kommt einmal, danach ist der Stapel leer und wird beim nächsten Ziehen aufgefüllt"""
+        stapel = spiellogik.Kartenstapel(50, random.Random(3))
+        gezogen = [stapel.ziehen() for _ in range(50)]
+        self.assertEqual(sorted(gezogen), list(range(50)))
+        self.assertTrue(stapel.leer)
+        self.assertEqual(stapel.durchgaenge, 0)
+        zweiter_durchgang = [stapel.ziehen() for _ in range(50)]
+        self.assertEqual(stapel.durchgaenge, 1)
+        self.assertEqual(sorted(zweiter_durchgang), list(range(50)))
+
+    def test_leerer_stapel(self):
+        with self.assertRaises(ValueError):
+            spiellogik.Kartenstapel(0, random.Random())
+
+    def test_kleine_auswahl_endet(self):
+        """drei Städte reichen für ein Spiel mit zehn Runden: der Stapel wird aufgefüllt statt endlos zu suchen"""
+        spiel = spiellogik.Spielsitzung(STAEDTE[:3], seed=2)
+        leer = []
+        spiel.abonnieren("stapel_leer", lambda durchgaenge: leer.append((spiel.runde, durchgaenge)))
+        staedte = spielen(spiel)
+        self.assertEqual(len(staedte), spiellogik.RUNDEN_PRO_SPIEL)
+        self.assertEqual(leer, [(4, 1), (7, 2), (10, 3)])
+        for anfang in range(0, 9, 3):
+            self.assertEqual(sorted(staedte[anfang:anfang + 3]), [0, 1, 2])
+
+    def test_seed(self):
+        """gleicher seed, gleiche Städte in gleicher Reihenfolge"""
+        erstes = spielen(spiellogik.Spielsitzung(STAEDTE, seed=7))
+        self.assertEqual(spielen(spiellogik.Spielsitzung(STAEDTE, seed=7)), erstes)
+        self.assertNotEqual([spielen(spiellogik.Spielsitzung(STAEDTE, seed=seed)) for seed in range(3)],
+                            [erstes] * 3)
+
+    def test_stapel_bleibt_ueber_spiele(self):
+        """bei gleicher Auswahl kommen im zweiten Spiel zuerst die Städte, die noch nicht dran waren"""
+        spiel = spiellogik.Spielsitzung(STAEDTE, seed=4)
+        erstes = spielen(spiel, STAEDTE)
+        self.assertEqual(len(set(erstes)), spiellogik.RUNDEN_PRO_SPIEL)
+        zweites = spielen(spiel, STAEDTE)
+        self.assertEqual(sorted(erstes + zweites[:2]), list(range(len(STAEDTE))))
+        self.assertEqual(spiel.stapel.durchgaenge, 1)
+        #eine andere Auswahl bekommt einen neuen Stapel
+        spiel.neues_spiel(STAEDTE[:6])
+        self.assertEqual(spiel.stapel.durchgaenge, 0)
+        self.assertEqual(len(spiel.stapel), 5)
+
+
+class SpielsitzungTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spiel = spiellogik.Spielsitzung(STAEDTE, schwierigkeitsgrad=500, rng=random.Random(1))
+        self.ereignisse = []
+        for ereignis in ("neue_runde", "daneben", "treffer", "verloren", "punkt", "runde_beendet", "spiel_beendet"):
+            self.spiel.abonnieren(ereignis, lambda ereignis=ereignis, **daten: self.ereignisse.append((ereignis, daten)))
+
+    def namen(self):
+        return [ereignis for ereignis, _ in self.ereignisse]
+
+    def test_treffer(self):
+        """ein Klick auf die Stadt gewinnt die Runde, danach sind Klicks gesperrt"""
+        self.spiel.neues_spiel()
+        self.assertEqual(treffen(self.spiel), "treffer")
+        self.assertTrue(self.spiel.gewonnen)
+        self.assertTrue(self.spiel.runde_vorbei)
+        self.assertEqual(self.spiel.punkte, 1)
+        self.assertEqual(self.spiel.versuche, spiellogik.VERSUCHE_PRO_RUNDE - 1)
+        self.assertIsNone(treffen(self.spiel))
+        self.assertEqual(self.spiel.punkte, 1)
+
+    def test_drei_versuche(self):
+        """zwei Fehlversuche sind daneben, der dritte verliert die Runde ohne Punkt"""
+        self.spiel.neues_spiel()
+        self.assertEqual([danebenklicken(self.spiel) for _ in range(spiellogik.VERSUCHE_PRO_RUNDE)],
+                         ["daneben", "daneben", "verloren"])
+        self.assertEqual(self.spiel.versuche, 0)
+        self.assertTrue(self.spiel.verloren)
+        self.assertEqual(self.spiel.punkte, 0)
+        self.assertIsNone(danebenklicken(self.spiel))
+        #die nächste Runde hat wieder alle Versuche
+        self.spiel.naechste_runde()
+        self.assertEqual(self.spiel.versuche, spiellogik.VERSUCHE_PRO_RUNDE)
+        self.assertFalse(self.spiel.runde_vorbei)
+
+    def test_runden_pro_spiel(self):
+        """nach RUNDEN_PRO_SPIEL Runden kommt spiel_beendet statt runde_beendet, keine Stadt kommt doppelt"""
+        self.spiel.neues_spiel()
+        for runde in range(1, spiellogik.RUNDEN_PRO_SPIEL + 1):
+            self.assertEqual(self.spiel.runde, runde)
+            if runde % 2:
+                treffen(self.spiel)
+            else:
+                for _ in range(spiellogik.VERSUCHE_PRO_RUNDE):
+                    danebenklicken(self.spiel)
+            if runde < spiellogik.RUNDEN_PRO_SPIEL:
+                self.assertEqual(self.ereignisse[-1], ("runde_beendet", {"runde": runde, "gewonnen": bool(runde % 2)}))
+                self.spiel.naechste_runde()
+        self.assertEqual(self.namen().count("runde_beendet"), spiellogik.RUNDEN_PRO_SPIEL - 1)
+        ereignis, daten = self.ereignisse[-1]
+        self.assertEqual(ereignis, "spiel_beendet")
+        self.assertEqual([ergebnis for _, ergebnis in daten["ergebnisse"]],
+                         [bool(runde % 2) for runde in range(1, spiellogik.RUNDEN_PRO_SPIEL + 1)])
+        self.assertEqual(len(set(self.spiel.abgehakt)), spiellogik.RUNDEN_PRO_SPIEL)
+        self.assertEqual(len(self.spiel.auswertung()), spiellogik.RUNDEN_PRO_SPIEL)
+
+    def test_punkte_pro_spiel(self):
+        """neues_spiel setzt den Punktestand zurück, punkt meldet die Punkte des aktuellen Spiels"""
+        self.spiel.neues_spiel()
+        for _ in range(3):
+            treffen(self.spiel)
+            self.spiel.naechste_runde()
+        self.assertEqual(self.spiel.punkte, 3)
+        self.spiel.neues_spiel()
+        self.assertEqual(self.spiel.punkte, 0)
+        self.assertEqual(self.spiel.runde, 1)
+        treffen(self.spiel)
+        self.assertEqual([daten["punkte"] for ereignis, daten in self.ereignisse if ereignis == "punkt"], [1, 2, 3, 1])
+
+    def test_reihenfolge_der_ereignisse(self):
+        """eine Runde mit einem Fehlversuch und einem Treffer, dann eine verlorene Runde"""
+        self.spiel.neues_spiel()
+        danebenklicken(self.spiel)
+        treffen(self.spiel)
+        self.spiel.naechste_runde()
+        for _ in range(spiellogik.VERSUCHE_PRO_RUNDE):
+            danebenklicken(self.spiel)
+        self.assertEqual(self.namen(), ["neue_runde", "daneben", "punkt", "treffer", "runde_beendet",
+                                        "neue_runde", "daneben", "daneben", "verloren", "runde_beendet"])
+        self.assertIs(self.ereignisse[0][1]["stadt"], STAEDTE[self.spiel.abgehakt[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests für trefferzonen: die Rastermaske muss für jeden Klick dasselbe entscheiden wie der Vergleich des genauen
+Abstands mit dem Schwierigkeitsgrad, in INNEN-, AUSSEN- und RAND-Zellen, auch an den Polen und der Datumsgrenze.
+Der Zwischenspeicher liegt neben der json-Datei der Hauptstädte.
+
+Aufruf (aus dem Projektordner): python -m unittest discover -s tests -t .
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import datensatz
+import geodaesie
+import trefferzonen
+
+#Breite, Länge: normale Städte, nahe den Polen und beiderseits der Datumsgrenze
+STAEDTE = [(52.52, 13.40), (0.0, 0.0), (69.65, 18.96), (88.5, 40.0), (-89.2, -120.0), (-17.7, 178.4),
+           (-13.8, -171.8), (64.8, -179.9)]
+
+
+def klicks_um(breite, laenge, radius, anzahl, rng):
+    """zufällige Klicks bis zum doppelten radius um die Stadt, Breite begrenzt, Länge über die Datumsgrenze gefaltet"""
+    grad = 2 * radius / 111.2
+    breiten = np.clip(breite + rng.uniform(-grad, grad, anzahl), -90, 90)
+    laengen = laenge + rng.uniform(-grad, grad, anzahl) / max(np.cos(np.radians(breite)), 0.05)
+    return breiten, (laengen + 180) % 360 - 180
+
+
+class TrefferzonenTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        breiten, laengen = zip(*STAEDTE)
+        cls.koordinaten = geodaesie.Koordinaten(breiten, laengen)
+        cls.radien = trefferzonen.SCHWIERIGKEITSGRADE
+        cls.zonen = trefferzonen.Trefferzonen(cls.koordinaten, cls.radien,
+                                              *trefferzonen.berechnen(cls.koordinaten, cls.radien))
+
+    def test_treffer_wie_abstand(self):
+        """für jeden Zustand der Maske: treffer ist genau dann True, wenn abstand_zu <= radius"""
+        rng = np.random.default_rng(3)
+        gesehen = {trefferzonen.INNEN: 0, trefferzonen.RAND: 0, trefferzonen.AUSSEN: 0}
+        for stadt, (breite, laenge) in enumerate(STAEDTE):
+            for radius in self.radien:
+                klick_breiten, klick_laengen = klicks_um(breite, laenge, radius, 400, rng)
+                welt_breiten, welt_laengen = rng.uniform(-90, 90, 50), rng.uniform(-180, 180, 50)
+                for klick in zip(np.concatenate([klick_breiten, welt_breiten]).tolist(),
+                                 np.concatenate([klick_laengen, welt_laengen]).tolist()):
+                    zustand = self.zonen.zustand(stadt, radius, *klick)
+                    gesehen[zustand] += 1
+                    erwartet = self.koordinaten.abstand_zu(stadt, *klick) <= radius
+                    self.assertEqual(self.zonen.treffer(stadt, radius, *klick), erwartet,
+                                     f"Stadt {STAEDTE[stadt]}, {radius} km, Klick {klick}, Zustand {zustand}")
+        for zustand, anzahl in gesehen.items():
+            self.assertGreater(anzahl, 0, f"kein Klick im Zustand {zustand}")
+
+    def test_stadt_und_ring(self):
+        """die Stadt selbst ist ein Treffer, der Toleranzring liegt radius km entfernt"""
+        for stadt, (breite, laenge) in enumerate(STAEDTE):
+            for radius in self.radien:
+                self.assertTrue(self.zonen.treffer(stadt, radius, breite, laenge))
+                ring_breiten, ring_laengen = self.zonen.ring(stadt, radius)
+                np.testing.assert_allclose(geodaesie.haversine(breite, laenge, ring_breiten, ring_laengen),
+                                           radius, rtol=1e-3)
+
+
+def beispieldaten(anzahl=5):
+    """die ersten Einträge der echten json-Datei"""
+    projekt = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(projekt, "capital_continent_country_data.json"), "r") as datei:
+        return json.load(datei)[:anzahl]
+
+
+class LadenTest(unittest.TestCase):
+
+    def test_zwischenspeicher_neben_json(self):
+        """ohne ordner landen die Trefferzonen im Zwischenspeicher der Hauptstadtdaten, nicht im Arbeitsordner"""
+        eintraege = beispieldaten()
+        with tempfile.TemporaryDirectory() as ordner:
+            json_pfad = os.path.join(ordner, "staedte.json")
+            with open(json_pfad, "w") as datei:
+                json.dump(eintraege, datei)
+            capitals = datensatz.laden(json_pfad)
+            zwischenspeicher = os.path.join(ordner, datensatz.CACHE_ORDNER)
+            self.assertEqual(capitals.ordner, zwischenspeicher)
+
+            zonen = trefferzonen.laden(capitals)
+            self.assertTrue(os.path.exists(os.path.join(zwischenspeicher, "trefferzonen.json")))
+            geladen = trefferzonen.laden(capitals)
+            self.assertIsInstance(geladen.masken, np.memmap)
+            np.testing.assert_array_equal(geladen.ringe, zonen.ringe)
+            self.assertEqual(capitals.auswahl([0, 2]).ordner, zwischenspeicher)
+
+    def test_ohne_zwischenspeicher(self):
+        """Hauptstadtdaten ohne ordner: nur im Speicher berechnet"""
+        ohne = datensatz.Hauptstadtdaten(*datensatz.spalten_bauen(beispieldaten()[:3]))
+        zonen = trefferzonen.laden(ohne, radien=(500,))
+        self.assertTrue(zonen.treffer(0, 500, float(ohne.breite[0]), float(ohne.laenge[0])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+Vorberechnete Trefferzonen: für jede Hauptstadt und jeden Schwierigkeitsgrad (250, 500, 1000 km) der
+geodätische Kreis als Polygon und eine grobe Rastermaske.
+
+Die Maske teilt die Welt in Zellen von ZELLE_GRAD Grad. Pro Stadt und Radius wird nur das Rechteck um den
+Kreis gespeichert, jede Zelle ist INNEN (jeder Punkt der Zelle ist nah genug), AUSSEN (kein Punkt) oder
+RAND. Ein Klick wird so mit einem Array-Zugriff entschieden, nur in einer Randzelle wird noch der genaue
+Abstand berechnet - das Ergebnis ist dasselbe wie beim Vergleich des Abstands mit dem Schwierigkeitsgrad.
+Mit dem Polygon kann nach einem Fehlversuch sofort der Toleranzring gezeichnet werden.
+
+Gespeichert wird alles als .npy-Dateien im Ordner .geoquiz_cache neben der json-Datei der Hauptstädte
+(eingeblendet per mmap). In
+trefferzonen.json steht ein Schlüssel aus den Koordinaten aller Städte, den Radien und dem Rasterformat -
+ändert sich der Datensatz oder die Liste der Schwierigkeitsgrade, wird neu berechnet.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import geodaesie
+
+SCHWIERIGKEITSGRADE = (250, 500, 1000)
+#Kantenlänge einer Rasterzelle in Grad
+ZELLE_GRAD = 0.25
+#Punkte pro Toleranzring
+RINGPUNKTE = 128
+FORMAT_VERSION = 1
+
+AUSSEN, RAND, INNEN = 0, 1, 2
+ZEILEN_WELT = int(round(180 / ZELLE_GRAD))
+SPALTEN_WELT = int(round(360 / ZELLE_GRAD))
+
+
+def schluessel(koordinaten, radien):
+    """Hash über alles, wovon die Trefferzonen abhängen"""
+    pruefsumme = hashlib.sha1(json.dumps([FORMAT_VERSION, ZELLE_GRAD, RINGPUNKTE, list(radien)]).encode("utf-8"))
+    pruefsumme.update(np.ascontiguousarray(koordinaten.breite, dtype="<f8").tobytes())
+    pruefsumme.update(np.ascontiguousarray(koordinaten.laenge, dtype="<f8").tobytes())
+    return pruefsumme.hexdigest()
+
+
+def zellradien():
+    """für jede Rasterzeile der größte Abstand in km vom Mittelpunkt einer Zelle zu einem Punkt der Zelle.
+
+    Der größte Abstand liegt an einer Ecke; aufgerundet, damit Rundungsfehler nie eine Zelle fälschlich
+    INNEN oder AUSSEN machen."""
+    mitte = 90 - (np.arange(ZEILEN_WELT) + 0.5) * ZELLE_GRAD
+    halb = ZELLE_GRAD / 2
+    ecken = [geodaesie.haversine(mitte, 0, mitte + richtung * halb, halb) for richtung in (-1, 1)]
+    return np.maximum(*ecken) * 1.01 + 1e-6
+
+
+def zone_berechnen(breite, laenge, radius, radien_der_zeilen):
+    """Maske für einen Kreis: gibt (erste Zeile, erste Spalte, Maske als uint8-Array Zeilen x Spalten) zurück.
+
+    Spalten zählen ab Länge -180 und laufen über die Datumsgrenze weiter (modulo SPALTEN_WELT)."""
+    winkel = min(radius / geodaesie.ERDRADIUS, np.pi)
+    breiten_abstand = np.degrees(winkel)
+    oben, unten = min(90.0, breite + breiten_abstand), max(-90.0, breite - breiten_abstand)
+    zeile0 = int((90 - oben) // ZELLE_GRAD)
+    zeile1 = min(ZEILEN_WELT, int((90 - unten) // ZELLE_GRAD) + 1)
+    sin_laenge = np.sin(winkel) / np.cos(np.radians(breite))
+    if breite + breiten_abstand >= 90 or breite - breiten_abstand <= -90 or sin_laenge >= 1:
+        #der Kreis enthält einen Pol: alle Längen
+        spalte0, spalten = 0, SPALTEN_WELT
+    else:
+        laengen_abstand = np.degrees(np.arcsin(sin_laenge))
+        spalte0 = int((laenge - laengen_abstand + 180) // ZELLE_GRAD)
+        spalten = min(SPALTEN_WELT, int((laenge + laengen_abstand + 180) // ZELLE_GRAD) + 1 - spalte0)
+        spalte0 %= SPALTEN_WELT
+    zeilen = np.arange(zeile0, zeile1)
+    mitte_breite = 90 - (zeilen + 0.5) * ZELLE_GRAD
+    mitte_laenge = -180 + ((spalte0 + np.arange(spalten)) % SPALTEN_WELT + 0.5) * ZELLE_GRAD
+    abstaende = geodaesie.haversine(breite, laenge, mitte_breite[:, np.newaxis], mitte_laenge[np.newaxis, :])
+    zellradius = radien_der_zeilen[zeilen][:, np.newaxis]
+    maske = np.full(abstaende.shape, RAND, dtype=np.uint8)
+    maske[abstaende + zellradius <= radius] = INNEN
+    maske[abstaende - zellradius > radius] = AUSSEN
+    return zeile0, spalte0, maske
+
+
+def berechnen(koordinaten, radien=SCHWIERIGKEITSGRADE):
+    """berechnet Ringe und Masken aller Städte und Radien.
+
+    Gibt index (Städte x Radien x [Offset, erste Zeile, erste Spalte, Zeilen, Spalten]), die aneinander-
+    gehängten Masken und die Ringe (Städte x Radien x [Breite, Länge] x Punkte, float32) zurück."""
+    radien_der_zeilen = zellradien()
+    index = np.zeros((len(koordinaten), len(radien), 5), dtype=np.int64)
+    masken = []
+    offset = 0
+    for stadt, (breite, laenge) in enumerate(zip(koordinaten.breite.tolist(), koordinaten.laenge.tolist())):
+        for nummer, radius in enumerate(radien):
+            zeile0, spalte0, maske = zone_berechnen(breite, laenge, radius, radien_der_zeilen)
+            index[stadt, nummer] = (offset, zeile0, spalte0, maske.shape[0], maske.shape[1])
+            masken.append(maske.ravel())
+            offset += maske.size
+    masken = np.concatenate(masken) if masken else np.empty(0, dtype=np.uint8)
+    ringe = np.empty((len(koordinaten), len(radien), 2, RINGPUNKTE + 1), dtype=np.float32)
+    for nummer, radius in enumerate(radien):
+        ringe[:, nummer, 0], ringe[:, nummer, 1] = geodaesie.kreis(koordinaten.breite, koordinaten.laenge, radius,
+                                                                   RINGPUNKTE)
+    return index, masken, ringe
+
+
+class Trefferzonen:
+    """Ringe und Rastermasken aller Städte eines Datensatzes für die Radien in radien.
+
+    Städte werden über ihren Index im vollständigen Datensatz angesprochen (datensatz.Hauptstadtdaten.indizes).
+    """
+
+    def __init__(self, koordinaten, radien, index, masken, ringe):
+        self.koordinaten = koordinaten
+        self.radien = tuple(radien)
+        self.index = index
+        self.masken = masken
+        self.ringe = ringe
+        self._nummer = {radius: nummer for nummer, radius in enumerate(self.radien)}
+        #für Einzelabfragen: Python-Listen und ein memoryview sind schneller als NumPy-Skalarzugriffe
+        self._index = [[tuple(zone) for zone in stadt] for stadt in np.asarray(index).tolist()]
+        self._masken = memoryview(np.asarray(masken).view(np.ndarray))
+
+    def __contains__(self, radius):
+        return radius in self._nummer
+
+    def zustand(self, stadt, radius, breite, laenge):
+        """INNEN, RAND oder AUSSEN für einen Klick, nur aus der Maske"""
+        offset, zeile0, spalte0, zeilen, spalten = self._index[stadt][self._nummer[radius]]
+        zeile = min(int((90 - breite) // ZELLE_GRAD), ZEILEN_WELT - 1) - zeile0
+        spalte = (int((laenge + 180) // ZELLE_GRAD) - spalte0) % SPALTEN_WELT
+        if not 0 <= zeile < zeilen or spalte >= spalten:
+            return AUSSEN
+        return self._masken[offset + zeile * spalten + spalte]
+
+    def treffer(self, stadt, radius, breite, laenge):
+        """True, wenn der Klick höchstens radius km von der Stadt entfernt ist"""
+        zustand = self.zustand(stadt, radius, breite, laenge)
+        if zustand == RAND:
+            return self.koordinaten.abstand_zu(stadt, breite, laenge) <= radius
+        return zustand == INNEN
+
+    def ring(self, stadt, radius):
+        """der Toleranzring als (Breiten, Längen) in Grad"""
+        ring = self.ringe[stadt, self._nummer[radius]]
+        return ring[0], ring[1]
+
+
+def laden(hauptstaedte, radien=SCHWIERIGKEITSGRADE, ordner=None):
+    """lädt die Trefferzonen aus dem Zwischenspeicher oder berechnet und speichert sie neu.
+
+    Ohne ordner wird derselbe Zwischenspeicher wie für die Hauptstadtdaten benutzt (hauptstaedte.ordner, neben
+    der json-Datei). Haben die Hauptstadtdaten keinen, wird nur im Speicher berechnet."""
+    koordinaten = hauptstaedte.koordinaten
+    if ordner is None:
+        ordner = hauptstaedte.ordner
+    if ordner is None:
+        return Trefferzonen(koordinaten, radien, *berechnen(koordinaten, radien))
+    aktuell = schluessel(koordinaten, radien)
+    dateien = {name: os.path.join(ordner, f"trefferzonen_{name}.npy") for name in ("index", "masken", "ringe")}
+    meta_pfad = os.path.join(ordner, "trefferzonen.json")
+    try:
+        with open(meta_pfad, "r") as datei:
+            meta = json.load(datei)
+        if meta.get("schluessel") == aktuell:
+            return Trefferzonen(koordinaten, radien, *(np.load(dateien[name], mmap_mode="r")
+                                                       for name in ("index", "masken", "ringe")))
+    except (OSError, ValueError):
+        pass #kein oder unvollständiger Zwischenspeicher, wird neu berechnet
+
+    daten = dict(zip(("index", "masken", "ringe"), berechnen(koordinaten, radien)))
+    try:
+        os.makedirs(ordner, exist_ok=True)
+        for name, werte in daten.items():
+            temp = f"{dateien[name]}.{os.getpid()}.tmp.npy"
+            np.save(temp, werte)
+            os.replace(temp, dateien[name])
+        temp = f"{meta_pfad}.{os.getpid()}.tmp"
+        with open(temp, "w") as datei:
+            json.dump({"schluessel": aktuell, "radien": list(radien)}, datei)
+        os.replace(temp, meta_pfad)
+    except OSError:
+        pass #Ordner nicht beschreibbar: dann eben nur im Speicher
+    return Trefferzonen(koordinaten, radien, daten["index"], daten["masken"], daten["ringe"])